@@ -7,7 +7,7 @@ config = context.config
 db_url = os.getenv("DATABASE_URL")
 if db_url:
     config.set_main_option("sqlalchemy.url", db_url)
-if config.config_file_name:
+if config.config_file_name and config.file_config.has_section("formatters"):
     fileConfig(config.config_file_name)
 
 from pos_app.data.db import Base  # noqa
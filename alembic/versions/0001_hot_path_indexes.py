@@ -0,0 +1,26 @@
+"""hot path indexes
+
+Indexes for the sales report filter, the sale line / payment joins and the
+inventory lookup at checkout. Databases created with setup_db.py already
+have the tables (and, from now on, these indexes), so the indexes are
+created with ``if_not_exists`` and ``alembic upgrade head`` is safe on both.
+"""
+revision = '0001_hot_path_indexes'
+down_revision = None
+from alembic import op
+import sqlalchemy as sa
+
+INDEXES = [
+    ("ix_sales_status_datetime", "sales", ["status", "datetime"]),
+    ("ix_sale_lines_sale_id", "sale_lines", ["sale_id"]),
+    ("ix_payments_sale_id", "payments", ["sale_id"]),
+    ("ix_inventory_product_id", "inventory", ["product_id", "id"]),
+]
+
+def upgrade():
+    for name, table, cols in INDEXES:
+        op.create_index(name, table, cols, if_not_exists=True)
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
@@ -0,0 +1,21 @@
+"""sale client uuid
+
+Adds ``sales.client_uuid`` with a unique index; offline tills set it at
+checkout so replaying a journaled sale never records it twice. Databases
+created with setup_db.py already have the column, so it is only added when
+missing and the index is created with ``if_not_exists``.
+"""
+revision = '0002_sale_client_uuid'
+down_revision = '0001_hot_path_indexes'
+from alembic import op
+import sqlalchemy as sa
+
+def upgrade():
+    if "client_uuid" not in {c["name"] for c in sa.inspect(op.get_bind()).get_columns("sales")}:
+        op.add_column("sales", sa.Column("client_uuid", sa.String(36), nullable=True))
+    op.create_index("ux_sales_client_uuid", "sales", ["client_uuid"], unique=True, if_not_exists=True)
+
+def downgrade():
+    op.drop_index("ux_sales_client_uuid", table_name="sales")
+    with op.batch_alter_table("sales") as batch:
+        batch.drop_column("client_uuid")
@@ -0,0 +1,49 @@
+"""sales daily rollups
+
+Creates the daily rollup tables that checkout updates and the Reports tabs
+read (see services/rollups.py). Databases created with setup_db.py already
+have them, so existing tables are skipped and ``alembic upgrade head`` is safe
+on both. Fill them from existing sales with ``python -m pos_app.services.rollups``.
+"""
+revision = '0003_sales_daily_rollups'
+down_revision = '0002_sale_client_uuid'
+from alembic import op
+import sqlalchemy as sa
+
+def _tables():
+    return [
+        ("sales_daily_summary", [
+            sa.Column("register_id", sa.Integer, nullable=False, default=0),
+            sa.Column("sale_count", sa.Integer, nullable=False, default=0),
+            sa.Column("subtotal", sa.Float, nullable=False, default=0.0),
+            sa.Column("tax_total", sa.Float, nullable=False, default=0.0),
+            sa.Column("grand_total", sa.Float, nullable=False, default=0.0),
+        ], ("register_id", "uq_sales_daily_summary_day_register")),
+        ("sales_daily_category", [
+            sa.Column("category_id", sa.Integer, nullable=False, default=0),
+            sa.Column("total", sa.Float, nullable=False, default=0.0),
+        ], ("category_id", "uq_sales_daily_category_day_category")),
+        ("sales_daily_cashier", [
+            sa.Column("cashier_id", sa.Integer, nullable=False, default=0),
+            sa.Column("sale_count", sa.Integer, nullable=False, default=0),
+            sa.Column("total", sa.Float, nullable=False, default=0.0),
+        ], ("cashier_id", "uq_sales_daily_cashier_day_cashier")),
+        ("sales_daily_payment", [
+            sa.Column("method", sa.String(32), nullable=False),
+            sa.Column("total", sa.Float, nullable=False, default=0.0),
+        ], ("method", "uq_sales_daily_payment_day_method")),
+    ]
+
+def upgrade():
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+    for name, cols, (key, uq) in _tables():
+        if name in existing:
+            continue
+        op.create_table(name, sa.Column("id", sa.Integer, primary_key=True), sa.Column("day", sa.Date, nullable=False),
+                        *cols, sa.UniqueConstraint("day", key, name=uq))
+
+def downgrade():
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+    for name, _, _ in reversed(_tables()):
+        if name in existing:
+            op.drop_table(name)
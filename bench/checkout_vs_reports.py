@@ -0,0 +1,109 @@
+"""Checkout throughput while reports run, with and without the SQLite profile.
+
+Builds a throwaway SQLite database per mode with bench/gen_data.py (products
+and a month of sales history), then runs checkout threads that complete small
+sales through CompleteSaleService while report threads keep scanning the raw
+sales tables.
+Prints checkouts/s, commit latency percentiles and lock errors per mode.
+
+    python bench/checkout_vs_reports.py [--seconds 10] [--registers 2] [--readers 2] [--history 20000]
+"""
+import argparse
+import json
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from sqlalchemy import func, select
+from sqlalchemy.exc import OperationalError
+from pos_app.data.db import get_engine, get_session_maker
+from pos_app.data.models import Product, Sale, SaleLine
+from pos_app.services.cart import Cart
+from pos_app.services.product_cache import barcode_cache
+from pos_app.services.sales import CompleteSaleService
+import gen_data
+
+def build_db(path: Path, tuned: bool, products: int, history: int):
+    engine = get_engine(f"sqlite:///{path}", tuned=tuned)
+    gen_data.generate(engine, products=products, customers=0, days=30, sales_per_day=max(1, history // 30))
+    return engine
+
+def checkout_loop(SessionLocal, barcodes, stop, latencies, errors):
+    rnd = random.Random()
+    with SessionLocal() as s:
+        svc = CompleteSaleService(s)
+        while not stop.is_set():
+            try:
+                cart = Cart(register_id=2)
+                for code in rnd.sample(barcodes, 3):
+                    svc.add_item(cart, code)
+                t = time.perf_counter()
+                svc.finalize(cart, payment_amount=1e6)
+                latencies.append(time.perf_counter() - t)
+            except (OperationalError, RuntimeError):
+                s.rollback(); errors.append(1)
+
+def report_loop(SessionLocal, stop, runs):
+    # the pre-rollup style reports: full scans inside one read transaction
+    with SessionLocal() as s:
+        while not stop.is_set():
+            s.execute(select(func.date(Sale.datetime), func.count(), func.sum(Sale.grand_total))
+                      .where(Sale.status == "completed").group_by(func.date(Sale.datetime))).all()
+            s.execute(select(SaleLine.product_id, func.sum(SaleLine.line_total)).group_by(SaleLine.product_id)).all()
+            s.rollback(); runs.append(1)
+
+def run_mode(tuned: bool, args) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = build_db(Path(tmp) / "bench.db", tuned, args.products, args.history)
+        SessionLocal = get_session_maker(engine)
+        with SessionLocal() as s:
+            barcodes = list(s.scalars(select(Product.barcode).where(Product.active.is_(True), Product.barcode.like("20%")).limit(2000)))
+        barcode_cache.invalidate()
+        stop = threading.Event()
+        latencies, errors, runs = [], [], []
+        threads = [threading.Thread(target=checkout_loop, args=(SessionLocal, barcodes, stop, latencies, errors)) for _ in range(args.registers)]
+        threads += [threading.Thread(target=report_loop, args=(SessionLocal, stop, runs)) for _ in range(args.readers)]
+        for t in threads: t.start()
+        time.sleep(args.seconds); stop.set()
+        for t in threads: t.join()
+        with engine.connect() as conn:
+            journal = conn.exec_driver_sql("PRAGMA journal_mode").scalar()
+        engine.dispose()
+    lat = sorted(latencies) or [0.0]
+    return {
+        "profile": "tuned" if tuned else "default",
+        "journal_mode": journal,
+        "checkouts": len(latencies),
+        "checkouts_per_s": round(len(latencies) / args.seconds, 1),
+        "commit_p50_ms": round(statistics.median(lat) * 1000, 2),
+        "commit_p95_ms": round(lat[int(len(lat) * 0.95) - 1 if len(lat) > 1 else 0] * 1000, 2),
+        "commit_max_ms": round(lat[-1] * 1000, 2),
+        "lock_errors": len(errors),
+        "report_runs": len(runs),
+    }
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--seconds", type=float, default=10)
+    ap.add_argument("--registers", type=int, default=2)
+    ap.add_argument("--readers", type=int, default=2)
+    ap.add_argument("--products", type=int, default=5000)
+    ap.add_argument("--history", type=int, default=20000)
+    ap.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = ap.parse_args()
+    results = [run_mode(False, args), run_mode(True, args)]
+    if args.json:
+        print(json.dumps(results, indent=2)); return
+    for r in results:
+        print(f"{r['profile']:>8} ({r['journal_mode']}): {r['checkouts_per_s']:>7} checkouts/s  "
+              f"p50 {r['commit_p50_ms']} ms  p95 {r['commit_p95_ms']} ms  max {r['commit_max_ms']} ms  "
+              f"lock errors {r['lock_errors']}  report runs {r['report_runs']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""Synthetic data at realistic scale for benchmarks.
+
+Creates (or extends) the database at ``--url`` with N products (plus inventory
+rows), M customers and a sales history with lines and payments, all written
+with bulk executemany inserts, then rebuilds the daily rollups:
+
+    python bench/gen_data.py --url sqlite:///bench.db --products 100000 --customers 20000 --years 2 --sales-per-day 300
+
+Only run it against a scratch database.
+"""
+import argparse
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from sqlalchemy import func, insert, select
+from pos_app.data.db import Base, get_engine, get_session_maker
+from pos_app.data.models import (Category, Customer, Inventory, InventoryLocation, Payment, Product, Sale, SaleLine,
+                                 TaxRate, User)
+from pos_app.data.search import ensure_search_index
+from pos_app.services import rollups
+from setup_db import seed_data
+
+BATCH = 20000
+WORDS = ("organic apple banana bread butter cheese chicken chocolate coffee cola cookie cream crisps eggs flour "
+         "honey juice lemon milk noodle oat orange pasta pepper rice salt sauce soap soda sugar tea tomato tuna "
+         "water wine yogurt").split()
+SIZES = ("100g", "250g", "500g", "1kg", "330ml", "500ml", "1l", "2l", "6pk", "12pk")
+METHODS = ("cash", "card", "card", "card", "voucher")
+
+def _insert(s, model, rows):
+    for i in range(0, len(rows), BATCH):
+        s.execute(insert(model), rows[i:i + BATCH])
+
+def _next_id(s, model) -> int:
+    return (s.scalar(select(func.max(model.id))) or 0) + 1
+
+def _reference_data(s, rnd):
+    cats = [f"Category {i:02d}" for i in range(1, 25)]
+    have = set(s.scalars(select(Category.name)))
+    _insert(s, Category, [{"name": n} for n in cats if n not in have])
+    if not s.scalar(select(TaxRate.id).where(TaxRate.name == "Reduced 9%")):
+        s.add(TaxRate(name="Reduced 9%", rate=0.09))
+    s.flush()
+    return list(s.scalars(select(Category.id))), dict(s.execute(select(TaxRate.id, TaxRate.rate)).all())
+
+def generate_products(s, rnd, n: int, category_ids, tax_ids) -> list[int]:
+    now = datetime.utcnow()
+    first = _next_id(s, Product)
+    rows = []
+    for k in range(n):
+        pid = first + k
+        name = f"{rnd.choice(WORDS).title()} {rnd.choice(WORDS)} {rnd.choice(SIZES)}"
+        price = round(rnd.uniform(0.3, 40.0), 2)
+        rows.append({"id": pid, "sku": f"GEN-{pid:08d}", "barcode": f"20{pid:011d}", "name": name,
+                     "category_id": rnd.choice(category_ids), "tax_id": rnd.choice(tax_ids), "price": price,
+                     "cost": round(price * 0.6, 2), "active": rnd.random() > 0.02, "created_at": now, "updated_at": now})
+    _insert(s, Product, rows)
+    loc = s.scalar(select(InventoryLocation.id))
+    _insert(s, Inventory, [{"product_id": r["id"], "location_id": loc, "qty_on_hand": rnd.randint(0, 500),
+                            "reorder_point": 10} for r in rows])
+    return [r["id"] for r in rows]
+
+def generate_customers(s, rnd, m: int):
+    first = _next_id(s, Customer)
+    _insert(s, Customer, [{"id": first + k, "name": f"Customer {first + k}", "email": f"c{first + k}@example.com",
+                           "phone": f"+1555{first + k:07d}", "loyalty_points": rnd.randint(0, 2000)} for k in range(m)])
+
+def generate_sales(s, rnd, days: int, per_day: int, registers: int, product_ids, prices, tax_of, rates, progress=None):
+    """Completed sales spread over the last ``days`` days, written a day at a time."""
+    cashiers = list(s.scalars(select(User.id))) or [None]
+    customers = s.scalar(select(func.max(Customer.id))) or 0
+    sale_id, line_id, pay_id = _next_id(s, Sale), _next_id(s, SaleLine), _next_id(s, Payment)
+    start = datetime.utcnow().replace(hour=8, minute=0, second=0, microsecond=0) - timedelta(days=days)
+    sales, lines, pays = [], [], []
+    for d in range(days):
+        day = start + timedelta(days=d)
+        for _ in range(max(1, int(rnd.gauss(per_day, per_day * 0.15)))):
+            when = day + timedelta(seconds=rnd.randrange(13 * 3600))
+            sub = tax = 0.0
+            for _ in range(rnd.choice((1, 1, 2, 2, 3, 4, 5, 8))):
+                pid = rnd.choice(product_ids); qty = rnd.choice((1, 1, 1, 2, 3))
+                total = round(prices[pid] * qty, 2); sub += total; tax += total * rates.get(tax_of[pid], 0.0)
+                lines.append({"id": line_id, "sale_id": sale_id, "product_id": pid, "qty": qty,
+                              "unit_price": prices[pid], "discount": 0.0, "tax_rate_id": tax_of[pid], "line_total": total})
+                line_id += 1
+            grand = round(sub + tax, 2)
+            sales.append({"id": sale_id, "datetime": when, "cashier_id": rnd.choice(cashiers),
+                          "register_id": rnd.randint(1, registers),
+                          "customer_id": rnd.randint(1, customers) if customers and rnd.random() < 0.3 else None,
+                          "subtotal": round(sub, 2), "tax_total": round(tax, 2), "discount_total": 0.0, "grand_total": grand,
+                          "status": "completed", "payment_status": "paid"})
+            pays.append({"id": pay_id, "sale_id": sale_id, "method": rnd.choice(METHODS), "amount": grand, "status": "captured"})
+            sale_id += 1; pay_id += 1
+        if len(lines) >= BATCH or d == days - 1:
+            _insert(s, Sale, sales); _insert(s, SaleLine, lines); _insert(s, Payment, pays)
+            s.commit(); sales, lines, pays = [], [], []
+            if progress is not None:
+                progress(d + 1, days)
+
+def generate(engine, products: int = 10000, customers: int = 2000, days: int = 365, sales_per_day: int = 200,
+             registers: int = 4, seed: int = 42, progress=None) -> dict:
+    """Fill ``engine``'s database; returns the row counts that were added."""
+    rnd = random.Random(seed)
+    Base.metadata.create_all(engine)
+    SessionLocal = get_session_maker(engine)
+    with SessionLocal() as s:
+        seed_data(s); s.commit()
+        category_ids, rates = _reference_data(s, rnd)
+        generate_products(s, rnd, products, category_ids, list(rates))
+        generate_customers(s, rnd, customers)
+        s.commit()
+        prices, tax_of = {}, {}
+        for pid, price, tax_id in s.execute(select(Product.id, Product.price, Product.tax_id).where(Product.active.is_(True))):
+            prices[pid] = float(price or 0); tax_of[pid] = tax_id
+        before = s.scalar(select(func.count(Sale.id)))
+        if days > 0 and sales_per_day > 0:
+            generate_sales(s, rnd, days, sales_per_day, registers, list(prices), prices, tax_of, rates, progress)
+        added_sales = s.scalar(select(func.count(Sale.id))) - before
+        rollups.rebuild(s)
+    ensure_search_index(engine)
+    return {"products": products, "customers": customers, "sales": added_sales}
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Generate synthetic POS data (scratch databases only).")
+    ap.add_argument("--url", required=True, help="database URL, e.g. sqlite:///bench.db or postgresql+psycopg://...")
+    ap.add_argument("--products", type=int, default=10000)
+    ap.add_argument("--customers", type=int, default=2000)
+    ap.add_argument("--years", type=float, default=1.0, help="length of the sales history")
+    ap.add_argument("--sales-per-day", type=int, default=200)
+    ap.add_argument("--registers", type=int, default=4)
+    ap.add_argument("--seed", type=int, default=42)
+    args = ap.parse_args(argv)
+    t = time.perf_counter()
+    counts = generate(get_engine(args.url), args.products, args.customers, int(args.years * 365), args.sales_per_day,
+                      args.registers, args.seed,
+                      progress=lambda d, n: print(f"\r  sales: day {d}/{n}", end="", file=sys.stderr, flush=True))
+    print(file=sys.stderr)
+    print(f"Added {counts['products']} products, {counts['customers']} customers, {counts['sales']} sales "
+          f"in {time.perf_counter() - t:.1f}s.")
+
+if __name__ == "__main__":
+    main()
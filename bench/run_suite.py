@@ -0,0 +1,181 @@
+"""Benchmark suite for the POS hot paths.
+
+Times CompleteSaleService.add_item / finalize, the Reports page queries,
+product search and CSV import/export against each ``--url`` (a scratch
+database; with ``--generate`` it is filled by bench/gen_data.py first) and
+writes the results as JSON:
+
+    python bench/run_suite.py --url sqlite:///bench.db --generate --out results.json
+    python bench/run_suite.py --url sqlite:///bench.db --url postgresql+psycopg://pos@localhost/pos_bench --out new.json
+    python bench/run_suite.py --url sqlite:///bench.db --compare results.json   # flag regressions
+
+Timings are in milliseconds per call. The import benchmark writes products
+(``BENCH-IMP-*`` SKUs) and the sale benchmarks add completed sales.
+"""
+import argparse
+import json
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from sqlalchemy import func, select
+from pos_app.data.db import get_engine, get_session_maker
+from pos_app.data.models import Product
+from pos_app.data.search import search_product_ids
+from pos_app.reports import queries
+from pos_app.services.cart import Cart
+from pos_app.services.exports import PRODUCT_HEADER, SALE_LINE_HEADER, product_row, products_stmt, sale_line_row, stream_csv
+from pos_app.services.product_cache import barcode_cache
+from pos_app.services.product_import import FIELDS, import_products_csv
+from pos_app.services.sales import CompleteSaleService
+import gen_data
+
+def _stats(samples: list[float]) -> dict:
+    ms = sorted(x * 1000 for x in samples)
+    return {"n": len(ms), "min": round(ms[0], 3), "median": round(statistics.median(ms), 3),
+            "p95": round(ms[max(0, int(len(ms) * 0.95) - 1)], 3), "mean": round(statistics.fmean(ms), 3)}
+
+def timed(fn, repeat: int) -> dict:
+    samples = []
+    for _ in range(repeat):
+        t = time.perf_counter(); fn(); samples.append(time.perf_counter() - t)
+    return _stats(samples)
+
+def bench_sales(SessionLocal, barcodes, repeat: int) -> dict:
+    rnd = random.Random(7)
+    add, fin = [], []
+    barcode_cache.invalidate()
+    with SessionLocal() as s:
+        barcode_cache.warm(s)
+        svc = CompleteSaleService(s)
+        for _ in range(repeat):
+            cart = Cart(register_id=99)
+            for code in rnd.sample(barcodes, 5):
+                t = time.perf_counter(); svc.add_item(cart, code); add.append(time.perf_counter() - t)
+            t = time.perf_counter(); svc.finalize(cart, payment_amount=1e6); fin.append(time.perf_counter() - t)
+    return {"sale.add_item": _stats(add), "sale.finalize": _stats(fin)}
+
+def bench_reports(SessionLocal, repeat: int) -> dict:
+    out = {}
+    today = date.today()
+    for label, days in (("30d", 30), ("365d", 365)):
+        start = today - timedelta(days=days)
+        for name in ("summary_rows", "category_rows", "cashier_rows", "payment_rows"):
+            fn = getattr(queries, name)
+            def run():
+                with SessionLocal() as s:
+                    fn(s, start, today)
+            out[f"reports.{name}.{label}"] = timed(run, repeat)
+    return out
+
+def bench_search(SessionLocal, repeat: int) -> dict:
+    terms = ["co", "cola", "apple juice", "GEN-0000", "2000000001", "choc", "zzzz-nothing"]
+    out = {}
+    with SessionLocal() as s:
+        search_product_ids(s, "warm", 50)
+        for term in terms:
+            out[f"search.{term}"] = timed(lambda: search_product_ids(s, term, 200), repeat)
+    return out
+
+def bench_csv(SessionLocal, tmp: Path, import_rows: int) -> dict:
+    out = {}
+    p = tmp / "products.csv"
+    t = time.perf_counter(); n = stream_csv(SessionLocal, products_stmt(""), p, PRODUCT_HEADER, product_row)
+    out["export.products"] = {"rows": n, "seconds": round(time.perf_counter() - t, 3)}
+    t = time.perf_counter()
+    n = stream_csv(SessionLocal, queries.sale_lines_stmt(date.today() - timedelta(days=90), date.today()), tmp / "lines.csv.gz",
+                   SALE_LINE_HEADER, sale_line_row)
+    out["export.sale_lines_90d_gz"] = {"rows": n, "seconds": round(time.perf_counter() - t, 3)}
+    src = tmp / "import.csv"
+    stamp = datetime.utcnow().strftime("%Y%m%d%H%M%S")
+    with open(src, "w", encoding="utf-8") as f:
+        f.write(",".join(FIELDS) + "\n")
+        for i in range(import_rows):
+            f.write(f"BENCH-IMP-{stamp}-{i},,Imported item {i},{1 + i % 20}.99,,,1\n")
+    t = time.perf_counter(); res = import_products_csv(SessionLocal, src)
+    out["import.products"] = {"rows": res.rows_read, "inserted": res.inserted, "seconds": round(time.perf_counter() - t, 3)}
+    return out
+
+def run_for(url: str, args) -> dict:
+    engine = get_engine(url)
+    if args.generate:
+        gen_data.generate(engine, args.products, args.customers, args.days, args.sales_per_day)
+    SessionLocal = get_session_maker(engine)
+    with SessionLocal() as s:
+        barcodes = list(s.scalars(select(Product.barcode).where(Product.active.is_(True), Product.barcode.is_not(None)).limit(5000)))
+        products = s.scalar(select(func.count(Product.id)))
+    results = {}
+    results.update(bench_sales(SessionLocal, barcodes, args.repeat))
+    results.update(bench_reports(SessionLocal, args.repeat))
+    results.update(bench_search(SessionLocal, args.repeat))
+    with tempfile.TemporaryDirectory() as tmp:
+        results.update(bench_csv(SessionLocal, Path(tmp), args.import_rows))
+    return {"dialect": engine.dialect.name, "url": engine.url.render_as_string(hide_password=True),
+            "products": products, "results": results}
+
+def _metric(entry: dict) -> float | None:
+    return entry.get("median", entry.get("seconds"))
+
+def compare(old: dict, new: dict, threshold: float) -> int:
+    """Print per-benchmark changes; returns the number of regressions beyond ``threshold`` (e.g. 0.2 = 20%)."""
+    regressions = 0
+    old_runs = {r["url"]: r for r in old.get("runs", [])}
+    for run in new["runs"]:
+        base = old_runs.get(run["url"])
+        if base is None:
+            continue
+        print(f"== {run['url']}")
+        for name, entry in run["results"].items():
+            was = base["results"].get(name)
+            a, b = (_metric(was) if was else None), _metric(entry)
+            if not a or b is None:
+                continue
+            change = (b - a) / a
+            noise = 0.5 if "median" in entry else 0.05  # ms per call / s per run: ignore jitter below this
+            flag = "  REGRESSION" if change > threshold and b - a > noise else ""
+            regressions += bool(flag)
+            print(f"  {name:<40} {a:>10.3f} -> {b:>10.3f}  {change:+.0%}{flag}")
+    return regressions
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Time the POS hot paths and write the results as JSON.")
+    ap.add_argument("--url", action="append", required=True, help="scratch database URL (repeatable)")
+    ap.add_argument("--generate", action="store_true", help="fill the database with bench/gen_data.py first")
+    ap.add_argument("--products", type=int, default=10000)
+    ap.add_argument("--customers", type=int, default=2000)
+    ap.add_argument("--days", type=int, default=365)
+    ap.add_argument("--sales-per-day", type=int, default=200)
+    ap.add_argument("--repeat", type=int, default=20)
+    ap.add_argument("--import-rows", type=int, default=5000)
+    ap.add_argument("--out", help="write the JSON results here (default: stdout)")
+    ap.add_argument("--compare", help="earlier results JSON to compare against")
+    ap.add_argument("--threshold", type=float, default=0.2, help="relative slowdown reported as a regression")
+    args = ap.parse_args(argv)
+    try:
+        rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                             cwd=Path(__file__).resolve().parent).stdout.strip() or None
+    except OSError:
+        rev = None
+    report = {"created": datetime.utcnow().isoformat(timespec="seconds") + "Z", "revision": rev,
+              "python": platform.python_version(), "platform": platform.platform(),
+              "runs": [run_for(url, args) for url in args.url]}
+    text = json.dumps(report, indent=2)
+    if args.out:
+        Path(args.out).write_text(text, encoding="utf-8")
+    else:
+        print(text)
+    if args.compare:
+        old = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        return 1 if compare(old, report, args.threshold) else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+"""Startup time: process start to a usable scan field.
+
+Each run starts a fresh interpreter that imports the app, signs in as
+``--user`` without the login dialog, builds MainWindow, shows it and waits
+until the event loop has painted the window with the barcode field focused.
+The child reports its phases; the parent adds interpreter start-up and prints
+the median of ``--runs``:
+
+    python bench/startup.py --url sqlite:///pos.db --runs 5
+    python bench/startup.py --url sqlite:///pos.db --importtime 25   # slowest imports (-X importtime)
+
+Qt uses the offscreen platform unless QT_QPA_PLATFORM is already set.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+def child(username: str):
+    t0 = time.perf_counter()
+    sys.path.insert(0, str(ROOT))
+    from PyQt6.QtCore import QTimer
+    from PyQt6.QtWidgets import QApplication
+    from sqlalchemy import select
+    from pos_app.data.models import User
+    import pos_app.ui.main as main
+    t_import = time.perf_counter()
+
+    class AutoLogin:
+        def __init__(self, session, parent=None):
+            q = select(User).where(User.active.is_(True))
+            self.user = session.scalar(q.where(User.username == username) if username else q.order_by(User.id))
+            if self.user is not None:
+                self.user.role  # loaded while the session is open, as LoginDialog does
+
+        def exec(self):
+            return self.user is not None
+
+    main.LoginDialog = AutoLogin
+    app = QApplication(sys.argv)
+    win = main.MainWindow()
+    if not getattr(win, "_startup_ok", False):
+        raise SystemExit("sign-in failed: no such active user")
+    t_window = time.perf_counter()
+    win.resize(900, 650); win.show(); win.sales_page.barcode_in.setFocus()
+    marks = {}
+    def ready():
+        marks["ready"] = time.perf_counter(); app.quit()
+    QTimer.singleShot(0, ready)
+    app.exec()
+    win.close()
+    print(json.dumps({"import": t_import - t0, "window": t_window - t_import, "shown": marks["ready"] - t_window,
+                      "in_process": marks["ready"] - t0}), flush=True)
+    os._exit(0)  # skip teardown: it is not part of startup
+
+def run_once(env: dict, username: str) -> dict:
+    t = time.perf_counter()
+    out = subprocess.run([sys.executable, __file__, "--child", "--user", username], env=env, cwd=ROOT,
+                         capture_output=True, text=True)
+    total = time.perf_counter() - t
+    if out.returncode != 0:
+        raise SystemExit(out.stderr.strip() or f"child exited with {out.returncode}")
+    phases = json.loads(out.stdout.strip().splitlines()[-1])
+    phases["interpreter"] = total - phases["in_process"]
+    phases["total"] = total
+    return phases
+
+def importtime(env: dict, top: int):
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", "import pos_app.ui.main"], env=env, cwd=ROOT,
+                         capture_output=True, text=True)
+    rows = []
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line or "cumulative" in line:
+            continue
+        _, self_us, cumulative_us, name = (p.strip() for p in line.replace("import time:", "|").split("|"))
+        rows.append((int(cumulative_us), int(self_us), name))
+    rows.sort(reverse=True)
+    print(f"Top {top} imports by cumulative time (ms, self ms):")
+    for cumulative, own, name in rows[:top]:
+        print(f"  {cumulative / 1000:>8.1f} {own / 1000:>8.1f}  {name}")
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Measure POS startup time to a usable scan field.")
+    ap.add_argument("--url", help="database URL (default: DATABASE_URL / settings)")
+    ap.add_argument("--user", default="", help="sign in as this user (default: first active user)")
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--importtime", type=int, metavar="N", default=0, help="also list the N slowest imports")
+    ap.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = ap.parse_args(argv)
+    if args.child:
+        return child(args.user)
+    env = dict(os.environ)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    if args.url:
+        env["DATABASE_URL"] = args.url
+    runs = [run_once(env, args.user) for _ in range(max(1, args.runs))]
+    print(f"Startup over {len(runs)} runs (median ms):")
+    for phase in ("interpreter", "import", "window", "shown", "total"):
+        print(f"  {phase:<12} {statistics.median(r[phase] for r in runs) * 1000:>8.1f}")
+    if args.importtime:
+        importtime(env, args.importtime)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
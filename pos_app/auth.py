@@ -1,7 +1,14 @@
+import hashlib
+import hmac
+import secrets
+import threading
+import time
 import bcrypt
+from pos_app.config import settings
 
-def hash_password(plain: str) -> str:
-    return bcrypt.hashpw(plain.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+def hash_password(plain: str, rounds: int | None = None) -> str:
+    rounds = settings.BCRYPT_ROUNDS if rounds is None else rounds
+    return bcrypt.hashpw(plain.encode('utf-8'), bcrypt.gensalt(rounds)).decode('utf-8')
 
 def verify_password(plain: str, stored_hash: str) -> bool:
     try:
@@ -9,3 +16,74 @@ def verify_password(plain: str, stored_hash: str) -> bool:
     except Exception:
         # backward compatibility with old plaintext demo hashes
         return plain == stored_hash
+
+def needs_rehash(stored_hash: str) -> bool:
+    """True if ``stored_hash`` is not a bcrypt hash at the configured cost (``BCRYPT_ROUNDS``)."""
+    parts = (stored_hash or "").split("$")
+    if len(parts) != 4 or parts[1] not in ("2a", "2b", "2y") or not parts[2].isdigit():
+        return True
+    return int(parts[2]) != settings.BCRYPT_ROUNDS
+
+def check_login(plain: str, stored_hash: str) -> tuple[bool, str | None]:
+    """Verify a password; on success also return a replacement hash if the stored one is outdated.
+
+    Pure CPU (no database access), so it can run on a worker thread; bcrypt
+    releases the GIL while hashing.
+    """
+    if not verify_password(plain, stored_hash):
+        return False, None
+    return True, (hash_password(plain) if needs_rehash(stored_hash) else None)
+
+
+class PinCache:
+    """Quick cashier switching on this terminal.
+
+    A cashier who signs in with their password may set a short PIN. Only a
+    key derived from the PIN with a random secret that lives in this process
+    is kept, in memory; nothing is written to disk or the database, so PINs
+    end with the app. A cashier who gets the PIN wrong ``max_attempts``
+    times in a row loses their PIN and has to sign in with the password.
+    """
+
+    def __init__(self, iterations: int = 20000, max_attempts: int = 3):
+        self.iterations = iterations
+        self.max_attempts = max_attempts
+        self._secret = secrets.token_bytes(32)
+        self._lock = threading.Lock()
+        self._entries: dict[int, dict] = {}  # user id -> username, salt, key, failures, set_at
+
+    def _derive(self, pin: str, salt: bytes) -> bytes:
+        return hashlib.pbkdf2_hmac("sha256", pin.encode("utf-8"), self._secret + salt, self.iterations)
+
+    def set_pin(self, user_id: int, username: str, pin: str):
+        salt = secrets.token_bytes(16)
+        key = self._derive(pin, salt)
+        with self._lock:
+            self._entries[user_id] = {"username": username, "salt": salt, "key": key, "failures": 0, "set_at": time.time()}
+
+    def check(self, user_id: int, pin: str) -> bool:
+        with self._lock:
+            entry = self._entries.get(user_id)
+        if entry is None:
+            return False
+        ok = hmac.compare_digest(self._derive(pin, entry["salt"]), entry["key"])
+        with self._lock:
+            if ok:
+                entry["failures"] = 0
+            else:
+                entry["failures"] += 1
+                if entry["failures"] >= self.max_attempts:
+                    self._entries.pop(user_id, None)
+        return ok
+
+    def forget(self, user_id: int):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def users(self) -> list[tuple[int, str]]:
+        """``(user id, username)`` of the cashiers that can switch in with a PIN, by name."""
+        with self._lock:
+            return sorted(((uid, e["username"]) for uid, e in self._entries.items()), key=lambda x: x[1].lower())
+
+
+pin_cache = PinCache(settings.PIN_KDF_ITERATIONS, settings.PIN_MAX_ATTEMPTS)
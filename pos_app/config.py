@@ -5,6 +5,51 @@ class Settings(BaseSettings):
     DATABASE_URL: str = f"sqlite:///{(Path(__file__).resolve().parents[1] / 'pos.db')}"
     APP_NAME: str = "POS App (PyQt)"
     LOCALE: str = "en_US"
+    PRINT_SPOOL_DIR: str = str(Path(__file__).resolve().parents[1] / "print_spool")
+    PRINT_QUEUE_SIZE: int = 64
+    PRINT_RETRY_MAX_SECONDS: float = 60.0
+    # SQLite performance profile, applied to every new connection (see data/db.py)
+    SQLITE_TUNING: bool = True
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024
+    SQLITE_CACHE_SIZE_KB: int = 64 * 1024
+    SQLITE_TEMP_STORE: str = "MEMORY"
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_CHECKPOINT_MINUTES: float = 5.0
+    SQLITE_OPTIMIZE_MINUTES: float = 60.0
+    # connection pool (one shared engine per process)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 5
+    DB_POOL_TIMEOUT: float = 10.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_KEEPALIVE_MINUTES: float = 4.0
+    DB_STATEMENT_CACHE_SIZE: int = 500
+    # psycopg 3: server-side prepare after N executions; negative disables it (PgBouncer transaction pooling)
+    PG_PREPARE_THRESHOLD: int = 5
+    PG_CONNECT_TIMEOUT: int = 5
+    PG_KEEPALIVES_IDLE: int = 60
+    # the open cart is kept in memory; this file lets a crashed till restore it
+    CART_SNAPSHOT_PATH: str = str(Path(__file__).resolve().parents[1] / "cart_snapshot.json")
+    # PDF exports are cached under a hash of their HTML; the newest REPORT_CACHE_SIZE are kept
+    REPORT_CACHE_DIR: str = str(Path(__file__).resolve().parents[1] / "report_cache")
+    REPORT_CACHE_SIZE: int = 16
+    # offline-first checkout: sales are committed to a local journal and replicated to DATABASE_URL
+    OFFLINE_JOURNAL: bool = False
+    JOURNAL_PATH: str = str(Path(__file__).resolve().parents[1] / "sales_journal.db")
+    JOURNAL_BATCH_SIZE: int = 50
+    JOURNAL_KEEP_DAYS: float = 7.0
+    JOURNAL_RETRY_MAX_SECONDS: float = 60.0
+    # sign-in: bcrypt cost for new hashes (older ones are rehashed on the next login) and quick-switch PINs
+    BCRYPT_ROUNDS: int = 12
+    PIN_MIN_LENGTH: int = 4
+    PIN_KDF_ITERATIONS: int = 20000
+    PIN_MAX_ATTEMPTS: int = 3
+    # SQL profiler (data/profiler.py): off by default, summary goes to stderr or SQL_PROFILE_PATH at exit
+    SQL_PROFILE: bool = False
+    SQL_PROFILE_N_PLUS_ONE: int = 5
+    SQL_PROFILE_PATH: str = ""
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8")
 
 settings = Settings()
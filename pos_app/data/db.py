@@ -1,12 +1,182 @@
-from sqlalchemy import create_engine
+import threading
+import time
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
+from sqlalchemy.pool import QueuePool
 from pos_app.config import settings
+from pos_app.data import profiler
 
 class Base(DeclarativeBase):
     pass
 
-def get_engine():
-    return create_engine(settings.DATABASE_URL, future=True)
+class PoolMetrics:
+    """Counters for one engine's pool: checkouts, time spent waiting for a connection, hold times."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.connects = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.hold_max = 0.0
+
+    def waited(self, seconds: float):
+        with self._lock:
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+
+    def snapshot(self, pool) -> dict:
+        with self._lock:
+            checkouts = self.checkouts
+            return {
+                "size": pool.size(), "checked_out": pool.checkedout(), "idle": pool.checkedin(), "overflow": max(0, pool.overflow()),
+                "checkouts": checkouts, "connects": self.connects, "timeouts": self.timeouts,
+                "wait_avg_ms": round(self.wait_total / checkouts * 1000, 3) if checkouts else 0.0,
+                "wait_max_ms": round(self.wait_max * 1000, 3), "hold_max_ms": round(self.hold_max * 1000, 3),
+            }
+
+class MeteredQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection."""
+
+    def __init__(self, *args, **kw):
+        super().__init__(*args, **kw)
+        self.metrics = PoolMetrics()
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+    def _do_get(self):
+        t = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            with self.metrics._lock:
+                self.metrics.timeouts += 1
+            raise
+        finally:
+            self.metrics.waited(time.perf_counter() - t)
+
+def _watch_pool(engine):
+    metrics = engine.pool.metrics
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_conn, record):
+        with metrics._lock:
+            metrics.connects += 1
+
+    @event.listens_for(engine, "checkout")
+    def _on_checkout(dbapi_conn, record, proxy):
+        record.info["checked_out_at"] = time.perf_counter()
+        with metrics._lock:
+            metrics.checkouts += 1
+
+    @event.listens_for(engine, "checkin")
+    def _on_checkin(dbapi_conn, record):
+        started = record.info.pop("checked_out_at", None)
+        if started is not None:
+            held = time.perf_counter() - started
+            with metrics._lock:
+                metrics.hold_max = max(metrics.hold_max, held)
+
+def sqlite_pragmas(cfg=settings) -> list[str]:
+    """PRAGMAs of the SQLite performance profile, in the order they are applied."""
+    return [
+        f"PRAGMA busy_timeout = {int(cfg.SQLITE_BUSY_TIMEOUT_MS)}",
+        f"PRAGMA journal_mode = {cfg.SQLITE_JOURNAL_MODE}",
+        f"PRAGMA synchronous = {cfg.SQLITE_SYNCHRONOUS}",
+        f"PRAGMA mmap_size = {int(cfg.SQLITE_MMAP_SIZE)}",
+        f"PRAGMA cache_size = {-int(cfg.SQLITE_CACHE_SIZE_KB)}",  # negative: size in KiB, not pages
+        f"PRAGMA temp_store = {cfg.SQLITE_TEMP_STORE}",
+    ]
+
+def _apply_sqlite_profile(engine, cfg):
+    pragmas = sqlite_pragmas(cfg)
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_conn, _record):
+        cur = dbapi_conn.cursor()
+        try:
+            for pragma in pragmas:
+                cur.execute(pragma)
+        finally:
+            cur.close()
+
+def _engine_options(url, cfg) -> dict:
+    u = make_url(url)
+    opts = {"future": True, "query_cache_size": cfg.DB_STATEMENT_CACHE_SIZE}
+    if u.get_backend_name() == "sqlite" and u.database in (None, "", ":memory:"):
+        return opts  # in-memory databases keep SQLAlchemy's single-connection pool
+    opts.update(poolclass=MeteredQueuePool, pool_size=cfg.DB_POOL_SIZE, max_overflow=cfg.DB_MAX_OVERFLOW,
+                pool_timeout=cfg.DB_POOL_TIMEOUT, pool_recycle=cfg.DB_POOL_RECYCLE, pool_pre_ping=cfg.DB_POOL_PRE_PING,
+                pool_use_lifo=True)  # LIFO lets surplus connections idle out instead of rotating through all of them
+    if u.get_backend_name() == "postgresql":
+        connect_args = {"connect_timeout": cfg.PG_CONNECT_TIMEOUT,
+                        "keepalives": 1, "keepalives_idle": cfg.PG_KEEPALIVES_IDLE,
+                        "keepalives_interval": 10, "keepalives_count": 3}
+        if u.get_driver_name() == "psycopg":
+            connect_args["prepare_threshold"] = cfg.PG_PREPARE_THRESHOLD if cfg.PG_PREPARE_THRESHOLD >= 0 else None
+        opts["connect_args"] = connect_args
+    return opts
+
+_engines: dict = {}
+_engines_lock = threading.Lock()
+
+def get_engine(url: str | None = None, tuned: bool | None = None):
+    """The process-wide engine for ``url`` (default ``settings.DATABASE_URL``).
+
+    Engines are created once per URL and shared, so the whole app draws from
+    one connection pool sized by the ``DB_POOL_*`` settings. SQLite files get
+    the performance profile from settings (WAL, synchronous=NORMAL, mmap,
+    larger page cache, busy timeout) unless ``tuned`` / ``SQLITE_TUNING`` is off.
+    """
+    url = url or settings.DATABASE_URL
+    tuned = settings.SQLITE_TUNING if tuned is None else tuned
+    with _engines_lock:
+        engine = _engines.get((url, tuned))
+        if engine is None:
+            engine = create_engine(url, **_engine_options(url, settings))
+            if isinstance(engine.pool, MeteredQueuePool):
+                _watch_pool(engine)
+            if tuned and engine.dialect.name == "sqlite" and engine.url.database not in (None, "", ":memory:"):
+                _apply_sqlite_profile(engine, settings)
+            if settings.SQL_PROFILE:
+                profiler.install(engine)
+            _engines[(url, tuned)] = engine
+        return engine
+
+def pool_status(engine=None) -> dict | None:
+    """Pool size and checkout/wait metrics, or None when the engine's pool is not metered."""
+    engine = engine or get_engine()
+    metrics = getattr(engine.pool, "metrics", None)
+    return metrics.snapshot(engine.pool) if metrics is not None else None
+
+def pool_keepalive(engine):
+    """Ping through the pool so an idle till's connection is still warm for the next scan."""
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+def release(session):
+    """End a read-only transaction so the session's connection goes back to the pool.
+
+    Pages keep one session for their lifetime; without this a page that only
+    read something holds a pooled connection (idle in transaction) until its
+    next commit. Loaded objects stay usable since sessions don't expire on commit.
+    """
+    if session.in_transaction() and not (session.new or session.dirty or session.deleted):
+        session.commit()
+
+def sqlite_checkpoint(engine, mode: str = "PASSIVE"):
+    """Fold the WAL back into the database file; returns (busy, wal pages, checkpointed pages)."""
+    with engine.connect() as conn:
+        return tuple(conn.execute(text(f"PRAGMA wal_checkpoint({mode})")).one())
+
+def sqlite_optimize(engine):
+    with engine.connect() as conn:
+        conn.execute(text("PRAGMA optimize"))
 
 def get_session_maker(engine=None):
     engine = engine or get_engine()
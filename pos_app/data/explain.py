@@ -0,0 +1,92 @@
+"""Query plan checks for the hot paths.
+
+Each entry in ``HOT_QUERIES`` is run through ``EXPLAIN QUERY PLAN`` (SQLite)
+or ``EXPLAIN (FORMAT JSON)`` with ``enable_seqscan`` off (Postgres, so that a
+sequential scan only shows up when no index can serve the query). A check
+fails when one of the listed tables is read by a full table scan:
+
+    python -m pos_app.data.explain      # exit status 1 on a regression
+"""
+import argparse
+import sys
+from dataclasses import dataclass
+from datetime import date, timedelta
+from sqlalchemy import func, select
+from pos_app.data.models import Inventory, Payment, Product, Sale, SaleLine
+from pos_app.reports.queries import sale_lines_stmt
+
+@dataclass(frozen=True)
+class HotQuery:
+    name: str
+    stmt: object
+    tables: tuple[str, ...]  # tables that must be reached through an index
+
+def hot_queries() -> list[HotQuery]:
+    today = date.today()
+    return [
+        HotQuery("barcode lookup", select(Product.id).where(Product.barcode == "0", Product.active.is_(True)), ("products",)),
+        HotQuery("sku lookup", select(Product.id).where(Product.sku == "0"), ("products",)),
+        HotQuery("inventory row for product", select(func.min(Inventory.id)).where(Inventory.product_id == 1), ("inventory",)),
+        HotQuery("lines of a sale", select(SaleLine.id).where(SaleLine.sale_id == 1), ("sale_lines",)),
+        HotQuery("payments of a sale", select(Payment.id).where(Payment.sale_id == 1), ("payments",)),
+        HotQuery("completed sales in range", select(Sale.id).where(
+            Sale.status == "completed", Sale.datetime >= today - timedelta(days=30), Sale.datetime < today), ("sales",)),
+        HotQuery("sale lines export", sale_lines_stmt(today - timedelta(days=30), today), ("sales", "sale_lines")),
+    ]
+
+def _sqlite_scans(conn, sql, params) -> set[str]:
+    scanned = set()
+    for row in conn.exec_driver_sql("EXPLAIN QUERY PLAN " + sql, params):
+        detail = row[-1]
+        # "SCAN sales" is a table scan, and so is a bare "SEARCH inventory" (min()/max() walking
+        # the rowid order) or an index SQLite builds on the fly; "... USING [COVERING] INDEX ix" is fine
+        if not detail.startswith(("SCAN ", "SEARCH ")):
+            continue
+        if " USING " not in detail or " AUTOMATIC " in detail:
+            scanned.add(detail.split()[1])
+    return scanned
+
+def _pg_scans(conn, sql, params) -> set[str]:
+    conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+    plan = conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + sql, params).scalar()
+    scanned = set()
+    def walk(node):
+        if node.get("Node Type") == "Seq Scan":
+            scanned.add(node.get("Relation Name"))
+        for child in node.get("Plans", []):
+            walk(child)
+    walk(plan[0]["Plan"])
+    return scanned
+
+def check_plans(engine) -> list[tuple[HotQuery, set[str]]]:
+    """Return (query, scanned tables) for every hot query that reads a listed table with a full scan."""
+    dialect = engine.dialect.name
+    if dialect not in ("sqlite", "postgresql"):
+        raise ValueError(f"no plan check for {dialect}")
+    failures = []
+    with engine.connect() as conn:
+        for q in hot_queries():
+            compiled = q.stmt.compile(dialect=engine.dialect)
+            params = compiled.construct_params()
+            if compiled.positiontup is not None:
+                params = tuple(params[k] for k in compiled.positiontup)
+            with conn.begin():
+                scans = (_sqlite_scans if dialect == "sqlite" else _pg_scans)(conn, str(compiled), params)
+                conn.rollback()
+            bad = scans & set(q.tables)
+            if bad:
+                failures.append((q, bad))
+    return failures
+
+def main(argv=None):
+    from pos_app.data.db import get_engine
+    ap = argparse.ArgumentParser(description="Check that the hot queries use indexes (DATABASE_URL).")
+    ap.parse_args(argv)
+    failures = check_plans(get_engine())
+    for q, tables in failures:
+        print(f"FAIL {q.name}: full scan of {', '.join(sorted(tables))}")
+    print(f"{len(hot_queries()) - len(failures)}/{len(hot_queries())} hot queries use an index.")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
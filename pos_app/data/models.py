@@ -1,6 +1,6 @@
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import String, Integer, Float, Boolean, ForeignKey, DateTime, Text, Index
-from datetime import datetime
+from sqlalchemy import String, Integer, Float, Boolean, ForeignKey, DateTime, Date, Text, Index, UniqueConstraint
+from datetime import datetime, date
 from .db import Base
 
 class Category(Base):
@@ -49,6 +49,8 @@ class Inventory(Base):
     product = relationship("Product")
     location = relationship("InventoryLocation")
 
+Index("ix_inventory_product_id", Inventory.product_id, Inventory.id)
+
 class Sale(Base):
     __tablename__ = "sales"
     id: Mapped[int] = mapped_column(primary_key=True)
@@ -62,9 +64,14 @@ class Sale(Base):
     grand_total: Mapped[float] = mapped_column(Float, default=0.0)
     status: Mapped[str] = mapped_column(String(32), default="open")
     payment_status: Mapped[str] = mapped_column(String(32), default="unpaid")
+    # set at checkout; makes replaying a journaled sale into the central database idempotent
+    client_uuid: Mapped[str | None] = mapped_column(String(36))
     lines = relationship("SaleLine", cascade="all, delete-orphan")
     payments = relationship("Payment", cascade="all, delete-orphan")
 
+Index("ix_sales_status_datetime", Sale.status, Sale.datetime)
+Index("ux_sales_client_uuid", Sale.client_uuid, unique=True)
+
 class SaleLine(Base):
     __tablename__ = "sale_lines"
     id: Mapped[int] = mapped_column(primary_key=True)
@@ -78,6 +85,8 @@ class SaleLine(Base):
     product = relationship("Product")
     tax_rate = relationship("TaxRate")
 
+Index("ix_sale_lines_sale_id", SaleLine.sale_id)
+
 class Payment(Base):
     __tablename__ = "payments"
     id: Mapped[int] = mapped_column(primary_key=True)
@@ -87,6 +96,47 @@ class Payment(Base):
     external_ref: Mapped[str | None] = mapped_column(String(128))
     status: Mapped[str] = mapped_column(String(32), default="captured")
 
+Index("ix_payments_sale_id", Payment.sale_id)
+
+# Daily rollups maintained by CompleteSaleService.finalize (see services/rollups.py).
+# Zero ids stand for "no register / cashier / category" so they can be part of the unique key.
+
+class SalesDailySummary(Base):
+    __tablename__ = "sales_daily_summary"
+    __table_args__ = (UniqueConstraint("day", "register_id", name="uq_sales_daily_summary_day_register"),)
+    id: Mapped[int] = mapped_column(primary_key=True)
+    day: Mapped[date] = mapped_column(Date, nullable=False)
+    register_id: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    sale_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    subtotal: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    tax_total: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    grand_total: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+
+class SalesDailyCategory(Base):
+    __tablename__ = "sales_daily_category"
+    __table_args__ = (UniqueConstraint("day", "category_id", name="uq_sales_daily_category_day_category"),)
+    id: Mapped[int] = mapped_column(primary_key=True)
+    day: Mapped[date] = mapped_column(Date, nullable=False)
+    category_id: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    total: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+
+class SalesDailyCashier(Base):
+    __tablename__ = "sales_daily_cashier"
+    __table_args__ = (UniqueConstraint("day", "cashier_id", name="uq_sales_daily_cashier_day_cashier"),)
+    id: Mapped[int] = mapped_column(primary_key=True)
+    day: Mapped[date] = mapped_column(Date, nullable=False)
+    cashier_id: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    sale_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    total: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+
+class SalesDailyPayment(Base):
+    __tablename__ = "sales_daily_payment"
+    __table_args__ = (UniqueConstraint("day", "method", name="uq_sales_daily_payment_day_method"),)
+    id: Mapped[int] = mapped_column(primary_key=True)
+    day: Mapped[date] = mapped_column(Date, nullable=False)
+    method: Mapped[str] = mapped_column(String(32), nullable=False)
+    total: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+
 class Role(Base):
     __tablename__ = "roles"
     id: Mapped[int] = mapped_column(primary_key=True)
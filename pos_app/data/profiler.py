@@ -0,0 +1,193 @@
+"""Opt-in SQL profiler (``SQL_PROFILE=true``).
+
+Cursor-execute events on the engine record, per statement, the number of
+executions, a latency histogram and the rows reported by the driver, tagged
+with the action that issued them. Actions are named with ``action("...")``
+(a context manager and decorator); the innermost active action wins and
+statements outside any action are tagged ``-``. A statement that runs more
+than ``SQL_PROFILE_N_PLUS_ONE`` times with identical SQL inside a single
+action run is reported as a likely N+1 query.
+
+Rows are what ``cursor.rowcount`` reports after execute: affected rows for
+DML everywhere, and rows returned for SELECT on psycopg (sqlite3 reports -1
+for SELECTs, shown as ``-``).
+"""
+import atexit
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from sqlalchemy import event
+from pos_app.config import settings
+
+BUCKETS_MS = (1, 5, 20, 100, 500)  # histogram upper bounds; the last bucket is open-ended
+
+class _Run:
+    __slots__ = ("name", "seen")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.seen: dict[str, int] = {}
+
+_current: ContextVar[_Run | None] = ContextVar("sql_profile_action", default=None)
+
+class _Stat:
+    __slots__ = ("count", "total", "max", "rows", "hist")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.rows = None
+        self.hist = [0] * (len(BUCKETS_MS) + 1)
+
+    def add(self, seconds: float, rows: int):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        if rows >= 0:
+            self.rows = (self.rows or 0) + rows
+        ms = seconds * 1000
+        for i, bound in enumerate(BUCKETS_MS):
+            if ms < bound:
+                self.hist[i] += 1
+                break
+        else:
+            self.hist[-1] += 1
+
+def _normalize(sql: str) -> str:
+    return re.sub(r"\s+", " ", sql).strip()
+
+class SqlProfiler:
+    def __init__(self, n_plus_one: int = 5):
+        self.n_plus_one = n_plus_one
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.stats: dict[tuple[str, str], _Stat] = {}
+            self.actions: dict[str, list[int]] = {}  # name -> [runs, statements]
+            self.suspects: dict[tuple[str, str], int] = {}  # (action, sql) -> most repeats in one run
+            self.started = time.time()
+
+    def record(self, sql: str, seconds: float, rows: int):
+        run = _current.get()
+        name = run.name if run is not None else "-"
+        sql = _normalize(sql)
+        with self._lock:
+            stat = self.stats.get((name, sql))
+            if stat is None:
+                stat = self.stats[(name, sql)] = _Stat()
+            stat.add(seconds, rows)
+            if run is not None:
+                self.actions.setdefault(name, [0, 0])[1] += 1  # reset() may have run since begin()
+                n = run.seen[sql] = run.seen.get(sql, 0) + 1
+                if n > self.n_plus_one and n > self.suspects.get((name, sql), 0):
+                    self.suspects[(name, sql)] = n
+
+    def begin(self, name: str):
+        with self._lock:
+            self.actions.setdefault(name, [0, 0])[0] += 1
+        return _current.set(_Run(name))
+
+    def summary(self, top: int = 20) -> str:
+        with self._lock:
+            stats = sorted(self.stats.items(), key=lambda kv: kv[1].total, reverse=True)
+            actions = sorted(self.actions.items(), key=lambda kv: kv[1][1], reverse=True)
+            suspects = sorted(self.suspects.items(), key=lambda kv: kv[1], reverse=True)
+            elapsed = time.time() - self.started
+        total = sum(s.count for _, s in stats)
+        out = [f"SQL profile: {total} statements in {elapsed:.0f}s"]
+        if suspects:
+            out += ["", "Likely N+1 (identical statement repeated within one action run):"]
+            for (name, sql), n in suspects:
+                out.append(f"  {n:>5}x  [{name}]  {sql[:160]}")
+        out += ["", "Actions (runs, statements):"]
+        for name, (runs, count) in actions:
+            out.append(f"  {name:<32} {runs:>6} {count:>8}")
+        head = "  ".join(f"<{b}ms" for b in BUCKETS_MS) + f"  >={BUCKETS_MS[-1]}ms"
+        out += ["", f"Top {top} statements by total time (count, total ms, avg ms, max ms, rows | {head}):"]
+        for (name, sql), s in stats[:top]:
+            rows = "-" if s.rows is None else str(s.rows)
+            out.append(f"  {s.count:>6} {s.total * 1000:>9.1f} {s.total / s.count * 1000:>7.2f} {s.max * 1000:>8.1f} {rows:>7} | "
+                       f"{' '.join(str(h) for h in s.hist)}  [{name}]  {sql[:160]}")
+        return "\n".join(out)
+
+    def dump(self, path=None):
+        text = self.summary()
+        if path is None:
+            print(text, file=sys.stderr)
+        else:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(text + "\n")
+
+profiler = SqlProfiler(settings.SQL_PROFILE_N_PLUS_ONE)
+_installed: set[int] = set()
+
+def enabled() -> bool:
+    return bool(_installed)
+
+def install(engine):
+    """Attach the profiler to ``engine`` (once); the summary is printed to stderr at exit."""
+    if id(engine) in _installed:
+        return
+    if not _installed:
+        atexit.register(profiler.dump, settings.SQL_PROFILE_PATH or None)
+    _installed.add(id(engine))
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("sql_profile_t0", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["sql_profile_t0"].pop()
+        profiler.record(statement, time.perf_counter() - started, getattr(cursor, "rowcount", -1))
+
+    @event.listens_for(engine, "handle_error")
+    def _failed(ctx):
+        pending = ctx.connection.info.get("sql_profile_t0") if ctx.connection is not None else None
+        if pending:
+            pending.pop()
+
+@contextmanager
+def _tag(name: str):
+    token = profiler.begin(name)
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+class action:
+    """Tag the SQL issued inside the block (or decorated function) with ``name``."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._tokens = []
+
+    def __enter__(self):
+        if _installed:
+            self._tokens.append(profiler.begin(self.name))
+        else:
+            self._tokens.append(None)
+        return self
+
+    def __exit__(self, *exc):
+        token = self._tokens.pop()
+        if token is not None:
+            _current.reset(token)
+        return False
+
+    def __call__(self, fn):
+        name = self.name
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _installed:
+                return fn(*args, **kwargs)
+            with _tag(name):
+                return fn(*args, **kwargs)
+        return wrapper
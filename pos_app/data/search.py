@@ -0,0 +1,118 @@
+"""Indexed product search.
+
+SQLite uses an FTS5 shadow table over products (sku, barcode, name) kept in
+sync by triggers; the trigram tokenizer is used when the SQLite build has it
+so that matching keeps the old substring semantics. Postgres uses pg_trgm GIN
+indexes, which serve ILIKE '%term%' and rank by similarity. The backend is
+chosen from the engine's dialect (i.e. ``settings.DATABASE_URL``); without an
+index the search falls back to a plain ILIKE scan.
+"""
+import threading
+from sqlalchemy import bindparam, func, or_, select, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+from pos_app.data.models import Product
+
+_SQLITE_TRIGGERS = [
+    """CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products BEGIN
+         INSERT INTO products_fts(rowid, sku, barcode, name) VALUES (new.id, new.sku, new.barcode, new.name);
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products BEGIN
+         INSERT INTO products_fts(products_fts, rowid, sku, barcode, name) VALUES ('delete', old.id, old.sku, old.barcode, old.name);
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS products_fts_au AFTER UPDATE OF sku, barcode, name ON products BEGIN
+         INSERT INTO products_fts(products_fts, rowid, sku, barcode, name) VALUES ('delete', old.id, old.sku, old.barcode, old.name);
+         INSERT INTO products_fts(rowid, sku, barcode, name) VALUES (new.id, new.sku, new.barcode, new.name);
+       END""",
+]
+
+_PG_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_products_name_trgm ON products USING gin (name gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_products_sku_trgm ON products USING gin (sku gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_products_barcode_trgm ON products USING gin (barcode gin_trgm_ops)",
+]
+
+_modes: dict[str, str | None] = {}
+_modes_lock = threading.Lock()
+
+def ensure_search_index(engine) -> str | None:
+    """Create the search index for the engine's dialect if missing; returns the mode in use."""
+    dialect = engine.dialect.name
+    try:
+        with engine.begin() as conn:
+            if dialect == "sqlite":
+                exists = conn.execute(text("SELECT 1 FROM sqlite_master WHERE name = 'products_fts'")).first()
+                if not exists:
+                    try:
+                        conn.execute(text("CREATE VIRTUAL TABLE products_fts USING fts5("
+                                          "sku, barcode, name, content='products', content_rowid='id', tokenize='trigram')"))
+                    except DBAPIError:
+                        conn.execute(text("CREATE VIRTUAL TABLE products_fts USING fts5("
+                                          "sku, barcode, name, content='products', content_rowid='id', prefix='2 3')"))
+                    conn.execute(text("INSERT INTO products_fts(products_fts) VALUES ('rebuild')"))
+                for ddl in _SQLITE_TRIGGERS:
+                    conn.execute(text(ddl))
+            elif dialect == "postgresql":
+                for ddl in _PG_DDL:
+                    conn.execute(text(ddl))
+    except DBAPIError:
+        pass  # no FTS5 build / not allowed to create the extension: keep the ILIKE fallback
+    with _modes_lock:
+        _modes.pop(str(engine.url), None)
+    return _search_mode(engine)
+
+def _search_mode(bind) -> str | None:
+    key = str(bind.url)
+    with _modes_lock:
+        if key in _modes:
+            return _modes[key]
+    mode = None
+    with bind.connect() as conn:
+        if bind.dialect.name == "sqlite":
+            row = conn.execute(text("SELECT sql FROM sqlite_master WHERE name = 'products_fts'")).first()
+            if row is not None:
+                mode = "fts5-trigram" if "trigram" in (row[0] or "") else "fts5"
+        elif bind.dialect.name == "postgresql":
+            if conn.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")).first():
+                mode = "pg_trgm"
+    with _modes_lock:
+        _modes[key] = mode
+    return mode
+
+def _fts_query(term: str, trigram: bool) -> str | None:
+    if trigram:
+        # one trigram phrase is a substring match of the whole term (the old ILIKE
+        # semantics); it needs at least three characters
+        if len(term) < 3:
+            return None
+        return '"' + term.replace('"', '""') + '"'
+    return " ".join('"' + w.replace('"', '""') + '"*' for w in term.split()) or None
+
+def search_product_ids(session: Session, term: str, limit: int = 50) -> list[int]:
+    """Ids of the best ``limit`` products matching ``term``, best match first."""
+    term = (term or "").strip()
+    if not term:
+        return []
+    mode = _search_mode(session.get_bind())
+    if mode in ("fts5", "fts5-trigram"):
+        q = _fts_query(term, mode == "fts5-trigram")
+        if q is not None:
+            stmt = text("SELECT rowid FROM products_fts WHERE products_fts MATCH :q "
+                        "ORDER BY bm25(products_fts, 4.0, 4.0, 1.0) LIMIT :n")
+            return [r[0] for r in session.execute(stmt, {"q": q, "n": limit})]
+        # too short for trigrams: unordered prefix match that stops at the first ``limit`` hits
+        like = f"{term}%"
+        stmt = (select(Product.id)
+                .where(or_(Product.sku.ilike(like), Product.barcode.ilike(like), Product.name.ilike(like)))
+                .limit(limit))
+        return list(session.scalars(stmt))
+    like = f"%{term}%"
+    stmt = select(Product.id).where(or_(Product.sku.ilike(like), Product.name.ilike(like), Product.barcode.ilike(like)))
+    if mode == "pg_trgm":
+        t = bindparam("t", term)
+        stmt = stmt.order_by(func.greatest(func.similarity(Product.name, t), func.similarity(Product.sku, t),
+                                           func.similarity(func.coalesce(Product.barcode, ""), t)).desc())
+    else:
+        stmt = stmt.order_by(Product.id.desc())
+    return list(session.scalars(stmt.limit(limit)))
@@ -1,48 +1,88 @@
-
-from pos_app.settings_store import get_active_profile
+import threading
+from pos_app.settings_store import get_active_profile, subscribe
 
 class EscPosPrinter:
     def __init__(self):
-        prof = get_active_profile()
-        esc = prof.get("escpos", {})
-        self.mode = esc.get("mode","network")
-        self.host = esc.get("host","192.168.1.50")
-        self.port = int(esc.get("port",9100))
-        self.usb_vid = int(esc.get("usb_vid",0))
-        self.usb_pid = int(esc.get("usb_pid",0))
         self._impl = None
+        self._lock = threading.Lock()
+        self.configure(get_active_profile())
+        subscribe(self._settings_changed)
+
+    def configure(self, prof: dict):
+        """Apply a profile's ``escpos`` section; the open connection is dropped only if it changed."""
+        esc = prof.get("escpos", {})
+        target = (esc.get("mode","network"), esc.get("host","192.168.1.50"), int(esc.get("port",9100)),
+                  int(esc.get("usb_vid",0)), int(esc.get("usb_pid",0)))
+        with self._lock:
+            if target == getattr(self, "_target", None):
+                return
+            self._target = target
+            self.mode, self.host, self.port, self.usb_vid, self.usb_pid = target
+            self._disconnect()
+
+    def _settings_changed(self, data: dict):
+        self.configure(get_active_profile(data))
+
+    def _connect(self):
+        # Opened on first use (normally on the spooler thread) and then kept open.
+        if self.mode == "network":
+            from escpos.printer import Network
+            self._impl = Network(self.host, self.port, timeout=5)
+        elif self.mode == "usb" and self.usb_vid and self.usb_pid:
+            from escpos.printer import Usb
+            self._impl = Usb(self.usb_vid, self.usb_pid)
+
+    def _disconnect(self):
+        impl, self._impl = self._impl, None
         try:
-            if self.mode == "network":
-                from escpos.printer import Network
-                self._impl = Network(self.host, self.port)
-            elif self.mode == "usb" and self.usb_vid and self.usb_pid:
-                from escpos.printer import Usb
-                self._impl = Usb(self.usb_vid, self.usb_pid)
+            if impl is not None:
+                impl.close()
         except Exception:
-            self._impl = None
+            pass
+
+    def send_text(self, text: str):
+        """Print through the persistent connection, reconnecting once; raises on failure."""
+        with self._lock:
+            if self._impl is None:
+                self._connect()
+                if self._impl is None:
+                    print("[ESC/POS fallback]", text)
+                    return
+            try:
+                self._impl.text(text + "\n")
+                self._impl.cut()
+            except Exception:
+                self._disconnect()
+                raise
 
     def print_text(self, text: str):
-        if self._impl is None:
-            print("[ESC/POS fallback]", text)
-            return
         try:
-            self._impl.text(text + "\n")
-            self._impl.cut()
+            self.send_text(text)
         except Exception as e:
             print("[ESC/POS error]", e)
             print(text)
 
-    def print_receipt(self, sale, session):
-        # simple formatter
+    def format_receipt(self, sale, names: dict | None = None) -> str:
+        # simple formatter; ``names`` (product id -> name) avoids loading line.product
         lines = ["==== RECEIPT ===="]
         when = getattr(sale, "datetime", None)
         lines.append(f"Date: {when.strftime('%Y-%m-%d %H:%M:%S') if when else ''}")
         lines.append("Items:")
         for l in sale.lines:
-            name = l.product.name if getattr(l, "product", None) else f"#{l.product_id}"
-            lines.append(f"  {l.qty:.0f} x {name:<20} {l.unit_price:>7.2f}")
+            if names and l.product_id in names:
+                name = names[l.product_id]
+            else:
+                name = l.product.name if getattr(l, "product", None) else f"#{l.product_id}"
+            lines.append(f"  {l.qty:g} x {name:<20} {l.unit_price:>7.2f}")
         lines += ["-----------------", f"Subtotal: {sale.subtotal:>9.2f}", f"Tax:      {sale.tax_total:>9.2f}", f"Total:    {sale.grand_total:>9.2f}", "================="]
-        self.print_text("\n".join(lines))
+        return "\n".join(lines)
+
+    def print_receipt(self, sale, session):
+        self.print_text(self.format_receipt(sale))
 
     def test_page(self):
         self.print_text("POS App Test Page\n\n*** Printer OK ***")
+
+    def close(self):
+        with self._lock:
+            self._disconnect()
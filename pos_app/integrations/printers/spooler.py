@@ -0,0 +1,123 @@
+import json
+import queue
+import threading
+import time
+import uuid
+from pathlib import Path
+
+
+class PrintSpooler:
+    """Background print queue for receipt text.
+
+    Every job is written to ``spool_dir`` before it is queued and removed only
+    after the printer accepted it, so jobs survive a crash or restart. The
+    in-memory queue is bounded; when it is full the job simply stays on disk
+    and is picked up once the worker has drained the queue. Failed jobs are
+    retried in order with exponential backoff.
+    """
+
+    def __init__(self, printer, spool_dir, maxsize: int = 64, max_backoff: float = 60.0):
+        self.printer = printer
+        self.spool_dir = Path(spool_dir)
+        self.max_backoff = float(max_backoff)
+        self._queue: queue.Queue = queue.Queue(maxsize=max(1, int(maxsize)))
+        self._lock = threading.Lock()
+        self._pending: set[Path] = set()
+        self._queued: set[Path] = set()
+        self._stop = threading.Event()
+        self._thread = None
+        self.printed = 0
+        self.failures = 0
+        self.last_error: str | None = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self.spool_dir.mkdir(parents=True, exist_ok=True)
+        self._enqueue_from_disk()
+        self._thread = threading.Thread(target=self._run, name="receipt-spooler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 2.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def submit(self, text: str) -> Path:
+        # time-prefixed names keep jobs in submission order when re-read from disk
+        path = self.spool_dir / f"{time.time_ns():020d}-{uuid.uuid4().hex[:8]}.json"
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"text": text}), encoding="utf-8")
+        tmp.replace(path)
+        with self._lock:
+            self._pending.add(path)
+        self._offer(path)
+        return path
+
+    def status(self) -> dict:
+        with self._lock:
+            return {
+                "depth": len(self._pending),
+                "printed": self.printed,
+                "failures": self.failures,
+                "last_error": self.last_error,
+            }
+
+    def _offer(self, path: Path):
+        with self._lock:
+            if path in self._queued:
+                return
+            try:
+                self._queue.put_nowait(path)
+            except queue.Full:
+                return
+            self._queued.add(path)
+
+    def _enqueue_from_disk(self):
+        paths = sorted(self.spool_dir.glob("*.json"))
+        with self._lock:
+            self._pending.update(paths)
+        for path in paths:
+            self._offer(path)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                path = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                with self._lock:
+                    spilled = len(self._pending) > len(self._queued)
+                if spilled:
+                    self._enqueue_from_disk()
+                continue
+            self._print_with_retry(path)
+            with self._lock:
+                self._queued.discard(path)
+                self._pending.discard(path)
+
+    def _print_with_retry(self, path: Path):
+        attempt = 0
+        while not self._stop.is_set():
+            try:
+                text = json.loads(path.read_text(encoding="utf-8"))["text"]
+            except (OSError, ValueError, KeyError) as exc:
+                with self._lock:
+                    self.failures += 1
+                    self.last_error = f"Dropped unreadable job {path.name}: {exc}"
+                path.unlink(missing_ok=True)
+                return
+            try:
+                self.printer.send_text(text)
+            except Exception as exc:
+                attempt += 1
+                with self._lock:
+                    self.failures += 1
+                    self.last_error = str(exc)
+                self._stop.wait(min(self.max_backoff, 0.5 * (2 ** min(attempt, 10))))
+                continue
+            path.unlink(missing_ok=True)
+            with self._lock:
+                self.printed += 1
+                self.last_error = None
+            return
@@ -1,18 +1,81 @@
-
+import select
 import socket
-import usb.core, usb.util
-from pos_app.settings_store import get_active_profile
+import threading
+from pos_app.settings_store import get_active_profile, subscribe
+
+# Stored once per connection with ^DF; each label then recalls it with ^XF
+# and only sends its field data.
+LABEL_FORMAT = "R:POSLBL.ZPL"
+
+class LabelBatchError(RuntimeError):
+    def __init__(self, message: str, printed: int):
+        super().__init__(message)
+        self.printed = printed
+
+class _WriteError(OSError):
+    """A write that failed; ``sent`` is how many bytes went out first (None if unknown)."""
+    def __init__(self, cause: Exception, sent: int | None):
+        super().__init__(str(cause))
+        self.sent = sent
+
+def _retryable(exc: Exception) -> bool:
+    # only when nothing reached the printer: resending a partly written payload prints labels twice
+    return not isinstance(exc, _WriteError) or exc.sent == 0
+
+def _peer_closed(sock) -> bool:
+    # a printer that restarted or dropped an idle connection has closed it: reconnect before writing
+    if not select.select([sock], [], [], 0)[0]:
+        return False
+    try:
+        return sock.recv(1, socket.MSG_PEEK) == b""
+    except OSError:
+        return True
+
+def _field(value) -> str:
+    # ^ and ~ would start a new ZPL command inside ^FD data
+    return str(value).replace("^", " ").replace("~", " ")
 
 class ZebraPrinter:
     def __init__(self):
-        prof = get_active_profile()
-        self.cfg = prof.get("zebra", {"mode":"network","host":"192.168.1.51","port":9100,"usb_vid":0,"usb_pid":0})
+        self._sock = None
+        self._ep_out = None
+        self._format_loaded = False
+        self._lock = threading.Lock()
+        self._pending = None
+        self.cfg = self._zebra_cfg(get_active_profile())
+        subscribe(self._settings_changed)
 
-    def _send_network(self, zpl: str):
-        with socket.create_connection((self.cfg.get("host","127.0.0.1"), int(self.cfg.get("port",9100))), timeout=3) as s:
-            s.sendall(zpl.encode("utf-8"))
+    @staticmethod
+    def _zebra_cfg(prof: dict) -> dict:
+        return dict(prof.get("zebra", {"mode":"network","host":"192.168.1.51","port":9100,"usb_vid":0,"usb_pid":0}))
 
-    def _send_usb(self, zpl: str):
+    def _settings_changed(self, data: dict):
+        cfg = self._zebra_cfg(get_active_profile(data))
+        # may run on another thread mid-batch: the next send picks it up and reconnects
+        with self._lock:
+            self._pending = cfg if cfg != self.cfg else None
+
+    def _apply_pending(self):
+        with self._lock:
+            cfg, self._pending = self._pending, None
+        if cfg is not None:
+            self.close()
+            self.cfg = cfg
+
+    def _network_socket(self):
+        if self._sock is not None and _peer_closed(self._sock):
+            self.close()
+        if self._sock is None:
+            s = socket.create_connection((self.cfg.get("host","127.0.0.1"), int(self.cfg.get("port",9100))), timeout=3)
+            s.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+            self._sock = s
+            self._format_loaded = False
+        return self._sock
+
+    def _usb_endpoint(self):
+        if self._ep_out is not None:
+            return self._ep_out
+        import usb.core, usb.util  # pyusb is only needed for USB-attached printers
         vid = int(self.cfg.get("usb_vid",0)); pid = int(self.cfg.get("usb_pid",0))
         dev = usb.core.find(idVendor=vid, idProduct=pid)
         if dev is None:
@@ -31,15 +94,62 @@ class ZebraPrinter:
                 ep_out = ep; break
         if ep_out is None:
             raise RuntimeError("No OUT endpoint on Zebra device")
-        ep_out.write(zpl.encode("utf-8"))
+        self._ep_out = ep_out
+        self._format_loaded = False
+        return ep_out
+
+    def _send_network(self, zpl: str):
+        sock, data = self._network_socket(), memoryview(zpl.encode("utf-8"))
+        sent = 0
+        try:
+            while sent < len(data):
+                sent += sock.send(data[sent:])
+        except OSError as e:
+            raise _WriteError(e, sent) from e
+
+    def _send_usb(self, zpl: str):
+        ep = self._usb_endpoint()
+        try:
+            ep.write(zpl.encode("utf-8"))
+        except Exception as e:
+            raise _WriteError(e, None) from e
+
+    def _send_once(self, zpl: str):
+        self._apply_pending()
+        if self.cfg.get("mode","network") == "usb":
+            self._send_usb(zpl)
+        else:
+            self._send_network(zpl)
+
+    def _send(self, zpl: str):
+        try:
+            self._send_once(zpl)
+        except Exception as e:
+            self.close()
+            if not _retryable(e):
+                raise
+            # nothing was written (printer power-cycled, connect refused): reopen once
+            self._send_once(zpl)
+
+    def close(self):
+        sock, self._sock = self._sock, None
+        if sock is not None:
+            try:
+                sock.close()
+            except OSError:
+                pass
+        if self._ep_out is not None:
+            import usb.util
+            try:
+                usb.util.dispose_resources(self._ep_out.device)
+            except Exception:
+                pass
+            self._ep_out = None
+        self._format_loaded = False
 
     def print_zpl(self, zpl: str):
-        mode = self.cfg.get("mode","network")
         try:
-            if mode == "usb":
-                self._send_usb(zpl)
-            else:
-                self._send_network(zpl)
+            self._send(zpl)
         except Exception as e:
             print("[ZPL fallback]", e)
             print(zpl)
@@ -55,3 +165,45 @@ class ZebraPrinter:
 ^XZ
 """ * max(1, int(copies))
         self.print_zpl(zpl)
+
+    def _format_zpl(self) -> str:
+        return (f"^XA^DF{LABEL_FORMAT}^FS^PW600"
+                "^FO50,40^A0N,30,30^FN1^FS"
+                "^FO50,90^BY2^BCN,120,Y,N,N^FN2^FS^XZ\n")
+
+    def _label_zpl(self, barcode: str, title: str, copies: int) -> str:
+        return (f"^XA^XF{LABEL_FORMAT}^FS^FN1^FD{_field(f'{title:^30}')}^FS"
+                f"^FN2^FD{_field(barcode)}^FS^PQ{max(1, int(copies))}^XZ\n")
+
+    def print_labels(self, items, copies: int = 1, start: int = 0, chunk_size: int = 50, progress=None) -> int:
+        """Print ``(barcode, title)`` pairs as one stream over the open connection.
+
+        Labels are sent in chunks of ``chunk_size``; ``progress(done, total)``
+        is called after each chunk and may return False to stop early. Returns
+        the number of labels sent. On failure a LabelBatchError carries the
+        count already sent so the caller can resume with ``start=err.printed``.
+        A chunk is only resent automatically if none of it was written; one
+        that failed part-way may have printed some of its labels, which a
+        resume prints again, so keep chunks small.
+        """
+        items = list(items)
+        total = len(items)
+        done = max(0, int(start))
+        while done < total:
+            chunk = items[done:done + max(1, int(chunk_size))]
+            payload = "".join(self._label_zpl(barcode, title, copies) for barcode, title in chunk)
+            for attempt in (0, 1):
+                try:
+                    self._apply_pending()  # before checking _format_loaded: a new target means a new connection
+                    # a fresh connection may follow a printer restart, so re-store the format with it
+                    self._send_once(payload if self._format_loaded else self._format_zpl() + payload)
+                    self._format_loaded = True
+                    break
+                except Exception as e:
+                    self.close()
+                    if attempt or not _retryable(e):
+                        raise LabelBatchError(f"Label printing stopped after {done} of {total}: {e}", done) from e
+            done += len(chunk)
+            if progress is not None and progress(done, total) is False:
+                break
+        return done
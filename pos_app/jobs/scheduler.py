@@ -1,4 +1,28 @@
 from apscheduler.schedulers.background import BackgroundScheduler
+from pos_app.config import settings
+from pos_app.data.db import pool_keepalive, sqlite_checkpoint, sqlite_optimize
 
-def start_jobs():
-    s=BackgroundScheduler(); s.start(); return s
+def _sqlite_maintenance(s, engine):
+    if engine.dialect.name != "sqlite" or not settings.SQLITE_TUNING:
+        return
+    # keep the WAL short so readers don't have to scan it, and refresh planner stats
+    if settings.SQLITE_CHECKPOINT_MINUTES > 0:
+        s.add_job(sqlite_checkpoint, "interval", args=[engine], minutes=settings.SQLITE_CHECKPOINT_MINUTES,
+                  id="sqlite_checkpoint", coalesce=True, max_instances=1)
+    if settings.SQLITE_OPTIMIZE_MINUTES > 0:
+        s.add_job(sqlite_optimize, "interval", args=[engine], minutes=settings.SQLITE_OPTIMIZE_MINUTES,
+                  id="sqlite_optimize", coalesce=True, max_instances=1)
+
+def _server_keepalive(s, engine):
+    if engine.dialect.name == "sqlite" or settings.DB_KEEPALIVE_MINUTES <= 0:
+        return
+    # an idle till keeps a live, recently used connection instead of reconnecting on the first scan
+    s.add_job(pool_keepalive, "interval", args=[engine], minutes=settings.DB_KEEPALIVE_MINUTES,
+              id="db_keepalive", coalesce=True, max_instances=1)
+
+def start_jobs(engine=None):
+    s=BackgroundScheduler(daemon=True)
+    if engine is not None:
+        _sqlite_maintenance(s, engine)
+        _server_keepalive(s, engine)
+    s.start(); return s
@@ -0,0 +1,204 @@
+"""Columnar sales analytics with NumPy.
+
+``SalesCube.load`` reads the completed sales of a date range, their lines
+and payments once into NumPy arrays (one query each). Breakdowns by day,
+hour of day, weekday, register, cashier, product, category and payment
+method are then vectorized ``unique``/``bincount`` passes over those arrays
+without going back to the database. ``append_new`` adds sales committed
+since the last load, so refreshing the same range only reads the new rows.
+
+Hours, weekdays and days are taken from ``Sale.datetime`` as stored, like the
+daily rollups. Missing register, cashier and category ids are grouped under 0.
+
+    python -m pos_app.reports.analytics --start 2025-01-01 --end 2025-12-31
+"""
+import threading
+from datetime import date, timedelta
+import numpy as np
+from sqlalchemy import String, cast, select
+from sqlalchemy.orm import Session
+from pos_app.data.models import Category, Payment, Product, Sale, SaleLine, User
+
+SALE_DIMS = ("day", "hour", "weekday", "register", "cashier")
+LINE_DIMS = SALE_DIMS + ("product", "category")
+WEEKDAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+
+def _group(keys: np.ndarray, *weights: np.ndarray):
+    """Distinct keys (sorted), their row counts and the per-key sum of each weight column."""
+    uniq, inv = np.unique(keys, return_inverse=True)
+    counts = np.bincount(inv, minlength=len(uniq))
+    return uniq, counts, [np.bincount(inv, weights=w, minlength=len(uniq)) for w in weights]
+
+def _ids(values) -> np.ndarray:
+    return np.fromiter((v or 0 for v in values), dtype=np.int64, count=len(values))
+
+class SalesCube:
+    def __init__(self, start: date, end: date):
+        self.start, self.end = start, end
+        self.last_sale_id = 0
+        self._lock = threading.Lock()
+        empty_i, empty_f = np.empty(0, np.int64), np.empty(0, np.float64)
+        # per sale
+        self.sale_id = empty_i; self.ts = np.empty(0, "datetime64[s]"); self.register = empty_i; self.cashier = empty_i
+        self.subtotal = empty_f; self.tax = empty_f; self.total = empty_f
+        # per line; ``line_sale`` is the row index of the line's sale in the arrays above
+        self.line_sale = empty_i; self.product = empty_i; self.category = empty_i; self.qty = empty_f; self.amount = empty_f
+        # per payment; methods are dictionary-encoded
+        self.pay_method = empty_i; self.pay_amount = empty_f
+        self.methods: list[str] = []
+        self.names: dict[str, dict[int, str]] = {"cashier": {}, "category": {}}
+
+    @classmethod
+    def load(cls, session: Session, start: date, end: date) -> "SalesCube":
+        cube = cls(start, end)
+        cube.append_new(session)
+        return cube
+
+    def __len__(self):
+        return len(self.sale_id)
+
+    def _sales_filter(self):
+        return (Sale.status == "completed", Sale.datetime >= self.start, Sale.datetime < self.end + timedelta(days=1),
+                Sale.id > self.last_sale_id)
+
+    def append_new(self, session: Session) -> int:
+        """Load completed sales in the range with ids above the last one loaded; returns how many were added."""
+        with self._lock:
+            where = self._sales_filter()
+            # Core rows on the session's connection (no ORM row processing), and timestamps as text that
+            # NumPy parses in bulk instead of one datetime object per sale
+            conn = session.connection()
+            sales = conn.execute(select(Sale.id, cast(Sale.datetime, String), Sale.register_id, Sale.cashier_id, Sale.subtotal,
+                                        Sale.tax_total, Sale.grand_total).where(*where).order_by(Sale.id)).all()
+            if not sales:
+                return 0
+            new_ids = select(Sale.id).where(*where)
+            lines = conn.execute(select(SaleLine.sale_id, SaleLine.product_id, Product.category_id, SaleLine.qty, SaleLine.line_total)
+                                 .join(Product, Product.id == SaleLine.product_id, isouter=True)
+                                 .where(SaleLine.sale_id.in_(new_ids))).all()
+            pays = conn.execute(select(Payment.method, Payment.amount).where(Payment.sale_id.in_(new_ids))).all()
+            self._extend(sales, lines, pays)
+            self.names["cashier"] = dict(conn.execute(select(User.id, User.username)).all())
+            self.names["category"] = dict(conn.execute(select(Category.id, Category.name)).all())
+            return len(sales)
+
+    def _extend(self, sales, lines, pays):
+        ids, ts, reg, cashier, sub, tax, total = zip(*sales)
+        ids = np.array(ids, dtype=np.int64)
+        offset = len(self.sale_id)
+        self.sale_id = np.concatenate([self.sale_id, ids])
+        self.ts = np.concatenate([self.ts, np.array(ts, dtype="datetime64[s]")])
+        self.register = np.concatenate([self.register, _ids(reg)])
+        self.cashier = np.concatenate([self.cashier, _ids(cashier)])
+        for name, col in (("subtotal", sub), ("tax", tax), ("total", total)):
+            setattr(self, name, np.concatenate([getattr(self, name), np.array(col, dtype=np.float64)]))
+        if lines:
+            sale_of, product, category, qty, amount = zip(*lines)
+            # new sales are sorted by id, so each line finds its sale's row by binary search
+            row = offset + np.searchsorted(ids, np.array(sale_of, dtype=np.int64))
+            self.line_sale = np.concatenate([self.line_sale, row])
+            self.product = np.concatenate([self.product, _ids(product)])
+            self.category = np.concatenate([self.category, _ids(category)])
+            self.qty = np.concatenate([self.qty, np.array(qty, dtype=np.float64)])
+            self.amount = np.concatenate([self.amount, np.array(amount, dtype=np.float64)])
+        if pays:
+            code = {m: i for i, m in enumerate(self.methods)}
+            for method, _ in pays:
+                code.setdefault(method or "Unknown", len(code))
+            self.methods = sorted(code, key=code.get)
+            self.pay_method = np.concatenate([self.pay_method, np.array([code[m or "Unknown"] for m, _ in pays], dtype=np.int64)])
+            self.pay_amount = np.concatenate([self.pay_amount, np.array([a or 0.0 for _, a in pays], dtype=np.float64)])
+        self.last_sale_id = int(ids[-1])
+
+    def _sale_dim(self, dim: str) -> np.ndarray:
+        if dim == "day":
+            return self.ts.astype("datetime64[D]")
+        if dim == "hour":
+            return (self.ts - self.ts.astype("datetime64[D]")).astype("timedelta64[h]").astype(np.int64)
+        if dim == "weekday":
+            return (self.ts.astype("datetime64[D]").astype(np.int64) + 3) % 7  # 1970-01-01 was a Thursday
+        if dim == "register":
+            return self.register
+        if dim == "cashier":
+            return self.cashier
+        raise ValueError(f"Unknown sales dimension '{dim}' (use one of {', '.join(SALE_DIMS)})")
+
+    def sales_by(self, dim: str) -> list[tuple]:
+        """``(key, sales, subtotal, tax, total)`` per distinct value of a sales dimension, by key."""
+        with self._lock:
+            if not len(self.sale_id):
+                return []
+            keys, counts, (sub, tax, total) = _group(self._sale_dim(dim), self.subtotal, self.tax, self.total)
+        return [(self._key(dim, k), int(c), float(s), float(t), float(g)) for k, c, s, t, g in zip(keys, counts, sub, tax, total)]
+
+    def lines_by(self, dim: str, top: int | None = None) -> list[tuple]:
+        """``(key, lines, qty, total)`` per distinct value of a line (or sales) dimension.
+
+        With ``top``, only the ``top`` keys by total, largest first; otherwise by key.
+        """
+        with self._lock:
+            if not len(self.line_sale):
+                return []
+            if dim == "product":
+                keys = self.product
+            elif dim == "category":
+                keys = self.category
+            else:
+                keys = self._sale_dim(dim)[self.line_sale]
+            uniq, counts, (qty, total) = _group(keys, self.qty, self.amount)
+        order = np.argsort(-total, kind="stable")[:top] if top else np.arange(len(uniq))
+        return [(self._key(dim, uniq[i]), int(counts[i]), float(qty[i]), float(total[i])) for i in order]
+
+    def payments_by_method(self) -> list[tuple[str, float]]:
+        with self._lock:
+            if not len(self.pay_method):
+                return []
+            totals = np.bincount(self.pay_method, weights=self.pay_amount, minlength=len(self.methods))
+        return sorted((m, float(t)) for m, t in zip(self.methods, totals))
+
+    def _key(self, dim: str, key):
+        if dim == "day":
+            return key.astype(date)
+        if dim == "weekday":
+            return WEEKDAYS[int(key)]
+        return int(key)
+
+    def label(self, dim: str, key) -> str:
+        """Display name for a key returned by ``sales_by``/``lines_by``."""
+        if dim == "cashier":
+            return self.names["cashier"].get(key) or "Unassigned"
+        if dim == "category":
+            return self.names["category"].get(key) or "Uncategorized"
+        if dim == "register":
+            return f"Register {key}" if key else "Unassigned"
+        if dim == "hour":
+            return f"{key:02d}:00"
+        return str(key)
+
+def main(argv=None):
+    import argparse
+    import time
+    from pos_app.data.db import get_engine, get_session_maker
+    ap = argparse.ArgumentParser(description="Load a date range into a SalesCube and print its breakdowns.")
+    ap.add_argument("--start", type=date.fromisoformat, default=date.today() - timedelta(days=30))
+    ap.add_argument("--end", type=date.fromisoformat, default=date.today())
+    ap.add_argument("--top", type=int, default=10, help="products to list")
+    args = ap.parse_args(argv)
+    with get_session_maker(get_engine())() as s:
+        t = time.perf_counter(); cube = SalesCube.load(s, args.start, args.end); loaded = time.perf_counter() - t
+    print(f"{len(cube)} sales, {len(cube.line_sale)} lines loaded in {loaded * 1000:.0f} ms")
+    for dim in ("hour", "weekday", "register", "cashier"):
+        t = time.perf_counter(); rows = cube.sales_by(dim); took = time.perf_counter() - t
+        print(f"\nBy {dim} ({took * 1000:.1f} ms): key, sales, total")
+        for key, n, _, _, total in rows:
+            print(f"  {cube.label(dim, key):<16} {n:>8} {total:>14.2f}")
+    for dim, top in (("category", None), ("product", args.top)):
+        print(f"\nBy {dim}: key, lines, qty, total")
+        for key, n, qty, total in cube.lines_by(dim, top):
+            print(f"  {cube.label(dim, key):<16} {n:>8} {qty:>10.0f} {total:>14.2f}")
+    print("\nBy payment method:")
+    for method, total in cube.payments_by_method():
+        print(f"  {method:<16} {total:>14.2f}")
+
+if __name__ == "__main__":
+    main()
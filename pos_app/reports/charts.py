@@ -0,0 +1,114 @@
+"""Bar charts for the Reports page, rendered to PNG bytes.
+
+Charts are drawn with matplotlib's object-oriented API on an Agg canvas (no
+pyplot global state, nothing written to disk). ``ChartRenderer`` renders a
+batch of charts in a small process pool, so the Category, Cashier and
+Payment charts are drawn in parallel and off the GUI process's GIL, and
+keeps the PNGs in an LRU cache keyed by (dataset hash, size) so redrawing an
+unchanged report costs nothing. Each pool process reuses one figure and
+canvas per size. On a single-CPU machine, and for a single cache miss, the
+charts are drawn in-process instead: the pool would only add overhead.
+"""
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+@dataclass(frozen=True)
+class ChartSpec:
+    title: str
+    labels: tuple[str, ...]
+    values: tuple[float, ...]
+    size: tuple[int, int] = (640, 360)  # pixels
+    dpi: int = 100
+
+    @classmethod
+    def from_rows(cls, title: str, rows, size=(640, 360), dpi: int = 100) -> "ChartSpec":
+        """From ``(label, value)`` rows as returned by the report queries."""
+        return cls(title, tuple(str(k) for k, _ in rows), tuple(round(float(v), 2) for _, v in rows), tuple(size), dpi)
+
+    def key(self) -> tuple[str, tuple[int, int], int]:
+        digest = hashlib.sha1(json.dumps([self.title, self.labels, self.values]).encode("utf-8")).hexdigest()
+        return digest, self.size, self.dpi
+
+_canvases: dict = {}  # (size, dpi) -> (figure, canvas), per process
+_render_lock = threading.Lock()
+
+def render_png(spec: ChartSpec) -> bytes:
+    with _render_lock:
+        return _render(spec)
+
+def _render(spec: ChartSpec) -> bytes:
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    pair = _canvases.get((spec.size, spec.dpi))
+    if pair is None:
+        fig = Figure(figsize=(spec.size[0] / spec.dpi, spec.size[1] / spec.dpi), dpi=spec.dpi)
+        pair = _canvases[(spec.size, spec.dpi)] = (fig, FigureCanvasAgg(fig))
+    fig, canvas = pair
+    fig.clear()
+    ax = fig.add_subplot()
+    ax.bar(spec.labels, spec.values)
+    ax.set_title(spec.title)
+    ax.set_ylabel("Total")
+    if len(spec.labels) > 6:
+        ax.tick_params(axis="x", labelrotation=45)
+    fig.tight_layout()
+    buf = io.BytesIO()
+    canvas.print_png(buf)
+    return buf.getvalue()
+
+class ChartRenderer:
+    def __init__(self, workers: int | None = None, cache_size: int = 32):
+        self.workers = min(3, os.cpu_count() or 1) if workers is None else workers
+        self.cache_size = cache_size
+        self._cache: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._pool = None
+
+    def _executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # spawn, not fork: the GUI process has Qt and database threads running
+                self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+            return self._pool
+
+    def cached(self, spec: ChartSpec) -> bytes | None:
+        with self._lock:
+            png = self._cache.get(spec.key())
+            if png is not None:
+                self._cache.move_to_end(spec.key())
+            return png
+
+    def _store(self, spec: ChartSpec, png: bytes):
+        with self._lock:
+            self._cache[spec.key()] = png
+            self._cache.move_to_end(spec.key())
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def render_all(self, specs: list[ChartSpec]) -> list[bytes]:
+        """PNG bytes for each spec, in order; cache misses are rendered in parallel. Blocks, so call it off the GUI thread."""
+        out = [self.cached(spec) for spec in specs]
+        missing = [i for i, png in enumerate(out) if png is None]
+        if len(missing) == 1 or self.workers <= 1:
+            for i in missing:  # not worth a round trip to the pool
+                out[i] = render_png(specs[i])
+                self._store(specs[i], out[i])
+        elif missing:
+            futures = {i: self._executor().submit(render_png, specs[i]) for i in missing}
+            for i, fut in futures.items():
+                out[i] = fut.result()
+                self._store(specs[i], out[i])
+        return out
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,116 @@
+"""Sales summary PDF export.
+
+The Jinja template is compiled once per process. Its rows are split into
+fixed-size pages (one table each, with a page break between them), so
+WeasyPrint lays out many small tables instead of one long one. The PDF is
+written by a separate process that can be terminated when the export is
+cancelled, so the GUI process neither blocks nor holds the GIL meanwhile.
+PDFs are kept in ``REPORT_CACHE_DIR`` under a hash of the rendered HTML: a
+report whose data and template did not change is copied from there instead
+of being rendered again.
+
+    python -m pos_app.reports.pdf --start 2025-01-01 --end 2025-12-31 --out report.pdf
+"""
+import hashlib
+import multiprocessing
+import os
+import shutil
+from datetime import date
+from functools import lru_cache
+from pathlib import Path
+from pos_app.config import settings
+
+REPORT_TEMPLATE = """
+<!doctype html><html><head><meta charset="utf-8"><title>Sales Report</title>
+<style>body{font-family:Arial,sans-serif}h1{font-size:18px}table{border-collapse:collapse;width:100%}th,td{border:1px solid #ddd;padding:6px;font-size:12px}th{background:#f0f0f0}.page{page-break-after:always}.page:last-child{page-break-after:auto}</style>
+</head><body>
+<h1>Sales Report: {{ start }} – {{ end }}</h1>
+{% for page in pages %}<div class="page"><table><thead><tr><th>Date</th><th>Sales</th><th>Subtotal</th><th>Tax</th><th>Total</th></tr></thead><tbody>
+{% for r in page %}<tr><td>{{ r.date }}</td><td>{{ r.count }}</td><td>{{ '%.2f'|format(r.subtotal) }}</td><td>{{ '%.2f'|format(r.tax) }}</td><td>{{ '%.2f'|format(r.total) }}</td></tr>{% endfor %}
+</tbody>{% if loop.last %}<tfoot><tr><th>Totals</th><th>{{ totals.count }}</th><th>{{ '%.2f'|format(totals.subtotal) }}</th><th>{{ '%.2f'|format(totals.tax) }}</th><th>{{ '%.2f'|format(totals.total) }}</th></tr></tfoot>{% endif %}</table></div>{% endfor %}
+</body></html>
+"""
+ROWS_PER_PAGE = 40
+
+@lru_cache(maxsize=1)
+def template():
+    from jinja2 import Environment, BaseLoader
+    return Environment(loader=BaseLoader()).from_string(REPORT_TEMPLATE)
+
+def render_html(rows: list[dict], totals: dict, start: str, end: str, rows_per_page: int = ROWS_PER_PAGE) -> str:
+    pages = [rows[i:i + rows_per_page] for i in range(0, len(rows), rows_per_page)] or [[]]
+    return template().render(pages=pages, totals=totals, start=start, end=end)
+
+def _write_pdf(html: str, path: str, conn):
+    """Child process: render ``html`` to ``path`` and send back None or the error text."""
+    try:
+        from weasyprint import HTML
+        HTML(string=html).write_pdf(path)
+        conn.send(None)
+    except Exception as exc:
+        conn.send(f"{type(exc).__name__}: {exc}")
+    finally:
+        conn.close()
+
+def _cache_dir() -> Path:
+    d = Path(settings.REPORT_CACHE_DIR); d.mkdir(parents=True, exist_ok=True)
+    return d
+
+def _prune(keep: int):
+    files = sorted(_cache_dir().glob("*.pdf"), key=lambda p: p.stat().st_mtime, reverse=True)
+    for old in files[keep:]:
+        old.unlink(missing_ok=True)
+
+def write_pdf(html: str, path: str, is_cancelled=lambda: False) -> bool | None:
+    """Write ``html`` as a PDF to ``path``; True if it came from the cache, None if cancelled.
+
+    Blocks until the PDF is written, so call it off the GUI thread.
+    Raises RuntimeError with WeasyPrint's message if rendering fails.
+    """
+    cached = _cache_dir() / f"{hashlib.sha256(html.encode('utf-8')).hexdigest()}.pdf"
+    if cached.exists():
+        shutil.copyfile(cached, path); os.utime(cached)
+        return True
+    tmp = cached.with_suffix(f".{os.getpid()}.tmp")
+    ctx = multiprocessing.get_context("spawn")  # spawn, not fork: the GUI process has Qt and database threads running
+    recv, send = ctx.Pipe(duplex=False)
+    proc = ctx.Process(target=_write_pdf, args=(html, str(tmp), send), daemon=True)
+    proc.start(); send.close()
+    try:
+        while not recv.poll(0.2):
+            if is_cancelled():
+                proc.terminate(); return None
+            if not proc.is_alive() and not recv.poll():
+                raise RuntimeError(f"PDF renderer exited with code {proc.exitcode}")
+        error = recv.recv()
+        if error:
+            raise RuntimeError(error)
+        os.replace(tmp, cached)
+    finally:
+        proc.join(5); recv.close()
+        tmp.unlink(missing_ok=True)
+    shutil.copyfile(cached, path)
+    _prune(settings.REPORT_CACHE_SIZE)
+    return False
+
+def main(argv=None):
+    import argparse
+    import time
+    from datetime import timedelta
+    from pos_app.data.db import get_engine, get_session_maker
+    from pos_app.reports import queries
+    ap = argparse.ArgumentParser(description="Write the sales summary PDF for a date range, with timings.")
+    ap.add_argument("--start", type=date.fromisoformat, default=date.today() - timedelta(days=30))
+    ap.add_argument("--end", type=date.fromisoformat, default=date.today())
+    ap.add_argument("--out", default="sales_summary.pdf")
+    args = ap.parse_args(argv)
+    with get_session_maker(get_engine())() as s:
+        t = time.perf_counter(); rows, totals = queries.summary_rows(s, args.start, args.end); took = time.perf_counter() - t
+    print(f"{len(rows)} days queried in {took * 1000:.0f} ms")
+    for attempt in ("first", "again"):
+        t = time.perf_counter(); html = render_html(rows, totals, args.start.isoformat(), args.end.isoformat()); rendered = time.perf_counter() - t
+        t = time.perf_counter(); hit = write_pdf(html, args.out); took = time.perf_counter() - t
+        print(f"{attempt}: HTML {rendered * 1000:.1f} ms, PDF {took * 1000:.0f} ms ({'cached' if hit else 'rendered'}) -> {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Report queries over the daily rollups (see services/rollups.py).
+
+Each function takes its own session so it can run on a worker thread; each
+touches roughly one row per day in the range instead of every sale.
+``sale_lines_stmt`` is the exception: the line-level export of a range.
+"""
+from datetime import date, datetime, timedelta
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from pos_app.data.models import Category, Product, Sale, SaleLine, TaxRate, User, SalesDailySummary, SalesDailyCategory, SalesDailyCashier, SalesDailyPayment
+
+def summary_stmt(start: date, end: date):
+    return (select(
+            SalesDailySummary.day,
+            func.coalesce(func.sum(SalesDailySummary.sale_count),0),
+            func.coalesce(func.sum(SalesDailySummary.subtotal),0.0),
+            func.coalesce(func.sum(SalesDailySummary.tax_total),0.0),
+            func.coalesce(func.sum(SalesDailySummary.grand_total),0.0)
+        )
+        .where(SalesDailySummary.day >= start, SalesDailySummary.day <= end)
+        .group_by(SalesDailySummary.day)
+        .order_by(SalesDailySummary.day)
+    )
+
+def summary_row(r) -> dict:
+    d, c, s, t, g = r
+    return {"date": d.strftime("%Y-%m-%d") if isinstance(d, (date, datetime)) else str(d),
+            "count": int(c), "subtotal": float(s), "tax": float(t), "total": float(g)}
+
+def summary_rows(session: Session, start: date, end: date):
+    rows = [summary_row(r) for r in session.execute(summary_stmt(start, end))]
+    totals = {"count": sum(r["count"] for r in rows),
+              "subtotal": sum(r["subtotal"] for r in rows),
+              "tax": sum(r["tax"] for r in rows),
+              "total": sum(r["total"] for r in rows)}
+    return rows, totals
+
+def category_rows(session: Session, start: date, end: date):
+    q = (session.query(Category.name, func.coalesce(func.sum(SalesDailyCategory.total),0.0))
+         .select_from(SalesDailyCategory)
+         .join(Category, Category.id==SalesDailyCategory.category_id, isouter=True)
+         .filter(SalesDailyCategory.day >= start, SalesDailyCategory.day <= end)
+         .group_by(Category.name)
+         .order_by(Category.name))
+    return [(name or "Uncategorized", float(total)) for name, total in q]
+
+def cashier_rows(session: Session, start: date, end: date):
+    q = (session.query(User.username, func.coalesce(func.sum(SalesDailyCashier.total),0.0))
+         .select_from(SalesDailyCashier)
+         .join(User, User.id==SalesDailyCashier.cashier_id, isouter=True)
+         .filter(SalesDailyCashier.day >= start, SalesDailyCashier.day <= end)
+         .group_by(User.username)
+         .order_by(User.username))
+    return [(name or "Unassigned", float(total)) for name, total in q]
+
+def payment_rows(session: Session, start: date, end: date):
+    q = (session.query(SalesDailyPayment.method, func.coalesce(func.sum(SalesDailyPayment.total),0.0))
+         .filter(SalesDailyPayment.day >= start, SalesDailyPayment.day <= end)
+         .group_by(SalesDailyPayment.method)
+         .order_by(SalesDailyPayment.method))
+    return [(m or "Unknown", float(total)) for m, total in q]
+
+def sale_lines_stmt(start: date, end: date):
+    return (select(Sale.id, Sale.datetime, Sale.register_id, User.username, Product.sku, Product.name,
+                   SaleLine.qty, SaleLine.unit_price, SaleLine.discount, TaxRate.rate, SaleLine.line_total)
+            .join(Sale, Sale.id == SaleLine.sale_id)
+            .join(Product, Product.id == SaleLine.product_id)
+            .join(User, User.id == Sale.cashier_id, isouter=True)
+            .join(TaxRate, TaxRate.id == SaleLine.tax_rate_id, isouter=True)
+            .where(Sale.status == "completed", Sale.datetime >= start, Sale.datetime < (end + timedelta(days=1)))
+            .order_by(Sale.id, SaleLine.id))
@@ -0,0 +1,161 @@
+import json
+import os
+import uuid
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+
+class CartTotals:
+    """Running totals for an open sale, kept per tax rate.
+
+    Each line's contribution is stored under a caller-chosen key so it can be
+    added, replaced or removed in O(1); the totals themselves only walk the
+    handful of distinct tax rates in the basket.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self._lines: dict = {}
+        self._by_rate: dict[float, list[float]] = {}
+        self.subtotal = 0.0
+        self.discount = 0.0
+
+    def __len__(self):
+        return len(self._lines)
+
+    def add(self, key, qty: float, unit_price: float, discount: float = 0.0, rate: float = 0.0):
+        if key in self._lines:
+            self.remove(key)
+        gross = float(qty) * float(unit_price)
+        discount = float(discount or 0.0)
+        rate = float(rate or 0.0)
+        self._lines[key] = (rate, gross, discount)
+        bucket = self._by_rate.setdefault(rate, [0.0, 0.0, 0])
+        bucket[0] += gross; bucket[1] += discount; bucket[2] += 1
+        self.subtotal += gross
+        self.discount += discount
+
+    def remove(self, key):
+        rate, gross, discount = self._lines.pop(key)
+        bucket = self._by_rate[rate]
+        bucket[0] -= gross; bucket[1] -= discount; bucket[2] -= 1
+        if bucket[2] == 0:
+            del self._by_rate[rate]
+        if not self._lines:
+            # avoid carrying float residue into the next basket
+            self.subtotal = 0.0; self.discount = 0.0
+        else:
+            self.subtotal -= gross; self.discount -= discount
+
+    @property
+    def tax_total(self) -> float:
+        return sum((sub - disc) * rate for rate, (sub, disc, _) in self._by_rate.items())
+
+    def grand_total(self, sale_discount: float = 0.0) -> float:
+        return self.subtotal + self.tax_total - float(sale_discount or 0.0)
+
+    def matches(self, lines) -> bool:
+        """Cheap cross-check of the accumulator against the persisted lines."""
+        lines = list(lines)
+        if len(lines) != len(self._lines):
+            return False
+        subtotal = sum(float(l.qty) * float(l.unit_price) for l in lines)
+        discount = sum(float(l.discount or 0.0) for l in lines)
+        return abs(subtotal - self.subtotal) < 0.005 and abs(discount - self.discount) < 0.005
+
+    @classmethod
+    def from_lines(cls, lines, rates: dict[int, float]):
+        totals = cls()
+        for l in lines:
+            totals.add(l, l.qty, l.unit_price, l.discount, rates.get(l.tax_rate_id, 0.0))
+        return totals
+
+
+@dataclass(slots=True)
+class CartLine:
+    product_id: int
+    name: str
+    qty: float
+    unit_price: float
+    tax_rate_id: int | None
+    tax_rate: float
+    discount: float = 0.0
+
+    @property
+    def line_total(self) -> float:
+        return self.qty * self.unit_price
+
+
+class Cart:
+    """The open sale, held in memory until checkout.
+
+    Plain values only (no ORM objects), so scanning touches no database and
+    the whole cart can be written to a recovery snapshot. Each product has a
+    single line; CompleteSaleService.finalize turns the cart into a Sale in
+    one transaction.
+    """
+
+    def __init__(self, cashier_id: int | None = None, register_id: int | None = None, customer_id: int | None = None,
+                 discount_total: float = 0.0, client_uuid: str | None = None, started_at: datetime | None = None):
+        self.cashier_id = cashier_id
+        self.register_id = register_id
+        self.customer_id = customer_id
+        self.discount_total = float(discount_total or 0.0)
+        # fixed for the cart's lifetime: retrying a finalize that may have committed can't record the sale twice
+        self.client_uuid = client_uuid or str(uuid.uuid4())
+        self.started_at = started_at or datetime.utcnow()
+        self.lines: dict[int, CartLine] = {}
+        self.totals = CartTotals()
+
+    def add(self, product, qty: float = 1) -> CartLine:
+        """Add ``qty`` of a CachedProduct; repeat scans raise the quantity of the product's line."""
+        line = self.lines.get(product.product_id)
+        if line is None:
+            line = self.lines[product.product_id] = CartLine(product.product_id, product.name, float(qty), float(product.price),
+                                                             product.tax_rate_id, float(product.tax_rate))
+        else:
+            line.qty += float(qty)
+        self.totals.add(line.product_id, line.qty, line.unit_price, line.discount, line.tax_rate)
+        return line
+
+    def grand_total(self) -> float:
+        return self.totals.grand_total(self.discount_total)
+
+    def to_dict(self) -> dict:
+        return {"cashier_id": self.cashier_id, "register_id": self.register_id, "customer_id": self.customer_id,
+                "discount_total": self.discount_total, "client_uuid": self.client_uuid,
+                "started_at": self.started_at.isoformat(), "lines": [asdict(l) for l in self.lines.values()]}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Cart":
+        cart = cls(data.get("cashier_id"), data.get("register_id"), data.get("customer_id"), data.get("discount_total", 0.0),
+                   data.get("client_uuid"), datetime.fromisoformat(data["started_at"]) if data.get("started_at") else None)
+        for raw in data.get("lines", []):
+            line = cart.lines[raw["product_id"]] = CartLine(**raw)
+            cart.totals.add(line.product_id, line.qty, line.unit_price, line.discount, line.tax_rate)
+        return cart
+
+
+def save_snapshot(cart: Cart, path):
+    """Write the cart to ``path`` for crash recovery (write to a temp file, then rename over the old snapshot)."""
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(cart.to_dict()), encoding="utf-8")
+    os.replace(tmp, path)
+
+def load_snapshot(path) -> Cart | None:
+    """The cart saved at ``path``, or None if there is none; raises ValueError if it cannot be read."""
+    try:
+        return Cart.from_dict(json.loads(Path(path).read_text(encoding="utf-8")))
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, KeyError, TypeError) as exc:
+        raise ValueError(f"The saved cart in {path} could not be read: {exc}") from exc
+
+def discard_snapshot(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,76 @@
+"""Streaming CSV exports.
+
+Rows are fetched as plain column tuples in batches (``yield_per`` with
+``stream_results``, i.e. a server-side cursor on psycopg) and written through
+a large write buffer, so memory use does not grow with the result size. A
+path ending in ``.gz`` is written gzip-compressed.
+"""
+import csv
+import gzip
+import io
+from pathlib import Path
+from sqlalchemy import or_, select
+from pos_app.data.models import Product
+from pos_app.data.profiler import action
+
+WRITE_BUFFER = 1 << 20
+
+def open_export(path):
+    path = str(path)
+    if path.endswith(".gz"):
+        raw = gzip.open(path, "wb", compresslevel=6)
+        return io.TextIOWrapper(io.BufferedWriter(raw, WRITE_BUFFER), encoding="utf-8", newline="")
+    return open(path, "w", encoding="utf-8", newline="", buffering=WRITE_BUFFER)
+
+@action("export.csv")
+def stream_csv(session_maker, stmt, path, header, row_fn=None, batch_size: int = 5000,
+               progress=None, is_cancelled=None, footer_fn=None) -> int:
+    """Write ``stmt``'s rows to ``path``; returns the row count.
+
+    ``row_fn`` maps a result row to the CSV row. ``footer_fn()`` may return
+    extra rows written after the data (e.g. running totals). A cancelled
+    export removes the partial file and returns -1.
+    """
+    written = 0
+    cancelled = False
+    with session_maker() as s, open_export(path) as f:
+        w = csv.writer(f)
+        w.writerow(header)
+        result = s.execute(stmt.execution_options(yield_per=batch_size, stream_results=True))
+        for part in result.partitions():
+            w.writerows(part if row_fn is None else map(row_fn, part))
+            written += len(part)
+            if progress is not None:
+                progress(written, 0)
+            if is_cancelled is not None and is_cancelled():
+                cancelled = True
+                break
+        result.close()
+        if not cancelled and footer_fn is not None:
+            w.writerows(footer_fn())
+    if cancelled:
+        Path(path).unlink(missing_ok=True)
+        return -1
+    return written
+
+PRODUCT_HEADER = ["id","sku","barcode","name","price","active","category_id","tax_id"]
+
+def products_stmt(term: str = ""):
+    stmt = select(Product.id, Product.sku, Product.barcode, Product.name, Product.price,
+                  Product.active, Product.category_id, Product.tax_id)
+    term = (term or "").strip()
+    if term:
+        like = f"%{term}%"
+        stmt = stmt.where(or_(Product.sku.ilike(like), Product.name.ilike(like), Product.barcode.ilike(like)))
+    return stmt.order_by(Product.id.desc())
+
+def product_row(r):
+    pid, sku, barcode, name, price, active, cat, tax = r
+    return [pid, sku, barcode or "", name, price or 0, 1 if active else 0, cat or "", tax or ""]
+
+SALE_LINE_HEADER = ["sale_id","datetime","register_id","cashier","sku","name","qty","unit_price","discount","tax_rate","line_total"]
+
+def sale_line_row(r):
+    sale_id, when, register, cashier, sku, name, qty, price, disc, rate, total = r
+    return [sale_id, when.isoformat(sep=" ", timespec="seconds") if when else "", register or "", cashier or "",
+            sku, name, qty, f"{price:.2f}", f"{(disc or 0):.2f}", rate if rate is not None else "", f"{(total or 0):.2f}"]
@@ -0,0 +1,99 @@
+"""Local sales journal for offline-first checkout (``OFFLINE_JOURNAL=true``).
+
+A completed sale is committed as one JSON entry to a SQLite file on the till
+(``JOURNAL_PATH``) instead of the central database, so checkout costs a local
+disk write. ``SalesReplicator`` (services/replicator.py) pushes the entries
+to the central database in order and advances the high-water mark; each
+entry carries the sale's ``client_uuid`` so a re-sent entry is skipped.
+"""
+import json
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+
+_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS entries (
+         seq INTEGER PRIMARY KEY AUTOINCREMENT,
+         client_uuid TEXT NOT NULL UNIQUE,
+         created_at TEXT NOT NULL,
+         payload TEXT NOT NULL,
+         error TEXT)""",
+    "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)",
+]
+
+def sale_payload(sale, inventory: dict[int, float]) -> dict:
+    """Everything the central database needs to record ``sale``, as JSON-safe values."""
+    return {
+        "client_uuid": sale.client_uuid,
+        "datetime": sale.datetime.isoformat(),
+        "cashier_id": sale.cashier_id, "register_id": sale.register_id, "customer_id": sale.customer_id,
+        "subtotal": sale.subtotal, "tax_total": sale.tax_total, "discount_total": sale.discount_total or 0.0,
+        "grand_total": sale.grand_total, "status": sale.status, "payment_status": sale.payment_status,
+        "lines": [{"product_id": l.product_id, "qty": float(l.qty), "unit_price": float(l.unit_price),
+                   "discount": float(l.discount or 0.0), "tax_rate_id": l.tax_rate_id, "line_total": float(l.line_total)}
+                  for l in sale.lines],
+        "payments": [{"method": p.method, "amount": float(p.amount), "external_ref": p.external_ref,
+                      "status": p.status or "captured"} for p in sale.payments],
+        "inventory": {str(pid): qty for pid, qty in inventory.items()},
+    }
+
+class SalesJournal:
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        # FULL: an entry that was acknowledged at checkout must survive a power cut
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = FULL")
+        for ddl in _SCHEMA:
+            self._conn.execute(ddl)
+
+    def append(self, payload: dict) -> int:
+        with self._lock:
+            cur = self._conn.execute("INSERT INTO entries (client_uuid, created_at, payload) VALUES (?, ?, ?)",
+                                     (payload["client_uuid"], datetime.utcnow().isoformat(), json.dumps(payload)))
+            return cur.lastrowid
+
+    def high_water_mark(self) -> int:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'replicated_seq'").fetchone()
+        return int(row[0]) if row else 0
+
+    def set_high_water_mark(self, seq: int):
+        with self._lock:
+            self._conn.execute("INSERT INTO meta (key, value) VALUES ('replicated_seq', ?) "
+                               "ON CONFLICT (key) DO UPDATE SET value = excluded.value", (str(int(seq)),))
+
+    def pending(self, limit: int = 100) -> list[tuple[int, dict]]:
+        """Entries after the high-water mark, oldest first."""
+        hwm = self.high_water_mark()
+        with self._lock:
+            rows = self._conn.execute("SELECT seq, payload FROM entries WHERE seq > ? ORDER BY seq LIMIT ?",
+                                      (hwm, int(limit))).fetchall()
+        return [(seq, json.loads(payload)) for seq, payload in rows]
+
+    def mark_failed(self, seq: int, error: str):
+        """Record why an entry was rejected by the central database; it is kept and not pruned."""
+        with self._lock:
+            self._conn.execute("UPDATE entries SET error = ? WHERE seq = ?", (error, seq))
+
+    def counts(self) -> dict:
+        hwm = self.high_water_mark()
+        with self._lock:
+            pending = self._conn.execute("SELECT count(*) FROM entries WHERE seq > ?", (hwm,)).fetchone()[0]
+            failed = self._conn.execute("SELECT count(*) FROM entries WHERE error IS NOT NULL").fetchone()[0]
+        return {"pending": pending, "failed": failed, "replicated_seq": hwm}
+
+    def prune(self, keep_days: float = 7.0) -> int:
+        """Drop replicated, error-free entries older than ``keep_days``."""
+        cutoff = (datetime.utcnow() - timedelta(days=keep_days)).isoformat()
+        hwm = self.high_water_mark()
+        with self._lock:
+            cur = self._conn.execute("DELETE FROM entries WHERE seq <= ? AND error IS NULL AND created_at < ?", (hwm, cutoff))
+            return cur.rowcount
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,91 @@
+import threading
+from dataclasses import dataclass
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from pos_app.data.models import Product, TaxRate
+
+
+@dataclass(frozen=True, slots=True)
+class CachedProduct:
+    product_id: int
+    name: str
+    price: float
+    tax_rate_id: int | None
+    tax_rate: float
+
+
+class BarcodeCache:
+    """Process-wide barcode -> product lookup used on the scan path.
+
+    Only active products are cached. Misses fall through to the database and
+    are cached on the way out; unknown barcodes are not cached so a product
+    added elsewhere becomes scannable without an invalidation. Rows read
+    from the database are only stored if no ``invalidate`` ran while they
+    were being read, so an edit during the warm-up is never undone.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: dict[str, CachedProduct] = {}
+        self._generation = 0  # bumped by invalidate()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _select():
+        return (
+            select(Product.barcode, Product.id, Product.name, Product.price, Product.tax_id, TaxRate.rate)
+            .join(TaxRate, TaxRate.id == Product.tax_id, isouter=True)
+            .where(Product.active.is_(True), Product.barcode.is_not(None))
+        )
+
+    @staticmethod
+    def _entry(row) -> CachedProduct:
+        barcode, pid, name, price, tax_id, rate = row
+        return CachedProduct(pid, name or "", float(price or 0), tax_id, float(rate or 0))
+
+    def warm(self, db: Session) -> int:
+        """Load every active product; returns the number cached (0 if an invalidation raced the load)."""
+        with self._lock:
+            generation = self._generation
+        entries = {row[0]: self._entry(row) for row in db.execute(self._select())}
+        with self._lock:
+            if generation != self._generation:
+                return 0  # some of these rows may be stale: leave it to the miss path
+            self._entries = entries
+        return len(entries)
+
+    def get(self, db: Session, barcode: str) -> CachedProduct | None:
+        with self._lock:
+            entry = self._entries.get(barcode)
+            if entry is not None:
+                self.hits += 1
+                return entry
+            self.misses += 1
+            generation = self._generation
+        row = db.execute(self._select().where(Product.barcode == barcode)).first()
+        if row is None:
+            return None
+        entry = self._entry(row)
+        with self._lock:
+            if generation == self._generation:
+                self._entries[barcode] = entry
+        return entry
+
+    def invalidate(self, *barcodes: str | None):
+        """Drop the given barcodes, or everything when called without arguments."""
+        with self._lock:
+            self._generation += 1
+            if not barcodes:
+                self._entries.clear()
+                return
+            for code in barcodes:
+                if code:
+                    self._entries.pop(code, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+barcode_cache = BarcodeCache()
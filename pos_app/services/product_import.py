@@ -0,0 +1,194 @@
+"""Chunked, resumable product CSV import.
+
+Rows are validated against a prefetched SKU/barcode map and written with
+one upsert (``INSERT ... ON CONFLICT (sku) DO UPDATE``) per chunk, each chunk
+in its own transaction. Progress is checkpointed next to the CSV so an
+interrupted import can resume after the last committed chunk; rows that
+cannot be imported are written to a reject file with the reason.
+"""
+import csv
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import SQLAlchemyError
+from pos_app.data.models import Product
+from pos_app.data.profiler import action
+
+FIELDS = ("sku", "barcode", "name", "price", "category_id", "tax_id", "active")
+
+@dataclass
+class ImportResult:
+    rows_read: int = 0
+    inserted: int = 0
+    updated: int = 0
+    rejected: int = 0
+    reject_path: str | None = None
+    completed: bool = False
+
+def checkpoint_path(path) -> Path:
+    return Path(f"{path}.import-state")
+
+def read_checkpoint(path) -> int:
+    """Number of data rows already committed by an interrupted import of ``path``."""
+    try:
+        return int(checkpoint_path(path).read_text(encoding="utf-8").strip() or 0)
+    except (OSError, ValueError):
+        return 0
+
+def _optional_int(raw):
+    try:
+        return int(raw) if raw else None
+    except (TypeError, ValueError):
+        return None
+
+def parse_row(row: dict) -> dict:
+    sku = (row.get("sku") or "").strip()
+    name = (row.get("name") or "").strip()
+    if not sku or not name:
+        raise ValueError("sku and name are required")
+    try:
+        price = float(row.get("price") or 0)
+    except (TypeError, ValueError):
+        raise ValueError(f"invalid price {row.get('price')!r}")
+    return {
+        "sku": sku,
+        "barcode": (row.get("barcode") or "").strip() or None,
+        "name": name,
+        "price": price,
+        "category_id": _optional_int(row.get("category_id")),
+        "tax_id": _optional_int(row.get("tax_id")),
+        "active": str(row.get("active") or "1").strip() in {"1", "true", "True", "yes"},
+    }
+
+def _upsert_stmt(dialect: str):
+    table = Product.__table__
+    if dialect not in ("sqlite", "postgresql"):
+        return None
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    stmt = dialect_insert(table)
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c.sku],
+        set_={**{c: stmt.excluded[c] for c in FIELDS if c != "sku"}, "updated_at": stmt.excluded.updated_at},
+    )
+
+def _write_rows(session, rows: list[dict]):
+    now = datetime.utcnow()
+    for r in rows:
+        r.setdefault("created_at", now)
+        r["updated_at"] = now
+    stmt = _upsert_stmt(session.get_bind().dialect.name)
+    if stmt is not None:
+        session.execute(stmt, rows)
+        return
+    table = Product.__table__
+    for r in rows:
+        values = {k: v for k, v in r.items() if k not in ("sku", "created_at")}
+        if session.execute(update(table).where(table.c.sku == r["sku"]).values(values)).rowcount == 0:
+            session.execute(insert(table).values(r))
+
+@action("products.import")
+def import_products_csv(session_maker, path, chunk_size: int = 1000, start_row: int = 0,
+                        progress=None, is_cancelled=None) -> ImportResult:
+    """Import ``path``, skipping the first ``start_row`` data rows (see read_checkpoint).
+
+    ``progress(done, total)`` is called after each chunk; ``is_cancelled()``
+    is polled between chunks and stops the import after the last commit.
+    """
+    path = Path(path)
+    result = ImportResult()
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        # records, not lines: quoted fields may span lines; blank rows are skipped like DictReader does
+        total = max(0, sum(1 for row in csv.reader(f) if row) - 1)
+    with session_maker() as s:
+        barcode_owner = dict(s.execute(select(Product.barcode, Product.sku).where(Product.barcode.is_not(None))).all())
+        sku_barcode = {sku: code for code, sku in barcode_owner.items()}
+        existing = set(barcode_owner.values())
+        existing.update(s.scalars(select(Product.sku).where(Product.barcode.is_(None))))
+
+    reject_path = path.with_name(f"{path.stem}.rejects.csv")
+    reject_file = None
+    reject_writer = None
+
+    def reject(line_no, row, reason):
+        nonlocal reject_file, reject_writer
+        if reject_writer is None:
+            reject_file = open(reject_path, "a" if start_row else "w", encoding="utf-8", newline="")
+            reject_writer = csv.writer(reject_file)
+            if not start_row:
+                reject_writer.writerow(["line", *FIELDS, "error"])
+        reject_writer.writerow([line_no, *[row.get(k) or "" for k in FIELDS], reason])
+        result.rejected += 1
+
+    def flush(chunk: dict[str, tuple[int, dict, dict]], rows_done: int):
+        if not chunk:
+            return
+        with session_maker() as s:
+            try:
+                _write_rows(s, [rec for _, _, rec in chunk.values()])
+                s.commit()
+                written = list(chunk.values())
+            except SQLAlchemyError:
+                # isolate the offending rows with a savepoint each
+                s.rollback()
+                written = []
+                for line_no, raw, rec in chunk.values():
+                    try:
+                        with s.begin_nested():
+                            _write_rows(s, [rec])
+                        written.append((line_no, raw, rec))
+                    except SQLAlchemyError as exc:
+                        reject(line_no, raw, str(getattr(exc, "orig", exc)).splitlines()[0])
+                s.commit()
+        for _, _, rec in written:
+            if rec["sku"] in existing:
+                result.updated += 1
+            else:
+                result.inserted += 1
+                existing.add(rec["sku"])
+            # a SKU that changed barcode frees the old one for a later row
+            old = sku_barcode.get(rec["sku"])
+            if old and old != rec["barcode"] and barcode_owner.get(old) == rec["sku"]:
+                del barcode_owner[old]
+            sku_barcode[rec["sku"]] = rec["barcode"]
+            if rec["barcode"]:
+                barcode_owner[rec["barcode"]] = rec["sku"]
+        checkpoint_path(path).write_text(str(rows_done), encoding="utf-8")
+        if progress is not None:
+            progress(rows_done, total)
+
+    try:
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            reader = csv.DictReader(f)
+            chunk: dict[str, tuple[int, dict, dict]] = {}
+            done = 0
+            for done, raw in enumerate(reader, start=1):
+                if done <= start_row:
+                    continue
+                line_no = reader.line_num
+                result.rows_read += 1
+                try:
+                    rec = parse_row(raw)
+                    owner = barcode_owner.get(rec["barcode"]) if rec["barcode"] else None
+                    if owner is not None and owner != rec["sku"]:
+                        raise ValueError(f"barcode {rec['barcode']} already belongs to {owner}")
+                except ValueError as exc:
+                    reject(line_no, raw, str(exc))
+                else:
+                    chunk.pop(rec["sku"], None)  # a later row for the same SKU wins
+                    chunk[rec["sku"]] = (line_no, raw, rec)
+                if len(chunk) >= chunk_size:
+                    flush(chunk, done); chunk = {}
+                    if is_cancelled is not None and is_cancelled():
+                        return result
+            flush(chunk, done)
+    finally:
+        if reject_file is not None:
+            reject_file.close()
+            result.reject_path = str(reject_path)
+    checkpoint_path(path).unlink(missing_ok=True)
+    result.completed = True
+    return result
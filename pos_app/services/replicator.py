@@ -0,0 +1,127 @@
+import threading
+from datetime import datetime
+from sqlalchemy import select
+from sqlalchemy.exc import DBAPIError, SQLAlchemyError
+from pos_app.data.models import Payment, Sale, SaleLine
+from pos_app.services import rollups
+from pos_app.services.sales import decrement_inventory
+
+REJECTED = (SQLAlchemyError, KeyError, TypeError, ValueError)
+
+def _is_connection_error(exc: Exception) -> bool:
+    """True for a lost connection or a failed connect; other OperationalErrors ("no such column",
+    a read-only database) are problems with the entries or the schema and are parked instead."""
+    return isinstance(exc, DBAPIError) and (exc.connection_invalidated or exc.statement is None)
+
+class SalesReplicator:
+    """Background thread that pushes SalesJournal entries to the central database.
+
+    Up to ``batch_size`` entries are written per transaction, in journal
+    order, together with their inventory deltas and rollup updates; the
+    journal's high-water mark moves only after the commit. Entries whose
+    ``client_uuid`` already exists centrally are skipped, so re-sending after
+    a crash between commit and mark is harmless. Connection failures are
+    retried with exponential backoff; an entry the database rejects on its
+    own is marked failed in the journal and skipped.
+    """
+
+    def __init__(self, journal, session_maker, batch_size: int = 50, max_backoff: float = 60.0, keep_days: float = 7.0):
+        self.journal = journal
+        self.session_maker = session_maker
+        self.batch_size = max(1, int(batch_size))
+        self.max_backoff = float(max_backoff)
+        self.keep_days = keep_days
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self.replicated = 0
+        self.last_error: str | None = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="sales-replicator", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set(); self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def wake(self):
+        """Replicate now instead of at the next poll (called after each journaled sale)."""
+        self._wake.set()
+
+    def status(self) -> dict:
+        st = self.journal.counts()
+        with self._lock:
+            st.update(replicated=self.replicated, last_error=self.last_error)
+        return st
+
+    def _run(self):
+        attempt = 0
+        while not self._stop.is_set():
+            try:
+                sent = self.replicate_once()
+            except Exception as exc:
+                attempt += 1
+                with self._lock:
+                    self.last_error = str(exc).splitlines()[0]
+                self._stop.wait(min(self.max_backoff, 0.5 * (2 ** min(attempt, 10))))
+                continue
+            attempt = 0
+            if sent:
+                continue  # drain the backlog before waiting again
+            self.journal.prune(self.keep_days)
+            self._wake.wait(2.0); self._wake.clear()
+
+    def replicate_once(self) -> int:
+        """Push one batch; returns the number of journal entries handled."""
+        batch = self.journal.pending(self.batch_size)
+        if not batch:
+            return 0
+        try:
+            self._write(batch)
+        except REJECTED as exc:
+            if _is_connection_error(exc):
+                raise
+            # the database (or a malformed entry) refused something in this batch: write the
+            # entries one by one and park the ones that fail on their own
+            for seq, payload in batch:
+                try:
+                    self._write([(seq, payload)])
+                except REJECTED as one:
+                    if _is_connection_error(one):
+                        raise
+                    self.journal.mark_failed(seq, str(getattr(one, "orig", one)).splitlines()[0])
+                    self.journal.set_high_water_mark(seq)
+        return len(batch)
+
+    def _write(self, batch: list[tuple[int, dict]]):
+        with self.session_maker() as s:
+            uuids = [p["client_uuid"] for _, p in batch]
+            done = set(s.scalars(select(Sale.client_uuid).where(Sale.client_uuid.in_(uuids))))
+            new = [p for _, p in batch if p["client_uuid"] not in done]
+            sales = []
+            for p in new:
+                sale = Sale(client_uuid=p["client_uuid"], datetime=datetime.fromisoformat(p["datetime"]),
+                            cashier_id=p["cashier_id"], register_id=p["register_id"], customer_id=p["customer_id"],
+                            subtotal=p["subtotal"], tax_total=p["tax_total"], discount_total=p["discount_total"],
+                            grand_total=p["grand_total"], status=p["status"], payment_status=p["payment_status"])
+                sale.lines.extend(SaleLine(**l) for l in p["lines"])
+                sale.payments.extend(Payment(**pay) for pay in p["payments"])
+                s.add(sale); sales.append(sale)
+            s.flush()
+            sold: dict[int, float] = {}
+            for sale, p in zip(sales, new):
+                for pid, qty in p["inventory"].items():
+                    sold[int(pid)] = sold.get(int(pid), 0.0) + qty
+                rollups.apply_sale(s, sale)
+            decrement_inventory(s, sold)
+            s.commit()
+        self.journal.set_high_water_mark(batch[-1][0])
+        with self._lock:
+            self.replicated += len(new)
+            self.last_error = None
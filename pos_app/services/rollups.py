@@ -0,0 +1,118 @@
+"""Daily sales rollups used by the Reports page.
+
+``apply_sale`` adds one completed sale to the rollups inside the caller's
+transaction; ``rebuild`` recomputes them from the sales tables for backfill:
+
+    python -m pos_app.services.rollups [--start YYYY-MM-DD] [--end YYYY-MM-DD]
+"""
+import argparse
+from datetime import date, datetime, timedelta
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.orm import Session
+from pos_app.data.models import (Product, Sale, SaleLine, Payment, SalesDailySummary, SalesDailyCategory,
+                                 SalesDailyCashier, SalesDailyPayment)
+
+ROLLUPS = (SalesDailySummary, SalesDailyCategory, SalesDailyCashier, SalesDailyPayment)
+
+def _upsert(db: Session, model, key_cols: tuple[str, ...], rows: list[dict]):
+    """Add each row's non-key values onto the existing rollup row (or insert it)."""
+    if not rows:
+        return
+    table = model.__table__
+    inc_cols = [c for c in rows[0] if c not in key_cols]
+    dialect = db.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        stmt = dialect_insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(key_cols),
+            set_={c: table.c[c] + stmt.excluded[c] for c in inc_cols},
+        )
+        db.execute(stmt, rows)
+        return
+    for row in rows:
+        where = [table.c[k] == row[k] for k in key_cols]
+        res = db.execute(update(table).where(*where).values({c: table.c[c] + row[c] for c in inc_cols}))
+        if res.rowcount == 0:
+            db.execute(insert(table).values(row))
+
+def apply_sale(db: Session, sale: Sale):
+    """Fold a completed sale into the daily rollups (no commit)."""
+    day = (sale.datetime or datetime.utcnow()).date()
+    _upsert(db, SalesDailySummary, ("day", "register_id"), [{
+        "day": day, "register_id": sale.register_id or 0, "sale_count": 1,
+        "subtotal": float(sale.subtotal or 0), "tax_total": float(sale.tax_total or 0),
+        "grand_total": float(sale.grand_total or 0),
+    }])
+    _upsert(db, SalesDailyCashier, ("day", "cashier_id"), [{
+        "day": day, "cashier_id": sale.cashier_id or 0, "sale_count": 1, "total": float(sale.grand_total or 0),
+    }])
+    by_method: dict[str, float] = {}
+    for p in sale.payments:
+        by_method[p.method] = by_method.get(p.method, 0.0) + float(p.amount or 0)
+    _upsert(db, SalesDailyPayment, ("day", "method"),
+            [{"day": day, "method": m, "total": t} for m, t in sorted(by_method.items())])
+    product_ids = {l.product_id for l in sale.lines}
+    category_of = dict(db.execute(select(Product.id, Product.category_id).where(Product.id.in_(product_ids))).all()) if product_ids else {}
+    by_category: dict[int, float] = {}
+    for l in sale.lines:
+        cid = category_of.get(l.product_id) or 0
+        by_category[cid] = by_category.get(cid, 0.0) + float(l.line_total or 0)
+    _upsert(db, SalesDailyCategory, ("day", "category_id"),
+            [{"day": day, "category_id": c, "total": t} for c, t in sorted(by_category.items())])
+
+def rebuild(db: Session, start: date | None = None, end: date | None = None):
+    """Recompute the rollups for [start, end] (all days when omitted) from completed sales."""
+    day = func.date(Sale.datetime)
+    sale_filter = [Sale.status == "completed"]
+    if start is not None:
+        sale_filter.append(Sale.datetime >= start)
+    if end is not None:
+        sale_filter.append(Sale.datetime < (end + timedelta(days=1)))
+    for model in ROLLUPS:
+        stmt = delete(model)
+        if start is not None:
+            stmt = stmt.where(model.day >= start)
+        if end is not None:
+            stmt = stmt.where(model.day <= end)
+        db.execute(stmt)
+    db.execute(insert(SalesDailySummary).from_select(
+        ["day", "register_id", "sale_count", "subtotal", "tax_total", "grand_total"],
+        select(day, func.coalesce(Sale.register_id, 0), func.count(Sale.id),
+               func.coalesce(func.sum(Sale.subtotal), 0.0), func.coalesce(func.sum(Sale.tax_total), 0.0),
+               func.coalesce(func.sum(Sale.grand_total), 0.0))
+        .where(*sale_filter).group_by(day, func.coalesce(Sale.register_id, 0))))
+    db.execute(insert(SalesDailyCashier).from_select(
+        ["day", "cashier_id", "sale_count", "total"],
+        select(day, func.coalesce(Sale.cashier_id, 0), func.count(Sale.id), func.coalesce(func.sum(Sale.grand_total), 0.0))
+        .where(*sale_filter).group_by(day, func.coalesce(Sale.cashier_id, 0))))
+    db.execute(insert(SalesDailyPayment).from_select(
+        ["day", "method", "total"],
+        select(day, Payment.method, func.coalesce(func.sum(Payment.amount), 0.0))
+        .join(Sale, Sale.id == Payment.sale_id)
+        .where(*sale_filter).group_by(day, Payment.method)))
+    db.execute(insert(SalesDailyCategory).from_select(
+        ["day", "category_id", "total"],
+        select(day, func.coalesce(Product.category_id, 0), func.coalesce(func.sum(SaleLine.line_total), 0.0))
+        .join(Sale, Sale.id == SaleLine.sale_id)
+        .join(Product, Product.id == SaleLine.product_id)
+        .where(*sale_filter).group_by(day, func.coalesce(Product.category_id, 0))))
+    db.commit()
+
+def main(argv=None):
+    from pos_app.data.db import Base, get_engine, get_session_maker
+    ap = argparse.ArgumentParser(description="Rebuild the daily sales rollup tables.")
+    ap.add_argument("--start", type=date.fromisoformat, help="first day to rebuild (default: all history)")
+    ap.add_argument("--end", type=date.fromisoformat, help="last day to rebuild (default: all history)")
+    args = ap.parse_args(argv)
+    engine = get_engine()
+    Base.metadata.create_all(engine, tables=[m.__table__ for m in ROLLUPS])
+    with get_session_maker(engine)() as s:
+        rebuild(s, args.start, args.end)
+    print("Rollups rebuilt.")
+
+if __name__ == "__main__":
+    main()
@@ -1,54 +1,118 @@
+import sqlite3
+from datetime import datetime
+from sqlalchemy import bindparam, func, select, update
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
-from pos_app.data.models import Product, Sale, SaleLine, Payment, Inventory
+from pos_app.data.models import Sale, SaleLine, Payment, Inventory
+from pos_app.data.profiler import action
+from pos_app.services.cart import Cart, CartLine, CartTotals
+from pos_app.services.product_cache import barcode_cache
+from pos_app.services import rollups
+from pos_app.services.journal import sale_payload
+
+MAX_SCAN_QTY = 9999  # larger multipliers are almost certainly a barcode typed into the quantity
+
+def parse_scan(text: str) -> tuple[float, str]:
+    """Split scanner/keyboard input into ``(qty, barcode)``; ``12*5012345678900`` is twelve of one item."""
+    text = text.strip()
+    qty_text, sep, code = text.partition("*")
+    if not sep:
+        return 1.0, text
+    code = code.strip()
+    try:
+        qty = float(qty_text)
+    except ValueError:
+        raise ValueError(f"Invalid quantity '{qty_text.strip()}'") from None
+    if not code:
+        raise ValueError("Scan or type the barcode after '*'")
+    if not 0 < qty <= MAX_SCAN_QTY:
+        raise ValueError(f"Quantity must be between 0 and {MAX_SCAN_QTY}")
+    return qty, code
+
+def quantities_by_product(lines) -> dict[int, float]:
+    qty_by_product: dict[int, float] = {}
+    for l in lines:
+        qty_by_product[l.product_id] = qty_by_product.get(l.product_id, 0.0) + float(l.qty)
+    return qty_by_product
+
+def decrement_inventory(db: Session, qty_by_product: dict[int, float]):
+    """Apply the sold quantities as one batched, atomic UPDATE (executemany).
+
+    Products are applied in id order so two registers updating the same rows
+    take their locks in the same order. As before, only the first inventory
+    row of a product is decremented.
+    """
+    if not qty_by_product:
+        return
+    inv = Inventory.__table__
+    first_row = select(func.min(inv.c.id)).where(inv.c.product_id == bindparam("pid")).scalar_subquery()
+    stmt = update(inv).where(inv.c.id == first_row).values(qty_on_hand=inv.c.qty_on_hand - bindparam("qty"))
+    db.execute(stmt, [{"pid": pid, "qty": qty} for pid, qty in sorted(qty_by_product.items())])
 
 class CompleteSaleService:
-    def __init__(self, db: Session):
+    """Checkout operations on ``db``.
+
+    The open sale is a ``Cart`` in memory; scanning only reads (and usually
+    only the barcode cache). ``finalize`` writes the sale, its lines and
+    payment, the inventory decrement and the rollups in one transaction, or
+    with a ``journal`` (offline-first mode) commits it to the local
+    SalesJournal only and the replicator writes it to ``db``'s database later.
+    """
+
+    def __init__(self, db: Session, journal=None):
         self.db = db
+        self.journal = journal
 
-    def add_item(self, sale: Sale, barcode: str, qty: float = 1) -> SaleLine:
-        product = (
-            self.db.query(Product)
-            .filter(Product.barcode == barcode, Product.active.is_(True))
-            .first()
-        )
+    @action("sale.add_item")
+    def add_item(self, cart: Cart, barcode: str, qty: float = 1) -> CartLine:
+        """Add ``qty`` of the product to ``cart``; a product already in the cart gets its line's quantity raised."""
+        try:
+            product = barcode_cache.get(self.db, barcode)
+        except SQLAlchemyError as exc:
+            if self.journal is None:
+                raise
+            # offline till: only products already in the barcode cache can be sold until the database is back
+            self.db.rollback()
+            raise ValueError(f"Offline: item {barcode} is not in this till's product cache.") from exc
         if not product:
             raise ValueError("Item not found")
         if qty <= 0:
             raise ValueError("Quantity must be greater than 0")
+        return cart.add(product, qty)
+
+    @staticmethod
+    def build_sale(cart: Cart, payment_amount: float, payment_method: str = "cash") -> Sale:
+        """The completed Sale (with lines and payment) for ``cart``, not yet added to a session."""
+        lines = [SaleLine(product_id=l.product_id, qty=l.qty, unit_price=l.unit_price, discount=l.discount,
+                          tax_rate_id=l.tax_rate_id, line_total=l.line_total) for l in cart.lines.values()]
+        totals = cart.totals
+        if not totals.matches(lines):
+            # the running totals drifted from the lines (e.g. a hand-edited snapshot): the lines win
+            totals = CartTotals.from_lines(lines, {l.tax_rate_id: l.tax_rate for l in cart.lines.values()})
+        grand_total = totals.grand_total(cart.discount_total)
+        sale = Sale(client_uuid=cart.client_uuid, datetime=datetime.utcnow(), cashier_id=cart.cashier_id,
+                    register_id=cart.register_id, customer_id=cart.customer_id, subtotal=totals.subtotal,
+                    tax_total=totals.tax_total, discount_total=cart.discount_total, grand_total=grand_total,
+                    status="completed", payment_status="paid" if abs(payment_amount - grand_total) < 0.01 else "partial")
+        sale.lines.extend(lines)
+        sale.payments.append(Payment(method=payment_method, amount=payment_amount, status="captured"))
+        return sale
 
-        unit_price = float(product.price)
-        line_total = float(qty) * unit_price
-        line = SaleLine(
-            sale=sale,
-            product=product,
-            qty=qty,
-            unit_price=unit_price,
-            line_total=line_total,
-            tax_rate=product.tax_rate,
-        )
-        self.db.add(line)
-        self.db.flush()
-        return line
-
-    def finalize(self, sale: Sale, payment_amount: float, payment_method: str = "cash"):
-        if not sale.lines:
+    @action("sale.finalize")
+    def finalize(self, cart: Cart, payment_amount: float, payment_method: str = "cash") -> Sale:
+        if not cart.lines:
             raise ValueError("Cannot finalize an empty sale")
-        subtotal = sum(l.qty * l.unit_price for l in sale.lines)
-        tax_total = 0.0
-        for l in sale.lines:
-            if l.tax_rate:
-                tax_total += (l.qty * l.unit_price - l.discount) * float(l.tax_rate.rate)
-        grand_total = subtotal + tax_total - sale.discount_total
-        sale.subtotal = subtotal; sale.tax_total = tax_total; sale.grand_total = grand_total
-        sale.status = "completed"
-        sale.payment_status = "paid" if abs(payment_amount - grand_total) < 0.01 else "partial"
-        self.db.add(Payment(sale=sale, method=payment_method, amount=payment_amount, status="captured"))
+        sale = self.build_sale(cart, payment_amount, payment_method)
+        if self.journal is not None:
+            try:
+                self.journal.append(sale_payload(sale, quantities_by_product(sale.lines)))
+            except sqlite3.Error as exc:
+                raise RuntimeError(f"Failed to record sale in the local journal: {exc}") from exc
+            return sale
         try:
-            for l in sale.lines:
-                inv = self.db.query(Inventory).filter(Inventory.product_id == l.product_id).first()
-                if inv:
-                    inv.qty_on_hand = float(inv.qty_on_hand) - float(l.qty)
+            self.db.add(sale)
+            decrement_inventory(self.db, quantities_by_product(sale.lines))
+            rollups.apply_sale(self.db, sale)
             self.db.commit()
         except SQLAlchemyError as exc:
             self.db.rollback()
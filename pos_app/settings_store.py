@@ -1,4 +1,16 @@
+"""Printer/register profiles in ``app_settings.json``.
+
+The merged settings are cached in memory and the file is parsed again only
+when its mtime or size changes. Code that keeps settings around (the
+printers) registers with ``subscribe(callback)``; callbacks get the new
+settings dict after ``save_settings`` or when ``refresh()`` (polled by the
+main window) notices the file was edited.
+"""
+import copy
 import json
+import os
+import threading
+import weakref
 from pathlib import Path
 import tempfile
 
@@ -27,13 +39,71 @@ def _deepmerge(base: dict, extra: dict) -> dict:
             out[k] = v
     return out
 
-def load_settings() -> dict:
+_lock = threading.RLock()
+_cache: dict | None = None
+_cache_key = None
+_subscribers: list = []
+
+def _file_key():
+    try:
+        st = os.stat(_SETTINGS_PATH)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+def _read() -> dict:
     try:
         data = json.loads(Path(_SETTINGS_PATH).read_text(encoding="utf-8"))
     except Exception:
         data = {}
     return _deepmerge(DEFAULTS, data)
 
+def _current() -> tuple[dict, bool]:
+    """The cached settings, re-read (and subscribers notified) if the file changed; also whether it did."""
+    global _cache, _cache_key
+    key = _file_key()
+    with _lock:
+        if _cache is not None and key == _cache_key:
+            return _cache, False
+        changed = _cache is not None
+        data = _cache = _read(); _cache_key = key
+    if changed:
+        _notify(data)
+    return data, changed
+
+def _notify(data: dict):
+    with _lock:
+        alive = [(ref, ref()) for ref in _subscribers]
+        _subscribers[:] = [ref for ref, cb in alive if cb is not None]
+    for _, cb in alive:
+        if cb is not None:
+            try:
+                cb(data)
+            except Exception as exc:
+                print("[settings] subscriber failed:", exc)
+
+def subscribe(callback):
+    """Call ``callback(settings)`` whenever the settings change.
+
+    Bound methods are held weakly, so a subscribed printer can still be
+    garbage collected.
+    """
+    ref = weakref.WeakMethod(callback) if hasattr(callback, "__self__") else (lambda: callback)
+    with _lock:
+        _subscribers.append(ref)
+
+def unsubscribe(callback):
+    with _lock:
+        _subscribers[:] = [ref for ref in _subscribers if ref() not in (None, callback)]
+
+def refresh() -> bool:
+    """Reload the file if it changed on disk and notify subscribers; returns whether it changed."""
+    return _current()[1]
+
+def load_settings() -> dict:
+    """A private copy of the merged settings, safe to edit and pass to ``save_settings``."""
+    return copy.deepcopy(_current()[0])
+
 def save_settings(data: dict):
     try:
         Path(_SETTINGS_PATH).parent.mkdir(parents=True, exist_ok=True)
@@ -51,9 +121,16 @@ def save_settings(data: dict):
         tmp_path.replace(_SETTINGS_PATH)
     except OSError as exc:
         raise RuntimeError(f"Unable to write settings file '{_SETTINGS_PATH}': {exc}") from exc
+    global _cache, _cache_key
+    merged = _deepmerge(DEFAULTS, copy.deepcopy(data))
+    with _lock:
+        _cache, _cache_key = merged, _file_key()
+    _notify(merged)
 
-def get_active_profile() -> dict:
-    data = load_settings()
+def get_active_profile(data: dict | None = None) -> dict:
+    """The active profile of ``data`` (default: the cached settings); shared, so treat it as read-only."""
+    if data is None:
+        data = _current()[0]
     name = data.get("active_profile", "Default")
     prof = data.get("profiles", {}).get(name, {})
     return prof
@@ -1,5 +1,6 @@
 from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QTableWidget, QTableWidgetItem, QPushButton, QLineEdit, QLabel, QMessageBox, QFileDialog
 from sqlalchemy.orm import Session
+from pos_app.data.db import release
 from pos_app.data.models import Customer
 from .customer_dialogs import CustomerFormDialog, CustomerDeleteDialog
 
@@ -28,6 +29,7 @@ class CustomersPage(QWidget):
             self.table.setItem(i, 3, QTableWidgetItem(c.phone or ""))
             self.table.setItem(i, 4, QTableWidgetItem(str(c.loyalty_points or 0)))
         self.table.resizeColumnsToContents()
+        release(self.session)
     def _selected_customer_id(self):
         r = self.table.currentRow();
         if r < 0: return None
@@ -1,7 +1,11 @@
-from PyQt6.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton, QMessageBox
+from PyQt6.QtCore import QThreadPool
+from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton, QMessageBox, QProgressBar,
+                             QComboBox)
 from sqlalchemy.orm import Session
+from pos_app.config import settings
 from pos_app.data.models import User
-from pos_app.auth import verify_password
+from pos_app.auth import check_login, pin_cache
+from .workers import Worker
 
 class LoginDialog(QDialog):
     def __init__(self, session: Session, parent=None):
@@ -11,17 +15,83 @@ class LoginDialog(QDialog):
         layout = QVBoxLayout(self)
         self.username = QLineEdit(); self.username.setPlaceholderText("Username")
         self.password = QLineEdit(); self.password.setEchoMode(QLineEdit.EchoMode.Password); self.password.setPlaceholderText("Password")
+        self.pin = QLineEdit(); self.pin.setEchoMode(QLineEdit.EchoMode.Password); self.pin.setPlaceholderText("Optional: digits for quick cashier switching")
         layout.addWidget(QLabel("Username")); layout.addWidget(self.username)
         layout.addWidget(QLabel("Password")); layout.addWidget(self.password)
-        row = QHBoxLayout(); ok = QPushButton("Sign in"); cancel = QPushButton("Cancel"); row.addWidget(ok); row.addWidget(cancel); layout.addLayout(row)
-        ok.clicked.connect(self.try_login); cancel.clicked.connect(self.reject)
+        layout.addWidget(QLabel("Quick-switch PIN")); layout.addWidget(self.pin)
+        self.busy = QProgressBar(); self.busy.setRange(0, 0); self.busy.setTextVisible(False); self.busy.hide(); layout.addWidget(self.busy)
+        row = QHBoxLayout(); self.ok = QPushButton("Sign in"); cancel = QPushButton("Cancel"); row.addWidget(self.ok); row.addWidget(cancel); layout.addLayout(row)
+        self.ok.clicked.connect(self.try_login); self.password.returnPressed.connect(self.try_login); cancel.clicked.connect(self.reject)
         self.user = None
+        self._worker = None
+    def _set_busy(self, busy: bool):
+        for w in (self.username, self.password, self.pin, self.ok):
+            w.setEnabled(not busy)
+        self.busy.setVisible(busy)
     def try_login(self):
+        if self._worker is not None:
+            return
+        pin = self.pin.text().strip()
+        if pin and (not pin.isdigit() or len(pin) < settings.PIN_MIN_LENGTH):
+            QMessageBox.warning(self, "PIN", f"The PIN must be at least {settings.PIN_MIN_LENGTH} digits."); return
         u = (
             self.session.query(User)
             .filter(User.username == self.username.text().strip(), User.active.is_(True))
             .first()
         )
-        if not u or not verify_password(self.password.text(), u.password_hash):
+        if not u:
             QMessageBox.warning(self, "Invalid", "Invalid username or password."); return
+        # bcrypt takes a few hundred ms at the default cost: keep the dialog responsive meanwhile
+        self._set_busy(True)
+        self._worker = Worker(lambda w, plain, stored: check_login(plain, stored), self.password.text(), u.password_hash)
+        self._worker.signals.finished.connect(lambda res: self._checked(u, pin, *res))
+        self._worker.signals.failed.connect(lambda msg: self._checked(u, pin, False, None))
+        QThreadPool.globalInstance().start(self._worker)
+    def _checked(self, u: User, pin: str, ok: bool, new_hash: str | None):
+        self._worker = None
+        self._set_busy(False)
+        if not ok:
+            QMessageBox.warning(self, "Invalid", "Invalid username or password."); self.password.setFocus(); return
+        if new_hash:
+            u.password_hash = new_hash  # upgrade to the configured cost (or away from plaintext)
+            try:
+                self.session.commit()
+            except Exception:
+                self.session.rollback()  # keep the old hash; the next login retries
+        if pin:
+            pin_cache.set_pin(u.id, u.username, pin)
         self.user = u; self.accept()
+    def reject(self):
+        if self._worker is not None:
+            self._worker.cancel(); self._worker = None
+        super().reject()
+
+class SwitchCashierDialog(QDialog):
+    """Switch to a cashier who set a PIN at their last password sign-in on this terminal."""
+    USE_PASSWORD = 2  # exec() result when the cashier asks for the password dialog instead
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Switch Cashier")
+        layout = QVBoxLayout(self)
+        self.cashier = QComboBox()
+        for uid, name in pin_cache.users():
+            self.cashier.addItem(name, uid)
+        self.pin = QLineEdit(); self.pin.setEchoMode(QLineEdit.EchoMode.Password); self.pin.setPlaceholderText("PIN")
+        layout.addWidget(QLabel("Cashier")); layout.addWidget(self.cashier)
+        layout.addWidget(QLabel("PIN")); layout.addWidget(self.pin)
+        row = QHBoxLayout(); ok = QPushButton("Switch"); self.use_password = QPushButton("Use Password"); cancel = QPushButton("Cancel")
+        row.addWidget(ok); row.addWidget(self.use_password); row.addWidget(cancel); layout.addLayout(row)
+        ok.clicked.connect(self.try_pin); self.pin.returnPressed.connect(self.try_pin); cancel.clicked.connect(self.reject)
+        self.use_password.clicked.connect(lambda: self.done(self.USE_PASSWORD))
+        self.user_id = None
+        self.pin.setFocus()
+    def try_pin(self):
+        uid = self.cashier.currentData()
+        if uid is None:
+            return
+        if pin_cache.check(uid, self.pin.text().strip()):
+            self.user_id = uid; self.accept(); return
+        self.pin.clear()
+        if uid not in dict(pin_cache.users()):
+            QMessageBox.warning(self, "PIN", "Too many wrong PINs. Sign in with the password."); self.done(self.USE_PASSWORD); return
+        QMessageBox.warning(self, "PIN", "Wrong PIN.")
@@ -1,8 +1,10 @@
 from PyQt6.QtWidgets import (
     QApplication,
+    QCompleter,
     QLabel,
     QLineEdit,
     QListWidget,
+    QListWidgetItem,
     QMainWindow,
     QMessageBox,
     QPushButton,
@@ -11,17 +13,28 @@ from PyQt6.QtWidgets import (
     QVBoxLayout,
     QWidget,
 )
-from PyQt6.QtGui import QAction
-from pos_app.data.db import get_engine, get_session_maker
-from pos_app.data.models import Sale
-from pos_app.services.sales import CompleteSaleService
-from .products import ProductsPage
-from .customers import CustomersPage
-from .reports import ReportsPage
+from PyQt6.QtCore import QStringListModel, QThreadPool, QTimer
+from PyQt6.QtGui import QAction, QKeySequence
+from pos_app.config import settings
+from pos_app.data.db import get_engine, get_session_maker, pool_status, release
+from pos_app.data.models import Product, User
+from pos_app.data.profiler import action, enabled as profiling_enabled
+from pos_app.data.search import ensure_search_index, search_product_ids
+from pos_app.auth import pin_cache
+from pos_app.services.sales import CompleteSaleService, parse_scan
+from pos_app.services.cart import Cart, discard_snapshot, load_snapshot, save_snapshot
+from pos_app.services.product_cache import barcode_cache
+from pos_app.settings_store import refresh as refresh_settings
 from .printer_settings import PrinterSettingsDialog
-from .login import LoginDialog
+from .workers import Worker
+from .login import LoginDialog, SwitchCashierDialog
 from .change_password import ChangePasswordDialog
+from .sql_profile_dialog import SqlProfileDialog
 from pos_app.integrations.printers.escpos import EscPosPrinter
+from pos_app.integrations.printers.spooler import PrintSpooler
+from pos_app.services.journal import SalesJournal
+from pos_app.services.replicator import SalesReplicator
+from pos_app.jobs.scheduler import start_jobs
 
 class SalesPage(QWidget):
     def __init__(self, session_maker, cashier_id: int | None = None):
@@ -29,57 +42,154 @@ class SalesPage(QWidget):
         self.session_maker = session_maker
         self.session = session_maker()
         self.cashier_id = cashier_id
-        self.sale = None
-        self.service = CompleteSaleService(self.session)
+        self.cart = None
+        self._rows: dict[int, QListWidgetItem] = {}  # product id -> its (single) row in the cart list
+        self.journal = self.replicator = None
+        if settings.OFFLINE_JOURNAL:
+            self.journal = SalesJournal(settings.JOURNAL_PATH)
+            self.replicator = SalesReplicator(self.journal, session_maker, settings.JOURNAL_BATCH_SIZE,
+                                              settings.JOURNAL_RETRY_MAX_SECONDS, settings.JOURNAL_KEEP_DAYS)
+            self.replicator.start()
+        self.service = CompleteSaleService(self.session, self.journal)
         self.printer = EscPosPrinter()
+        self.spooler = PrintSpooler(self.printer, settings.PRINT_SPOOL_DIR, settings.PRINT_QUEUE_SIZE, settings.PRINT_RETRY_MAX_SECONDS)
+        self.spooler.start()
         layout = QVBoxLayout(self)
         layout.addWidget(QLabel("Active Sale (scan barcodes):"))
         self.items = QListWidget(); layout.addWidget(self.items)
-        self.barcode_in = QLineEdit(); self.barcode_in.setPlaceholderText("Scan / type barcode and press Enter"); layout.addWidget(self.barcode_in)
+        self.barcode_in = QLineEdit(); self.barcode_in.setPlaceholderText("Scan / type barcode (or qty*barcode, e.g. 12*...) and press Enter"); layout.addWidget(self.barcode_in)
         self.total_lbl = QLabel("Total: 0.00"); layout.addWidget(self.total_lbl)
         self.btn_finalize = QPushButton("Finalize (Cash)"); layout.addWidget(self.btn_finalize)
+        self.printer_lbl = QLabel("Printer: idle"); layout.addWidget(self.printer_lbl)
+        self.sync_lbl = QLabel(""); layout.addWidget(self.sync_lbl); self.sync_lbl.setVisible(self.replicator is not None)
+        self._printer_timer = QTimer(self); self._printer_timer.timeout.connect(self._update_printer_status); self._printer_timer.start(1000)
         self.barcode_in.returnPressed.connect(self.add_barcode)
+        # typing a product name offers the best indexed matches; picking one scans its barcode
+        self._name_matches = QStringListModel(self)
+        self._completer = QCompleter(self._name_matches, self)
+        self._completer.setCompletionMode(QCompleter.CompletionMode.UnfilteredPopupCompletion)
+        self.barcode_in.setCompleter(self._completer)
+        self._completer.activated[str].connect(self._pick_name_match)
+        self._name_timer = QTimer(self); self._name_timer.setSingleShot(True); self._name_timer.setInterval(150)
+        self._name_timer.timeout.connect(self._lookup_names)
+        self.barcode_in.textEdited.connect(self._name_timer.start)
         self.btn_finalize.clicked.connect(self.finalize_sale)
 
-        self._start_new_sale()
+        if not self._recover_cart():
+            self._start_new_sale()
 
     def closeEvent(self, event):
         try:
+            self.spooler.stop()
+            self.stop_replicator()
             self.session.close()
         finally:
             super().closeEvent(event)
 
+    def _update_printer_status(self):
+        st = self.spooler.status()
+        if st["last_error"]:
+            text = f"Printer: {st['depth']} queued, retrying ({st['failures']} failures) - {st['last_error']}"
+        elif st["depth"]:
+            text = f"Printer: {st['depth']} queued"
+        else:
+            text = "Printer: idle"
+        self.printer_lbl.setText(text)
+        if self.replicator is not None:
+            st = self.replicator.status()
+            text = f"Sync: {st['pending']} sale(s) waiting" if st["pending"] else "Sync: up to date"
+            if st["last_error"]:
+                text += f" - central database unreachable, retrying ({st['last_error']})"
+            if st["failed"]:
+                text += f" - {st['failed']} rejected, see {settings.JOURNAL_PATH}"
+            self.sync_lbl.setText(text)
+
+    def stop_replicator(self):
+        if self.replicator is not None:
+            self.replicator.stop()
+            self.journal.close()
+            self.replicator = None
+
     def set_cashier(self, cashier_id: int | None):
+        """Hand the till to another cashier; an open cart stays and is finalized under the new cashier."""
         self.cashier_id = cashier_id
-        self._start_new_sale()
+        if not self.cart.lines:
+            self._start_new_sale(); return
+        self.cart.cashier_id = cashier_id
+        self._save_snapshot()
 
     def _start_new_sale(self):
-        self.items.clear()
+        # the cart lives in memory (plus a recovery snapshot) until finalize writes it in one transaction
+        self.items.clear(); self._rows.clear()
         self.total_lbl.setText("Total: 0.00")
-        self.sale = Sale(
-            discount_total=0.0,
-            cashier_id=self.cashier_id,
-            status="open",
-            payment_status="unpaid",
-        )
-        self.session.add(self.sale)
-        self.session.commit()
-        self.session.refresh(self.sale)
+        self.cart = Cart(cashier_id=self.cashier_id)
+        discard_snapshot(settings.CART_SNAPSHOT_PATH)
+        release(self.session)  # don't sit on a pooled connection until the first scan
+
+    def _recover_cart(self) -> bool:
+        """Offer to restore the cart snapshot left by a crash or power cut; returns whether it was restored."""
+        try:
+            cart = load_snapshot(settings.CART_SNAPSHOT_PATH)
+        except ValueError as exc:
+            QMessageBox.warning(self, "Recover sale", f"{exc}\n\nStarting a new sale."); return False
+        if cart is None or not cart.lines:
+            return False
+        answer = QMessageBox.question(self, "Recover sale",
+            f"A sale with {len(cart.lines)} line(s), total {cart.grand_total():.2f}, was still open when the app stopped.\n\nRestore it?")
+        if answer != QMessageBox.StandardButton.Yes:
+            return False
+        cart.cashier_id = self.cashier_id
+        self.cart = cart; self.items.clear(); self._rows.clear()
+        for line in cart.lines.values():
+            self._show_line(line)
+        self.recompute_total()
+        return True
+
+    def _save_snapshot(self):
+        try:
+            save_snapshot(self.cart, settings.CART_SNAPSHOT_PATH)
+        except OSError as exc:
+            print("[cart] could not write recovery snapshot:", exc)
+
+    def _show_line(self, line):
+        label = f"{line.qty:g} x {line.name} @ {line.unit_price:.2f}"
+        row = self._rows.get(line.product_id)
+        if row is None:
+            row = self._rows[line.product_id] = QListWidgetItem(label); self.items.addItem(row)
+        else:
+            row.setText(label)
+        self.items.setCurrentItem(row)
+
+    def _lookup_names(self):
+        term = self.barcode_in.text().strip()
+        if len(term) < 3 or term.isdigit() or "*" in term:
+            self._name_matches.setStringList([]); return
+        with self.session_maker() as s:
+            ids = search_product_ids(s, term, limit=10)
+            found = dict(((pid, (barcode, name)) for pid, barcode, name in s.query(Product.id, Product.barcode, Product.name)
+                          .filter(Product.id.in_(ids), Product.barcode.is_not(None), Product.active.is_(True)))) if ids else {}
+        self._name_matches.setStringList([f"{found[i][1]} [{found[i][0]}]" for i in ids if i in found])
+        if found:
+            self._completer.complete()
+
+    def _pick_name_match(self, text: str):
+        if text.endswith("]") and "[" in text:
+            self.barcode_in.setText(text.rsplit("[", 1)[1][:-1])
+            self.add_barcode()
 
     def recompute_total(self):
-        self.session.flush()
-        subtotal = sum(l.qty * l.unit_price for l in self.sale.lines)
-        tax_total = sum(((l.qty * l.unit_price) - l.discount) * float(l.tax_rate.rate) for l in self.sale.lines if l.tax_rate)
-        grand_total = subtotal + tax_total - self.sale.discount_total
+        grand_total = self.cart.grand_total()
         self.total_lbl.setText(f"Total: {grand_total:.2f}")
         return grand_total
     def add_barcode(self):
-        code = self.barcode_in.text().strip()
-        if not code: return
+        text = self.barcode_in.text().strip()
+        if not text: return
         try:
-            line = self.service.add_item(self.sale, code, qty=1)
-            name = line.product.name if getattr(line, "product", None) else code
-            self.items.addItem(f"{line.qty:.0f} x {name} @ {line.unit_price:.2f}")
+            qty, code = parse_scan(text)
+            line = self.service.add_item(self.cart, code, qty=qty)
+            release(self.session)  # a cache miss read the database
+            self._show_line(line)
+            self._save_snapshot()
             self.recompute_total()
         except Exception as e:
             QMessageBox.warning(self, "Error", str(e))
@@ -88,13 +198,22 @@ class SalesPage(QWidget):
     def finalize_sale(self):
         try:
             grand_total = self.recompute_total()
-            self.service.finalize(self.sale, payment_amount=grand_total, payment_method="cash")
-            try:
-                self.printer.print_receipt(self.sale, self.session)
-            except Exception as pe:
-                QMessageBox.warning(self, "Printer", f"Printed with stub or failed printer: {pe}")
-            QMessageBox.information(self, "Sale completed", "Receipt captured (demo).")
+            sale = self.service.finalize(self.cart, payment_amount=grand_total, payment_method="cash")
+        except Exception as e:
+            self.session.rollback()
+            QMessageBox.warning(self, "Error", str(e))
+            return
+        try:
+            with action("sales.receipt"):
+                self.spooler.submit(self.printer.format_receipt(sale, {pid: l.name for pid, l in self.cart.lines.items()}))
+        except Exception as pe:
+            QMessageBox.warning(self, "Printer", f"Could not queue receipt: {pe}")
+        if self.replicator is not None:
+            self.replicator.wake()
+        try:
             self._start_new_sale()
+            self._update_printer_status()
+            QMessageBox.information(self, "Sale completed", "Receipt queued for printing.")
         except Exception as e:
             self.session.rollback()
             QMessageBox.warning(self, "Error", str(e))
@@ -115,12 +234,17 @@ class MainWindow(QMainWindow):
             logged_in_user = dlg.user
             role_obj = getattr(logged_in_user, "role", None)
             logged_in_role = role_obj.name if role_obj else "Cashier"
+        # scans before the warm-up finishes fall back to a single-row lookup
+        self._warm_worker = Worker(self._warm_barcode_cache); QThreadPool.globalInstance().start(self._warm_worker)
+        ensure_search_index(engine)
+        self.jobs = start_jobs(engine)
+        # printers subscribe to settings changes; pick up hand edits of app_settings.json too
+        self._settings_timer = QTimer(self); self._settings_timer.timeout.connect(refresh_settings); self._settings_timer.start(2000)
         self.stack = QStackedWidget()
         self.sales_page = SalesPage(self.SessionLocal, cashier_id=getattr(logged_in_user, "id", None))
-        self.products_page = ProductsPage(self.SessionLocal)
-        self.customers_page = CustomersPage(self.SessionLocal)
-        self.reports_page = ReportsPage(self.SessionLocal)
-        self.stack.addWidget(self.sales_page); self.stack.addWidget(self.products_page); self.stack.addWidget(self.customers_page); self.stack.addWidget(self.reports_page)
+        # management pages are built (and run their first queries) when first opened
+        self.products_page = self.customers_page = self.reports_page = None
+        self.stack.addWidget(self.sales_page)
         self.setCentralWidget(self.stack)
         toolbar = QToolBar("Main"); self.addToolBar(toolbar)
         self.act_sales = QAction("Sales", self)
@@ -134,6 +258,9 @@ class MainWindow(QMainWindow):
         act_change_pwd = QAction("Change Password", self)
         account.addAction(act_change_pwd)
         act_change_pwd.triggered.connect(self._change_password)
+        act_switch = QAction("Switch Cashier", self); act_switch.setShortcut(QKeySequence("F2"))
+        account.addAction(act_switch)
+        act_switch.triggered.connect(self._switch_cashier)
         act_logout = QAction("Log Out", self)
         account.addAction(act_logout)
         act_logout.triggered.connect(self._logout)
@@ -145,17 +272,64 @@ class MainWindow(QMainWindow):
         act_prn_settings = QAction("Printer Settings", self)
         devices.addAction(act_prn_settings)
         act_prn_settings.triggered.connect(self._open_printer_settings)
+        # Diagnostics menu
+        diagnostics = self.menuBar().addMenu("D&iagnostics")
+        act_pool = QAction("Connection Pool", self)
+        diagnostics.addAction(act_pool)
+        act_pool.triggered.connect(self._show_pool_status)
+        act_sql = QAction("SQL Profile", self)
+        diagnostics.addAction(act_sql)
+        act_sql.triggered.connect(self._show_sql_profile)
+        act_cache = QAction("Barcode Cache", self)
+        diagnostics.addAction(act_cache)
+        act_cache.triggered.connect(self._show_barcode_cache)
 
         # RBAC: only Admin/Manager can access management pages
         self._set_logged_in_user(logged_in_user, logged_in_role)
         self.act_sales.triggered.connect(lambda: self.stack.setCurrentIndex(0))
-        self.act_products.triggered.connect(lambda: (self.products_page.refresh(), self.stack.setCurrentIndex(1)))
-        self.act_customers.triggered.connect(lambda: (self.customers_page.refresh(), self.stack.setCurrentIndex(2)))
-        self.act_reports.triggered.connect(lambda: (self.reports_page.refresh(), self.stack.setCurrentIndex(3)))
+        self.act_products.triggered.connect(lambda: self._show_page("products_page"))
+        self.act_customers.triggered.connect(lambda: self._show_page("customers_page"))
+        self.act_reports.triggered.connect(lambda: self._show_page("reports_page"))
 
         self._startup_ok = True
 
+    def _warm_barcode_cache(self, worker):
+        with self.SessionLocal() as s:
+            barcode_cache.warm(s)
+
+    def _build_page(self, attr):
+        if attr == "products_page":
+            from .products import ProductsPage
+            return ProductsPage(self.SessionLocal)
+        if attr == "customers_page":
+            from .customers import CustomersPage
+            return CustomersPage(self.SessionLocal)
+        from .reports import ReportsPage
+        return ReportsPage(self.SessionLocal)
+
+    def _show_page(self, attr):
+        page = getattr(self, attr)
+        if page is None:
+            page = self._build_page(attr)  # the constructor runs the first refresh
+            setattr(self, attr, page); self.stack.addWidget(page)
+        else:
+            page.refresh()
+        self.stack.setCurrentWidget(page)
+
     def closeEvent(self, event):
+        warm = getattr(self, "_warm_worker", None)
+        if warm is not None:
+            warm.cancel()
+        jobs = getattr(self, "jobs", None)
+        if jobs is not None:
+            jobs.shutdown(wait=False)
+        sales_page = getattr(self, "sales_page", None)
+        if sales_page is not None:
+            sales_page.spooler.stop()
+            sales_page.stop_replicator()
+        reports_page = getattr(self, "reports_page", None)
+        if reports_page is not None:
+            reports_page.shutdown()
         for page in (getattr(self, "sales_page", None), getattr(self, "products_page", None), getattr(self, "customers_page", None), getattr(self, "reports_page", None)):
             sess = getattr(page, "session", None)
             if sess is None:
@@ -166,6 +340,30 @@ class MainWindow(QMainWindow):
                 pass
         super().closeEvent(event)
 
+    def _show_pool_status(self):
+        st = pool_status(self.SessionLocal.kw["bind"])
+        if st is None:
+            QMessageBox.information(self, "Connection Pool", "This database uses a single unpooled connection."); return
+        QMessageBox.information(self, "Connection Pool",
+            f"Pool size: {st['size']} (+{st['overflow']} overflow)\n"
+            f"Checked out: {st['checked_out']}, idle: {st['idle']}\n"
+            f"Checkouts: {st['checkouts']}, new connections: {st['connects']}, timeouts: {st['timeouts']}\n"
+            f"Wait for a connection: avg {st['wait_avg_ms']} ms, max {st['wait_max_ms']} ms\n"
+            f"Longest hold: {st['hold_max_ms']} ms")
+
+    def _show_barcode_cache(self):
+        st = barcode_cache.stats()
+        looked_up = st["hits"] + st["misses"]
+        rate = f"{100 * st['hits'] / looked_up:.1f}%" if looked_up else "n/a"
+        QMessageBox.information(self, "Barcode Cache",
+            f"Cached products: {st['entries']:,}\n"
+            f"Scans served from the cache: {st['hits']:,}, from the database: {st['misses']:,} (hit rate {rate})")
+
+    def _show_sql_profile(self):
+        if not profiling_enabled():
+            QMessageBox.information(self, "SQL Profile", "The SQL profiler is off. Start the app with SQL_PROFILE=true to record queries."); return
+        SqlProfileDialog(self).exec()
+
     def _change_password(self):
         with self.SessionLocal() as s:
             d = ChangePasswordDialog(s, self.user, self)
@@ -177,7 +375,7 @@ class MainWindow(QMainWindow):
 
     def _test_printer(self):
         try:
-            self.sales_page.printer.test_page()
+            self.sales_page.spooler.submit("POS App Test Page\n\n*** Printer OK ***")
         except Exception as e:
             QMessageBox.warning(self, "Printer", f"Test failed: {e}")
 
@@ -189,19 +387,46 @@ class MainWindow(QMainWindow):
         )
         if confirm != QMessageBox.StandardButton.Yes:
             return
+        if self.user is not None:
+            pin_cache.forget(self.user.id)
         self.hide()
+        if not self._password_login():
+            self.close()
+            return
+        self.show()
+
+    def _password_login(self) -> bool:
         with self.SessionLocal() as s:
             dlg = LoginDialog(s, self)
             if not dlg.exec():
-                self.close()
-                return
+                return False
             new_user = dlg.user
             role_obj = getattr(new_user, "role", None)
-            role_name = role_obj.name if role_obj else "Cashier"
-            self._set_logged_in_user(new_user, role_name)
-            self.sales_page.set_cashier(getattr(new_user, "id", None))
-            self.stack.setCurrentIndex(0)
-            self.show()
+            self._activate_user(new_user, role_obj.name if role_obj else "Cashier")
+        return True
+
+    def _switch_cashier(self):
+        """PIN switch for cashiers who set one on this terminal; otherwise (or on request) the password dialog."""
+        if pin_cache.users():
+            dlg = SwitchCashierDialog(self)
+            result = dlg.exec()
+            if dlg.user_id is not None:
+                with self.SessionLocal() as s:
+                    user = s.get(User, dlg.user_id)
+                    if user is None or not user.active:
+                        pin_cache.forget(dlg.user_id)
+                        QMessageBox.warning(self, "Switch Cashier", "This account is no longer active."); return
+                    role_obj = user.role
+                    self._activate_user(user, role_obj.name if role_obj else "Cashier")
+                return
+            if result != SwitchCashierDialog.USE_PASSWORD:
+                return
+        self._password_login()
+
+    def _activate_user(self, user, role_name):
+        self._set_logged_in_user(user, role_name)
+        self.sales_page.set_cashier(getattr(user, "id", None))
+        self.stack.setCurrentIndex(0)
 
     def _set_logged_in_user(self, user, role_name=None):
         self.user = user
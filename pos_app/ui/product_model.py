@@ -0,0 +1,174 @@
+from collections import OrderedDict
+from PyQt6.QtCore import QAbstractTableModel, QModelIndex, Qt, QTimer
+from sqlalchemy import func, select, tuple_
+from pos_app.data.models import Product
+from pos_app.data.search import search_product_ids
+
+
+class ProductTableModel(QAbstractTableModel):
+    """Products table fed page by page with keyset-paginated queries.
+
+    Only the first page is read when the model is (re)set; the view pulls
+    further pages through canFetchMore/fetchMore while scrolling. Sorting is
+    done by the database. At most ``max_pages`` pages are kept in memory; an
+    evicted page is re-read from its stored start key when it scrolls back
+    into view; if it comes back shorter (products were deleted meanwhile) the
+    missing rows show empty and the model reloads. A search term switches to the ranked top ``search_limit``
+    matches from the search index instead of paging.
+    """
+
+    HEADERS = ["ID", "SKU", "Barcode", "Name", "Price", "Active"]
+    COLUMNS = [Product.id, Product.sku, Product.barcode, Product.name, Product.price, Product.active]
+    SORT_KEYS = [Product.id, Product.sku, func.coalesce(Product.barcode, ""), Product.name, Product.price,
+                 func.coalesce(Product.active, True)]
+
+    def __init__(self, session_maker, page_size: int = 200, max_pages: int = 25, search_limit: int = 200, parent=None):
+        super().__init__(parent)
+        self.session_maker = session_maker
+        self.page_size = page_size
+        self.search_limit = search_limit
+        self.max_pages = max(2, max_pages)
+        self._sort_column = 0
+        self._sort_order = Qt.SortOrder.DescendingOrder
+        self._term = ""
+        self._reload_queued = False
+        self._clear()
+
+    def _clear(self):
+        self._pages: OrderedDict[int, list[tuple]] = OrderedDict()
+        self._page_starts: list[tuple | None] = [None]  # key each page starts after
+        self._row_count = 0
+        self._exhausted = False
+        self._search_rows: list[tuple] | None = None
+
+    # --- queries -------------------------------------------------------
+    def _fetch_search(self) -> list[tuple]:
+        key = self.SORT_KEYS[self._sort_column]
+        with self.session_maker() as s:
+            ids = search_product_ids(s, self._term, self.search_limit)
+            if not ids:
+                return []
+            rows = {r[0]: tuple(r) for r in s.execute(select(*self.COLUMNS, key).where(Product.id.in_(ids)))}
+        return [rows[i] for i in ids if i in rows]
+
+    def _sort_search_rows(self):
+        if self._sort_column == 0 and self._search_rows is not None:
+            return  # keep relevance order unless the user picked a column
+        self._search_rows.sort(key=lambda r: (r[-1] is None, r[-1], r[0]),
+                               reverse=self._sort_order == Qt.SortOrder.DescendingOrder)
+
+    def _fetch_page(self, after: tuple | None) -> list[tuple]:
+        key = self.SORT_KEYS[self._sort_column]
+        desc = self._sort_order == Qt.SortOrder.DescendingOrder
+        stmt = select(*self.COLUMNS, key)
+        if after is not None:
+            cond = tuple_(key, Product.id) < tuple_(*after) if desc else tuple_(key, Product.id) > tuple_(*after)
+            stmt = stmt.where(cond)
+        order = (key.desc(), Product.id.desc()) if desc else (key.asc(), Product.id.asc())
+        stmt = stmt.order_by(*order).limit(self.page_size)
+        with self.session_maker() as s:
+            return [tuple(r) for r in s.execute(stmt)]
+
+    def _store(self, page: int, rows: list[tuple]):
+        self._pages[page] = rows
+        self._pages.move_to_end(page)
+        while len(self._pages) > self.max_pages:
+            self._pages.popitem(last=False)
+
+    def _page(self, page: int) -> list[tuple]:
+        rows = self._pages.get(page)
+        if rows is None:
+            rows = self._fetch_page(self._page_starts[page])
+        self._store(page, rows)
+        return rows
+
+    def reload(self, keep_search_order: bool = True):
+        self.beginResetModel()
+        self._clear()
+        if self._term:
+            self._search_rows = self._fetch_search()
+            if not keep_search_order:
+                self._sort_search_rows()
+            self._row_count = len(self._search_rows)
+            self._exhausted = True
+        self.endResetModel()
+        self.fetchMore(QModelIndex())
+
+    def set_filter(self, term: str):
+        self._term = (term or "").strip()
+        self.reload()
+
+    # --- Qt model API --------------------------------------------------
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._row_count
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.HEADERS[section]
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self._exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._exhausted:
+            return
+        page = len(self._page_starts) - 1
+        rows = self._fetch_page(self._page_starts[page])
+        if len(rows) < self.page_size:
+            self._exhausted = True
+        if not rows:
+            return
+        self.beginInsertRows(QModelIndex(), self._row_count, self._row_count + len(rows) - 1)
+        self._store(page, rows)
+        self._row_count += len(rows)
+        last = rows[-1]
+        self._page_starts.append((last[-1], last[0]))
+        self.endInsertRows()
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        if (column, order) == (self._sort_column, self._sort_order):
+            return  # e.g. the view applying its initial indicator: nothing to re-read
+        self._sort_column = column
+        self._sort_order = order
+        self.reload(keep_search_order=False)
+
+    def row(self, row: int) -> tuple | None:
+        """The row's columns, or None if it is gone from a re-read page (a reload is then queued)."""
+        if self._search_rows is not None:
+            return self._search_rows[row]
+        page, offset = divmod(row, self.page_size)
+        rows = self._page(page)
+        if offset < len(rows):
+            return rows[offset]
+        if not self._reload_queued:
+            # data() must not reset the model, so reload once control is back in the event loop
+            self._reload_queued = True
+            QTimer.singleShot(0, self._reload_stale)
+        return None
+
+    def _reload_stale(self):
+        self._reload_queued = False
+        self.reload()
+
+    def product_id(self, row: int) -> int | None:
+        r = self.row(row)
+        return int(r[0]) if r is not None else None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role != Qt.ItemDataRole.DisplayRole:
+            return None
+        r = self.row(index.row())
+        if r is None:
+            return None
+        pid, sku, barcode, name, price, active, _ = r
+        col = index.column()
+        if col == 0: return str(pid)
+        if col == 1: return sku or ""
+        if col == 2: return barcode or ""
+        if col == 3: return name or ""
+        if col == 4: return f"{(price or 0):.2f}"
+        return "Yes" if active else "No"
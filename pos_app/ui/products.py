@@ -1,6 +1,14 @@
-from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QTableWidget, QTableWidgetItem, QPushButton, QLineEdit, QLabel, QMessageBox, QFileDialog
+from PyQt6.QtCore import Qt, QTimer
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QTableView, QAbstractItemView, QPushButton, QLineEdit, QLabel, QMessageBox, QFileDialog, QProgressDialog, QApplication
 from sqlalchemy.orm import Session
+from pos_app.data.db import release
 from pos_app.data.models import Product
+from pos_app.data.profiler import action
+from pos_app.services.product_cache import barcode_cache
+from pos_app.services.product_import import import_products_csv, read_checkpoint
+from pos_app.services.exports import stream_csv, products_stmt, product_row, PRODUCT_HEADER
+from .workers import run_with_progress
+from .product_model import ProductTableModel
 from .product_edit_dialog import ProductEditDialog
 from .product_delete_dialog import ProductDeleteDialog
 
@@ -11,45 +19,49 @@ class ProductsPage(QWidget):
         self.session: Session = self.SessionLocal()
         layout = QVBoxLayout(self)
         search_row = QHBoxLayout(); self.search = QLineEdit(); self.search.setPlaceholderText("Search by SKU / Barcode / Name"); self.btn_search = QPushButton("Search"); self.btn_clear = QPushButton("Clear"); search_row.addWidget(QLabel("Search:")); search_row.addWidget(self.search); search_row.addWidget(self.btn_search); search_row.addWidget(self.btn_clear); layout.addLayout(search_row)
-        self.table = QTableWidget(0, 6); self.table.setHorizontalHeaderLabels(["ID", "SKU", "Barcode", "Name", "Price", "Active"]); self.table.setEditTriggers(self.table.EditTrigger.NoEditTriggers); layout.addWidget(self.table)
+        self.model = ProductTableModel(self.SessionLocal, parent=self)
+        self.table = QTableView(); self.table.setModel(self.model); self.table.setEditTriggers(self.table.EditTrigger.NoEditTriggers); layout.addWidget(self.table)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.horizontalHeader().setSortIndicator(0, Qt.SortOrder.DescendingOrder); self.table.setSortingEnabled(True)
+        self.table.horizontalHeader().setStretchLastSection(True); self.table.setColumnWidth(3, 260)
         btns = QHBoxLayout(); self.btn_add = QPushButton("Add"); self.btn_edit = QPushButton("Edit Selected"); self.btn_delete = QPushButton("Delete Selected")
-        self.btn_label = QPushButton("Print Label (Selected)"); btns.addWidget(self.btn_add); btns.addWidget(self.btn_edit); btns.addWidget(self.btn_delete); btns.addWidget(self.btn_label); layout.addLayout(btns)
+        self._zebra = None
+        self.btn_label = QPushButton("Print Labels (Selected)"); btns.addWidget(self.btn_add); btns.addWidget(self.btn_edit); btns.addWidget(self.btn_delete); btns.addWidget(self.btn_label); layout.addLayout(btns)
+        self.btn_import = QPushButton("Import CSV"); btns.addWidget(self.btn_import); self.btn_import.clicked.connect(self.import_csv)
+        self.btn_export = QPushButton("Export CSV"); btns.addWidget(self.btn_export); self.btn_export.clicked.connect(self.export_csv)
+        self._worker = None
         self.btn_add.clicked.connect(self.add_product); self.btn_edit.clicked.connect(self.edit_selected); self.btn_delete.clicked.connect(self.delete_selected)
         self.btn_label.clicked.connect(self.print_label); self.btn_search.clicked.connect(self.refresh); self.btn_clear.clicked.connect(self._clear_search)
+        # search as you type, once typing pauses
+        self._search_timer = QTimer(self); self._search_timer.setSingleShot(True); self._search_timer.setInterval(200)
+        self._search_timer.timeout.connect(self.refresh); self.search.textChanged.connect(self._search_timer.start)
         self.refresh()
-    def _query(self):
-        q = self.session.query(Product); term = self.search.text().strip()
-        if term:
-            like = f"%{term}%"; q = q.filter((Product.sku.ilike(like)) | (Product.name.ilike(like)) | (Product.barcode.ilike(like)))
-        return q.order_by(Product.id.desc())
     def refresh(self):
-        rows = self._query().all(); self.table.setRowCount(len(rows))
-        for i, p in enumerate(rows):
-            self.table.setItem(i, 0, QTableWidgetItem(str(p.id)))
-            self.table.setItem(i, 1, QTableWidgetItem(p.sku or ""))
-            self.table.setItem(i, 2, QTableWidgetItem(p.barcode or ""))
-            self.table.setItem(i, 3, QTableWidgetItem(p.name or ""))
-            self.table.setItem(i, 4, QTableWidgetItem(f"{(p.price or 0):.2f}"))
-            self.table.setItem(i, 5, QTableWidgetItem("Yes" if p.active else "No"))
-        self.table.resizeColumnsToContents()
+        # only the first page (or the ranked top matches) is read; the view fetches more while scrolling
+        self._search_timer.stop()
+        with action("products.refresh"):
+            self.model.set_filter(self.search.text())
     def _selected_product_id(self):
-        r = self.table.currentRow();
+        r = self.table.currentIndex().row()
         if r < 0: return None
-        return int(self.table.item(r, 0).text())
+        return self.model.product_id(r)
     def add_product(self):
         dlg = ProductEditDialog(self.session, None, self)
         if dlg.exec():
-            try: self.session.commit(); self.refresh()
+            try: self.session.commit(); barcode_cache.invalidate(dlg.product.barcode); self.refresh()
             except Exception as e: self.session.rollback(); QMessageBox.critical(self, "Error", str(e))
     def edit_selected(self):
         pid = self._selected_product_id()
         if not pid: QMessageBox.information(self, "Select", "Select a product first."); return
         prod = self.session.get(Product, pid)
         if not prod: return
+        old_barcode = prod.barcode
         dlg = ProductEditDialog(self.session, prod, self)
         if dlg.exec():
-            try: self.session.commit(); self.refresh()
+            try: self.session.commit(); barcode_cache.invalidate(old_barcode, prod.barcode); self.refresh()
             except Exception as e: self.session.rollback(); QMessageBox.critical(self, "Error", str(e))
+        else:
+            release(self.session)
     def delete_selected(self):
         pid = self._selected_product_id()
         if not pid: QMessageBox.information(self, "Select", "Select a product first."); return
@@ -58,70 +70,91 @@ class ProductsPage(QWidget):
             if not prod: return
             dlg = ProductDeleteDialog(prod, self)
             if not dlg.exec():
-                return
-            self.session.delete(prod); self.session.commit(); self.refresh()
+                release(self.session); return
+            barcode = prod.barcode
+            self.session.delete(prod); self.session.commit(); barcode_cache.invalidate(barcode); self.refresh()
         except Exception as e:
             self.session.rollback(); QMessageBox.critical(self, "Error", str(e))
     def _clear_search(self):
         self.search.clear(); self.refresh()
 
     def export_csv(self):
-        path, _ = QFileDialog.getSaveFileName(self, "Save CSV", "products.csv", "CSV Files (*.csv)")
+        if self._worker is not None:
+            QMessageBox.information(self, "Busy", "Another import or export is still running."); return
+        path, _ = QFileDialog.getSaveFileName(self, "Save CSV", "products.csv", "CSV Files (*.csv);;Gzipped CSV (*.csv.gz)")
         if not path: return
-        rows = self._query().all()
-        import csv
-        with open(path, "w", newline="", encoding="utf-8") as f:
-            w = csv.writer(f)
-            w.writerow(["id","sku","barcode","name","price","active","category_id","tax_id"])
-            for p in rows:
-                w.writerow([p.id, p.sku, p.barcode or "", p.name, p.price or 0, 1 if p.active else 0, p.category_id or "", p.tax_id or ""])
+        stmt = products_stmt(self.search.text())
+        def done(count):
+            self._worker = None
+            if count >= 0:
+                QMessageBox.information(self, "Export CSV", f"{count:,} products written to:\n{path}")
+        def stopped():
+            self._worker = None
+        self._worker = run_with_progress(
+            self, "Export CSV", "Rows written:",
+            lambda w: stream_csv(self.SessionLocal, stmt, path, PRODUCT_HEADER, product_row,
+                                 progress=w.report, is_cancelled=w.is_cancelled),
+            done, on_cancelled=stopped, on_failed=lambda _msg: stopped())
 
     def import_csv(self):
+        if self._worker is not None:
+            QMessageBox.information(self, "Busy", "Another import or export is still running."); return
         path, _ = QFileDialog.getOpenFileName(self, "Open CSV", "", "CSV Files (*.csv)")
         if not path: return
-        import csv
-        with open(path, "r", encoding="utf-8") as f:
-            r = csv.DictReader(f)
-            for row in r:
-                sku = (row.get("sku") or "").strip()
-                name = (row.get("name") or "").strip()
-                if not sku or not name: continue
-                p = self.session.query(Product).filter(Product.sku==sku).first()
-                if p is None:
-                    p = Product(sku=sku)
-                    self.session.add(p)
-                p.barcode = (row.get("barcode") or None)
-                p.name = name
-                try:
-                    p.price = float(row.get("price") or 0)
-                except Exception:
-                    p.price = 0
-                cat_raw = row.get("category_id")
-                tax_raw = row.get("tax_id")
-                try:
-                    p.category_id = int(cat_raw) if cat_raw else None
-                except (TypeError, ValueError):
-                    p.category_id = None
-                try:
-                    p.tax_id = int(tax_raw) if tax_raw else None
-                except (TypeError, ValueError):
-                    p.tax_id = None
-                p.active = (str(row.get("active") or "1").strip() in {"1","true","True","yes"})
-            try:
-                self.session.commit(); self.refresh()
-            except Exception as e:
-                self.session.rollback(); QMessageBox.critical(self, "Import error", str(e))
+        start_row = read_checkpoint(path)
+        if start_row:
+            resume = QMessageBox.question(self, "Resume import", f"A previous import of this file stopped after row {start_row}.\n\nResume from there?")
+            if resume != QMessageBox.StandardButton.Yes:
+                start_row = 0
+        def on_done(result):
+            self._worker = None
+            barcode_cache.invalidate(); self.refresh()
+            msg = f"Inserted: {result.inserted}\nUpdated: {result.updated}\nRejected: {result.rejected}"
+            if result.reject_path:
+                msg += f"\n\nRejected rows were written to:\n{result.reject_path}"
+            if not result.completed:
+                msg = "Import stopped; it can be resumed from the last committed chunk.\n\n" + msg
+            QMessageBox.information(self, "Import CSV", msg)
+        def on_stopped():
+            # failed or cancelled: whatever chunks were committed are visible now
+            self._worker = None
+            barcode_cache.invalidate(); self.refresh()
+        self._worker = run_with_progress(
+            self, "Import CSV", "Importing products...",
+            lambda w: import_products_csv(self.SessionLocal, path, start_row=start_row, progress=w.report, is_cancelled=w.is_cancelled),
+            on_done, on_cancelled=on_stopped, on_failed=lambda _msg: on_stopped())
+
+    def _selected_product_ids(self):
+        rows = sorted({i.row() for i in self.table.selectionModel().selectedRows()})
+        return [pid for pid in map(self.model.product_id, rows) if pid is not None]
 
     def print_label(self):
-        pid = self._selected_product_id()
-        if not pid:
+        ids = self._selected_product_ids()
+        if not ids:
             QMessageBox.information(self, "Select", "Select a product first."); return
-        p = self.session.get(Product, pid)
-        if not p or not p.barcode:
+        rows = (self.session.query(Product.id, Product.barcode, Product.name)
+                .filter(Product.id.in_(ids), Product.barcode.is_not(None)).all())
+        order = {pid: i for i, pid in enumerate(ids)}
+        items = [(barcode, (name or "")[:30]) for _, barcode, name in sorted(rows, key=lambda r: order[r[0]])]
+        if not items:
             QMessageBox.warning(self, "Missing", "Selected product has no barcode."); return
-        try:
-            from pos_app.integrations.printers.zpl import ZebraPrinter
-            ZebraPrinter().print_barcode_label(barcode=p.barcode, title=p.name[:30], copies=1)
-            QMessageBox.information(self, "Label", "Label sent.")
-        except Exception as e:
-            QMessageBox.warning(self, "Label", str(e))
+        from pos_app.integrations.printers.zpl import ZebraPrinter, LabelBatchError
+        if self._zebra is None:
+            self._zebra = ZebraPrinter()
+        dlg = QProgressDialog("Sending labels...", "Stop", 0, len(items), self)
+        dlg.setWindowTitle("Labels"); dlg.setMinimumDuration(500)
+        def progress(done, total):
+            dlg.setValue(done); QApplication.processEvents()
+            return not dlg.wasCanceled()
+        start = 0
+        while True:
+            try:
+                sent = self._zebra.print_labels(items, start=start, progress=progress)
+                break
+            except LabelBatchError as e:
+                start = e.printed
+                again = QMessageBox.question(self, "Label", f"{e}\n\nResume from label {start + 1}?")
+                if again != QMessageBox.StandardButton.Yes:
+                    dlg.close(); return
+        dlg.close()
+        QMessageBox.information(self, "Label", f"{sent} of {len(items)} label(s) sent.")
@@ -1,50 +1,21 @@
 
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QDateEdit, QPushButton,
                              QTableWidget, QTableWidgetItem, QFileDialog, QMessageBox, QTabWidget,
-                             QSizePolicy)
-from PyQt6.QtCore import QDate
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from datetime import datetime, date, timedelta
-from pos_app.data.models import Sale, SaleLine, Product, Category, Payment, User
-from jinja2 import Environment, BaseLoader
-from weasyprint import HTML
-import matplotlib
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
-import uuid, tempfile
+                             QSizePolicy, QScrollArea)
+from PyQt6.QtCore import QDate, QThreadPool, QTimer, Qt
+from PyQt6.QtGui import QPixmap
+import threading
+from pos_app.reports import analytics, pdf, queries
+from pos_app.reports.charts import ChartRenderer, ChartSpec
+from pos_app.data.profiler import action
+from pos_app.services.exports import stream_csv, sale_line_row, SALE_LINE_HEADER
+from .workers import Worker, interrupt_on_cancel, run_with_progress
 from pathlib import Path
 
-REPORT_TEMPLATE = """
-<!doctype html><html><head><meta charset="utf-8"><title>Sales Report</title>
-<style>body{font-family:Arial,sans-serif}h1{font-size:18px}table{border-collapse:collapse;width:100%}th,td{border:1px solid #ddd;padding:6px;font-size:12px}th{background:#f0f0f0}</style>
-</head><body>
-<h1>Sales Report: {{ start }} – {{ end }}</h1>
-<table><thead><tr><th>Date</th><th>Sales</th><th>Subtotal</th><th>Tax</th><th>Total</th></tr></thead><tbody>
-{% for r in rows %}<tr><td>{{ r.date }}</td><td>{{ r.count }}</td><td>{{ '%.2f'|format(r.subtotal) }}</td><td>{{ '%.2f'|format(r.tax) }}</td><td>{{ '%.2f'|format(r.total) }}</td></tr>{% endfor %}
-</tbody><tfoot><tr><th>Totals</th><th>{{ totals.count }}</th><th>{{ '%.2f'|format(totals.subtotal) }}</th><th>{{ '%.2f'|format(totals.tax) }}</th><th>{{ '%.2f'|format(totals.total) }}</th></tr></tfoot></table>
-</body></html>
-"""
-
-def save_bar_chart(labels, values, title):
-    fig, ax = plt.subplots()
-    ax.bar(labels, values)
-    ax.set_title(title)
-    ax.set_ylabel("Total")
-    fig.tight_layout()
-    out_dir = Path(tempfile.gettempdir())
-    path = out_dir / f"pos_chart_{uuid.uuid4().hex}.png"
-    try:
-        fig.savefig(path)
-    finally:
-        plt.close(fig)
-    return str(path)
-
 class ReportsPage(QWidget):
     def __init__(self, session_maker):
         super().__init__()
         self.SessionLocal = session_maker
-        self.session: Session = self.SessionLocal()
 
         layout = QVBoxLayout(self)
 
@@ -58,6 +29,15 @@ class ReportsPage(QWidget):
         self.btn_run = QPushButton("Run Report")
         dates.addWidget(self.btn_run)
         layout.addLayout(dates)
+        self.status_lbl = QLabel(""); layout.addWidget(self.status_lbl)
+
+        # Report queries run here with their own sessions, never on the GUI thread
+        self.pool = QThreadPool(self); self.pool.setMaxThreadCount(5)
+        self._running: list[Worker] = []
+        self._generation = 0
+        self._pending = 0
+        self._rerun_timer = QTimer(self); self._rerun_timer.setSingleShot(True); self._rerun_timer.setInterval(400)
+        self._rerun_timer.timeout.connect(self.refresh)
 
         self.tabs = QTabWidget()
         # Tab 0: Summary by day
@@ -73,10 +53,34 @@ class ReportsPage(QWidget):
         self.tab_pay = QWidget(); self.pay_table = QTableWidget(0,2); self.pay_table.setHorizontalHeaderLabels(["Method","Total"])
         t3 = QVBoxLayout(self.tab_pay); t3.addWidget(self.pay_table); self.btn_pay_csv = QPushButton("Export CSV"); t3.addWidget(self.btn_pay_csv)
 
+        # Tabs 4-5: from the in-memory SalesCube (reports/analytics.py), kept per date range and topped up on refresh
+        self.tab_hour = QWidget(); self.hour_table = QTableWidget(0,3); self.hour_table.setHorizontalHeaderLabels(["Hour","Sales","Total"])
+        QVBoxLayout(self.tab_hour).addWidget(self.hour_table)
+        self.tab_register = QWidget(); self.register_table = QTableWidget(0,3); self.register_table.setHorizontalHeaderLabels(["Register","Sales","Total"])
+        QVBoxLayout(self.tab_register).addWidget(self.register_table)
+        self._cube = None
+        self._cube_lock = threading.Lock()
+        # Tab 6: the three charts, rendered together as PNG bytes (reports/charts.py)
+        self.tab_charts = QWidget(); tc = QVBoxLayout(self.tab_charts)
+        scroll = QScrollArea(); scroll.setWidgetResizable(True); self._chart_scroll = scroll
+        holder = QWidget(); charts_col = QVBoxLayout(holder)
+        self.chart_labels = {}
+        for key in ("category", "cashier", "payment"):
+            lbl = QLabel(); lbl.setAlignment(Qt.AlignmentFlag.AlignCenter); charts_col.addWidget(lbl); self.chart_labels[key] = lbl
+        scroll.setWidget(holder); tc.addWidget(scroll)
+        self.btn_save_charts = QPushButton("Save Charts..."); tc.addWidget(self.btn_save_charts)
+        self.charts = ChartRenderer()
+        self._chart_pngs: dict[str, bytes] = {}
+        self._chart_worker = None
+        self._export_worker = None
+
         self.tabs.addTab(self.tab_summary, "Daily Summary")
         self.tabs.addTab(self.tab_cat, "By Category")
         self.tabs.addTab(self.tab_cashier, "By Cashier")
         self.tabs.addTab(self.tab_pay, "By Payment")
+        self.tabs.addTab(self.tab_hour, "By Hour")
+        self.tabs.addTab(self.tab_register, "By Register")
+        self.tabs.addTab(self.tab_charts, "Charts")
 
         layout.addWidget(self.tabs)
 
@@ -84,103 +88,136 @@ class ReportsPage(QWidget):
         btns = QHBoxLayout()
         self.btn_csv = QPushButton("Export Summary CSV")
         self.btn_pdf = QPushButton("Export Summary PDF")
-        btns.addWidget(self.btn_csv); btns.addWidget(self.btn_pdf)
+        self.btn_lines_csv = QPushButton("Export Sales Lines")
+        btns.addWidget(self.btn_csv); btns.addWidget(self.btn_pdf); btns.addWidget(self.btn_lines_csv)
         layout.addLayout(btns)
 
-        # Chart buttons
-        chart_row = QHBoxLayout()
-        self.btn_cat_chart = QPushButton("Category Chart")
-        self.btn_cashier_chart = QPushButton("Cashier Chart")
-        self.btn_pay_chart = QPushButton("Payment Chart")
-        chart_row.addWidget(self.btn_cat_chart); chart_row.addWidget(self.btn_cashier_chart); chart_row.addWidget(self.btn_pay_chart)
-        layout.addLayout(chart_row)
 
         # Wire
         self.btn_run.clicked.connect(self.refresh)
+        self.start.dateChanged.connect(self._dates_changed)
+        self.end.dateChanged.connect(self._dates_changed)
         self.btn_csv.clicked.connect(self.export_csv)
         self.btn_pdf.clicked.connect(self.export_pdf)
+        self.btn_lines_csv.clicked.connect(self.export_sale_lines)
         self.btn_cat_csv.clicked.connect(lambda: self._export_kv_csv(self._cat_rows(), "categories.csv"))
         self.btn_cashier_csv.clicked.connect(lambda: self._export_kv_csv(self._cashier_rows(), "cashiers.csv"))
         self.btn_pay_csv.clicked.connect(lambda: self._export_kv_csv(self._pay_rows(), "payments.csv"))
-        self.btn_cat_chart.clicked.connect(lambda: self._show_chart(self._cat_rows(), "Total by Category"))
-        self.btn_cashier_chart.clicked.connect(lambda: self._show_chart(self._cashier_rows(), "Total by Cashier"))
-        self.btn_pay_chart.clicked.connect(lambda: self._show_chart(self._pay_rows(), "Total by Payment Method"))
+        self.tabs.currentChanged.connect(lambda i: self.tabs.widget(i) is self.tab_charts and self.show_charts())
+        self.btn_save_charts.clicked.connect(self.save_charts)
 
         self.refresh()
 
+    def _dates_changed(self):
+        # results for the old range are stale now; drop them and re-run once the dates settle
+        self.cancel_running()
+        self._generation += 1
+        self._rerun_timer.start()
+
     def _date_range(self):
         start = self.start.date().toPyDate()
         end = self.end.date().toPyDate()
         return start, end
 
     def _summary_rows(self):
-        start, end = self._date_range()
-        q = (self.session.query(
-                func.date(Sale.datetime).label("d"),
-                func.count(Sale.id),
-                func.coalesce(func.sum(Sale.subtotal),0.0),
-                func.coalesce(func.sum(Sale.tax_total),0.0),
-                func.coalesce(func.sum(Sale.grand_total),0.0)
-            )
-            .filter(
-                Sale.status == "completed",
-                Sale.datetime >= start,
-                Sale.datetime < (end + timedelta(days=1)),
-            )
-            .group_by(func.date(Sale.datetime))
-            .order_by(func.date(Sale.datetime))
-        )
-        rows = [{"date": d.strftime("%Y-%m-%d") if isinstance(d, (date, datetime)) else str(d),
-                 "count": int(c), "subtotal": float(s), "tax": float(t), "total": float(g)} for d,c,s,t,g in q]
-        totals = {"count": sum(r["count"] for r in rows),
-                  "subtotal": sum(r["subtotal"] for r in rows),
-                  "tax": sum(r["tax"] for r in rows),
-                  "total": sum(r["total"] for r in rows)}
-        return rows, totals
+        with self.SessionLocal() as s:
+            return queries.summary_rows(s, *self._date_range())
 
     def _cat_rows(self):
-        start, end = self._date_range()
-        q = (self.session.query(Category.name, func.coalesce(func.sum(SaleLine.line_total),0.0))
-             .join(Product, Product.id==SaleLine.product_id)
-             .join(Category, Category.id==Product.category_id, isouter=True)
-             .join(Sale, Sale.id==SaleLine.sale_id)
-             .filter(
-                 Sale.status == "completed",
-                 Sale.datetime >= start,
-                 Sale.datetime < (end + timedelta(days=1)),
-             )
-             .group_by(Category.name)
-             .order_by(Category.name))
-        return [(name or "Uncategorized", float(total)) for name, total in q]
+        with self.SessionLocal() as s:
+            return queries.category_rows(s, *self._date_range())
 
     def _cashier_rows(self):
-        start, end = self._date_range()
-        q = (self.session.query(User.username, func.coalesce(func.sum(Sale.grand_total),0.0))
-             .join(Sale, Sale.cashier_id==User.id, isouter=True)
-             .filter(
-                 Sale.status == "completed",
-                 Sale.datetime >= start,
-                 Sale.datetime < (end + timedelta(days=1)),
-             )
-             .group_by(User.username)
-             .order_by(User.username))
-        return [(name or "Unassigned", float(total)) for name, total in q]
+        with self.SessionLocal() as s:
+            return queries.cashier_rows(s, *self._date_range())
 
     def _pay_rows(self):
-        start, end = self._date_range()
-        q = (self.session.query(Payment.method, func.coalesce(func.sum(Payment.amount),0.0))
-             .join(Sale, Sale.id==Payment.sale_id)
-             .filter(
-                 Sale.status == "completed",
-                 Sale.datetime >= start,
-                 Sale.datetime < (end + timedelta(days=1)),
-             )
-             .group_by(Payment.method)
-             .order_by(Payment.method))
-        return [(m or "Unknown", float(total)) for m, total in q]
+        with self.SessionLocal() as s:
+            return queries.payment_rows(s, *self._date_range())
+
+    def _query_task(self, fn, start, end):
+        def task(worker):
+            if worker.is_cancelled():
+                return None
+            with self.SessionLocal() as s, interrupt_on_cancel(worker, s), action(f"reports.{fn.__name__}"):
+                return fn(s, start, end)
+        return task
+
+    def _cube_task(self, start, end):
+        def task(worker):
+            if worker.is_cancelled():
+                return None
+            with self._cube_lock, self.SessionLocal() as s, interrupt_on_cancel(worker, s), action("reports.analytics"):
+                cube = self._cube
+                if cube is None or (cube.start, cube.end) != (start, end):
+                    cube = analytics.SalesCube.load(s, start, end)
+                else:
+                    cube.append_new(s)  # same range: only sales committed since the last run
+                self._cube = cube
+                return {dim: [(cube.label(dim, key), n, total) for key, n, _, _, total in cube.sales_by(dim)]
+                        for dim in ("hour", "register")}
+        return task
+
+    def cancel_running(self):
+        for w in self._running:
+            w.cancel()
+        self._running = []
+
+    def shutdown(self):
+        self._rerun_timer.stop()
+        self.cancel_running()
+        for w in (self._chart_worker, self._export_worker):
+            if w is not None:
+                w.cancel()
+        self.pool.waitForDone(2000)
+        self.charts.shutdown()
 
     def refresh(self):
-        rows, totals = self._summary_rows()
+        """Run the report queries and the SalesCube update on the page's pool; a newer run supersedes older ones."""
+        self.cancel_running()
+        self._generation += 1
+        gen = self._generation
+        start, end = self._date_range()
+        jobs = [
+            (queries.summary_rows, self._fill_summary),
+            (queries.category_rows, lambda rows: self._fill_kv(self.cat_table, rows)),
+            (queries.cashier_rows, lambda rows: self._fill_kv(self.cashier_table, rows)),
+            (queries.payment_rows, lambda rows: self._fill_kv(self.pay_table, rows)),
+        ]
+        tasks = [(self._query_task(fn, start, end), fill) for fn, fill in jobs]
+        tasks.append((self._cube_task(start, end), self._fill_cube))
+        self._pending = len(tasks)
+        self.status_lbl.setText("Running report...")
+        if self.tabs.currentWidget() is self.tab_charts:
+            self.show_charts()
+        for task, fill in tasks:
+            w = Worker(task)
+            w.signals.finished.connect(lambda result, fill=fill, gen=gen: self._on_result(gen, fill, result))
+            w.signals.failed.connect(lambda msg, gen=gen: self._on_failed(gen, msg))
+            self._running.append(w)
+            self.pool.start(w)
+
+    def _on_result(self, gen, fill, result):
+        if gen != self._generation:
+            return
+        fill(result)
+        self._job_done()
+
+    def _on_failed(self, gen, msg):
+        if gen != self._generation:
+            return
+        self.status_lbl.setText(f"Report query failed: {msg}")
+        self._job_done(failed=True)
+
+    def _job_done(self, failed=False):
+        self._pending -= 1
+        if self._pending <= 0:
+            self._running = []
+            if not failed and not self.status_lbl.text().startswith("Report query failed"):
+                self.status_lbl.setText("")
+
+    def _fill_summary(self, result):
+        rows, totals = result
         self.summary_table.setRowCount(len(rows))
         for i, r in enumerate(rows):
             self.summary_table.setItem(i,0,QTableWidgetItem(r["date"]))
@@ -190,49 +227,82 @@ class ReportsPage(QWidget):
             self.summary_table.setItem(i,4,QTableWidgetItem(f"{r['total']:.2f}"))
         self.summary_table.resizeColumnsToContents()
 
-        # fill other tabs
-        cats = self._cat_rows()
-        self.cat_table.setRowCount(len(cats))
-        for i, (name, total) in enumerate(cats):
-            self.cat_table.setItem(i,0,QTableWidgetItem(name))
-            self.cat_table.setItem(i,1,QTableWidgetItem(f"{total:.2f}"))
-        cash = self._cashier_rows()
-        self.cashier_table.setRowCount(len(cash))
-        for i, (name, total) in enumerate(cash):
-            self.cashier_table.setItem(i,0,QTableWidgetItem(name))
-            self.cashier_table.setItem(i,1,QTableWidgetItem(f"{total:.2f}"))
-        pays = self._pay_rows()
-        self.pay_table.setRowCount(len(pays))
-        for i, (name, total) in enumerate(pays):
-            self.pay_table.setItem(i,0,QTableWidgetItem(name))
-            self.pay_table.setItem(i,1,QTableWidgetItem(f"{total:.2f}"))
+    def _fill_cube(self, result):
+        for table, rows in ((self.hour_table, result["hour"]), (self.register_table, result["register"])):
+            table.setRowCount(len(rows))
+            for i, (name, count, total) in enumerate(rows):
+                table.setItem(i,0,QTableWidgetItem(name))
+                table.setItem(i,1,QTableWidgetItem(str(count)))
+                table.setItem(i,2,QTableWidgetItem(f"{total:.2f}"))
+
+    def _fill_kv(self, table, rows):
+        table.setRowCount(len(rows))
+        for i, (name, total) in enumerate(rows):
+            table.setItem(i,0,QTableWidgetItem(name))
+            table.setItem(i,1,QTableWidgetItem(f"{total:.2f}"))
+
+    def _export_busy(self) -> bool:
+        if self._export_worker is not None:
+            QMessageBox.information(self, "Busy", "Another export is still running.")
+            return True
+        return False
+
+    def _start_export(self, text, task, on_finished):
+        """One export at a time: ``_export_worker`` is cleared once the task has returned, however it ended."""
+        def done(result):
+            self._export_worker = None; on_finished(result)
+        def stopped(*_):
+            self._export_worker = None
+        self._export_worker = run_with_progress(self, "Export", text, task, done, on_cancelled=stopped, pool=self.pool,
+                                                on_failed=stopped)
+
+    def _stream_export(self, path, stmt, header, row_fn, footer_fn=None):
+        def task(worker):
+            return stream_csv(self.SessionLocal, stmt, path, header, row_fn,
+                              progress=worker.report, is_cancelled=worker.is_cancelled, footer_fn=footer_fn)
+        def done(count):
+            if count >= 0:
+                QMessageBox.information(self, "Export", f"{count:,} rows written to:\n{path}")
+        self._start_export("Rows written:", task, done)
 
     def export_csv(self):
+        if self._export_busy(): return
         path, _ = QFileDialog.getSaveFileName(self, "Save CSV", "sales_summary.csv", "CSV Files (*.csv)")
         if not path: return
-        rows, totals = self._summary_rows()
-        import csv
-        try:
-            with open(path, "w", newline="", encoding="utf-8") as f:
-                w = csv.writer(f)
-                w.writerow(["Date","Sales","Subtotal","Tax","Total"])
-                for r in rows:
-                    w.writerow([r["date"], r["count"], f"{r['subtotal']:.2f}", f"{r['tax']:.2f}", f"{r['total']:.2f}"])
-                w.writerow([]); w.writerow(["TOTALS", totals["count"], f"{totals['subtotal']:.2f}", f"{totals['tax']:.2f}", f"{totals['total']:.2f}"])
-        except OSError as exc:
-            QMessageBox.critical(self, "Export error", f"Could not write CSV file.\n\nDetails: {exc}")
+        totals = {"count": 0, "subtotal": 0.0, "tax": 0.0, "total": 0.0}
+        def row(r):
+            r = queries.summary_row(r)
+            for k in totals:
+                totals[k] += r[k]
+            return [r["date"], r["count"], f"{r['subtotal']:.2f}", f"{r['tax']:.2f}", f"{r['total']:.2f}"]
+        def footer():
+            return [[], ["TOTALS", totals["count"], f"{totals['subtotal']:.2f}", f"{totals['tax']:.2f}", f"{totals['total']:.2f}"]]
+        self._stream_export(path, queries.summary_stmt(*self._date_range()), ["Date","Sales","Subtotal","Tax","Total"], row, footer)
+
+    def export_sale_lines(self):
+        if self._export_busy(): return
+        path, _ = QFileDialog.getSaveFileName(self, "Save Sales Lines", "sales_lines.csv.gz",
+                                              "Gzipped CSV (*.csv.gz);;CSV Files (*.csv)")
+        if not path: return
+        self._stream_export(path, queries.sale_lines_stmt(*self._date_range()), SALE_LINE_HEADER, sale_line_row)
 
     def export_pdf(self):
+        if self._export_busy(): return
         path, _ = QFileDialog.getSaveFileName(self, "Save PDF", "sales_summary.pdf", "PDF Files (*.pdf)")
         if not path: return
-        rows, totals = self._summary_rows()
-        html = Environment(loader=BaseLoader()).from_string(REPORT_TEMPLATE).render(
-            rows=rows, totals=totals, start=self.start.date().toString("yyyy-MM-dd"), end=self.end.date().toString("yyyy-MM-dd")
-        )
-        try:
-            HTML(string=html).write_pdf(path)
-        except Exception as exc:
-            QMessageBox.critical(self, "Export error", f"Failed to generate PDF.\n\nDetails: {exc}")
+        (start, end), labels = self._date_range(), (self.start.date().toString("yyyy-MM-dd"), self.end.date().toString("yyyy-MM-dd"))
+        def task(worker):
+            worker.report(0, 3)
+            with self.SessionLocal() as s, action("reports.pdf"):
+                rows, totals = queries.summary_rows(s, start, end)
+            worker.report(1, 3)
+            html = pdf.render_html(rows, totals, *labels)
+            worker.report(2, 3)
+            return pdf.write_pdf(html, path, worker.is_cancelled)
+        def done(cached):
+            if cached is not None:
+                QMessageBox.information(self, "Export", f"PDF {'copied from an earlier identical export' if cached else 'saved'} to:\n{path}")
+        self._start_export("Writing PDF...", task, done)
 
     def _export_kv_csv(self, rows, default_name):
         path, _ = QFileDialog.getSaveFileName(self, "Save CSV", default_name, "CSV Files (*.csv)")
@@ -247,14 +317,48 @@ class ReportsPage(QWidget):
         except OSError as exc:
             QMessageBox.critical(self, "Export error", f"Could not write CSV file.\n\nDetails: {exc}")
 
-    def _show_chart(self, rows, title):
-        labels = [k for k,_ in rows]
-        values = [v for _,v in rows]
-        if not labels: 
+    def show_charts(self):
+        """Render the Category, Cashier and Payment charts together (cached per dataset and size) into the Charts tab."""
+        if self._chart_worker is not None:
+            self._chart_worker.cancel()
+        start, end = self._date_range()
+        width = max(480, self._chart_scroll.viewport().width() - 30)
+        size = (width, max(300, width * 9 // 16))
+        def task(worker):
+            with self.SessionLocal() as s, action("reports.charts"):
+                rows = {"category": queries.category_rows(s, start, end), "cashier": queries.cashier_rows(s, start, end),
+                        "payment": queries.payment_rows(s, start, end)}
+            titles = {"category": "Total by Category", "cashier": "Total by Cashier", "payment": "Total by Payment Method"}
+            keys = [k for k in rows if rows[k]]
+            pngs = self.charts.render_all([ChartSpec.from_rows(titles[k], rows[k], size) for k in keys]) if keys else []
+            return {k: dict(zip(keys, pngs)).get(k) for k in rows}
+        def done(pngs):
+            if self._chart_worker is not worker:
+                return  # superseded by a newer render
+            self._chart_worker = None
+            self._chart_pngs = {k: png for k, png in pngs.items() if png}
+            for key, lbl in self.chart_labels.items():
+                png = pngs.get(key)
+                if png is None:
+                    lbl.setPixmap(QPixmap()); lbl.setText(f"No {key} data for this range."); continue
+                pix = QPixmap(); pix.loadFromData(png, "PNG"); lbl.setPixmap(pix)
+        def failed(msg):
+            if self._chart_worker is not worker:
+                return
+            self._chart_worker = None
+            QMessageBox.critical(self, "Chart error", f"Failed to create charts.\n\nDetails: {msg}")
+        worker = self._chart_worker = Worker(task)
+        worker.signals.finished.connect(done); worker.signals.failed.connect(failed)
+        self.pool.start(worker)
+
+    def save_charts(self):
+        if not self._chart_pngs:
             QMessageBox.information(self, "No data", "Nothing to chart for this range."); return
+        folder = QFileDialog.getExistingDirectory(self, "Save Charts To")
+        if not folder: return
         try:
-            path = save_bar_chart(labels, values, title)
-        except Exception as exc:
-            QMessageBox.critical(self, "Chart error", f"Failed to create chart.\n\nDetails: {exc}")
-            return
-        QMessageBox.information(self, "Chart saved", f"Chart saved to: {path}")
+            for key, png in self._chart_pngs.items():
+                (Path(folder) / f"{key}_chart.png").write_bytes(png)
+        except OSError as exc:
+            QMessageBox.critical(self, "Chart error", f"Could not save the charts.\n\nDetails: {exc}"); return
+        QMessageBox.information(self, "Charts saved", f"{len(self._chart_pngs)} chart(s) saved to: {folder}")
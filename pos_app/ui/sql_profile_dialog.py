@@ -0,0 +1,22 @@
+from PyQt6.QtGui import QFontDatabase
+from PyQt6.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QPlainTextEdit, QPushButton, QFileDialog
+from pos_app.data.profiler import profiler
+
+class SqlProfileDialog(QDialog):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("SQL Profile"); self.resize(1000, 600)
+        layout = QVBoxLayout(self)
+        self.text = QPlainTextEdit(); self.text.setReadOnly(True); self.text.setLineWrapMode(QPlainTextEdit.LineWrapMode.NoWrap)
+        self.text.setFont(QFontDatabase.systemFont(QFontDatabase.SystemFont.FixedFont)); layout.addWidget(self.text)
+        row = QHBoxLayout(); refresh = QPushButton("Refresh"); reset = QPushButton("Reset"); save = QPushButton("Save..."); close = QPushButton("Close")
+        row.addWidget(refresh); row.addWidget(reset); row.addWidget(save); row.addStretch(1); row.addWidget(close); layout.addLayout(row)
+        refresh.clicked.connect(self.refresh); reset.clicked.connect(self._reset); save.clicked.connect(self._save); close.clicked.connect(self.accept)
+        self.refresh()
+    def refresh(self):
+        self.text.setPlainText(profiler.summary(top=50))
+    def _reset(self):
+        profiler.reset(); self.refresh()
+    def _save(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Save SQL Profile", "sql_profile.txt", "Text Files (*.txt)")
+        if path: profiler.dump(path)
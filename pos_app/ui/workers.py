@@ -0,0 +1,147 @@
+import threading
+from contextlib import contextmanager
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+from PyQt6.QtWidgets import QMessageBox, QProgressDialog
+
+
+class WorkerSignals(QObject):
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    progress = pyqtSignal(int, int)
+    returned = pyqtSignal()  # after fn returns or raises, also when cancelled
+
+
+class Worker(QRunnable):
+    """Run ``fn(worker, *args, **kwargs)`` on a QThreadPool.
+
+    The task gets the worker itself so it can report progress, check for
+    cancellation and register hooks that abort blocking calls (e.g. a DB
+    query) when the worker is cancelled. Results of a cancelled worker are
+    never emitted; ``returned`` always is, once ``fn`` is done.
+    """
+
+    def __init__(self, fn, *args, **kwargs):
+        super().__init__()
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = WorkerSignals()
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+        self._cancel_hooks = []
+
+    def cancel(self):
+        with self._lock:
+            if self._cancelled.is_set():
+                return
+            self._cancelled.set()
+            hooks, self._cancel_hooks = self._cancel_hooks, []
+        for hook in hooks:
+            try:
+                hook()
+            except Exception:
+                pass
+
+    def is_cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def on_cancel(self, hook):
+        with self._lock:
+            if not self._cancelled.is_set():
+                self._cancel_hooks.append(hook)
+                return
+        hook()
+
+    def remove_cancel_hook(self, hook):
+        with self._lock:
+            if hook in self._cancel_hooks:
+                self._cancel_hooks.remove(hook)
+
+    def report(self, done: int, total: int = 0):
+        if not self._cancelled.is_set():
+            self.signals.progress.emit(int(done), int(total))
+
+    def run(self):
+        try:
+            result = self.fn(self, *self.args, **self.kwargs)
+        except Exception as exc:
+            if not self._cancelled.is_set():
+                self.signals.failed.emit(str(exc))
+            self._returned()
+            return
+        finally:
+            with self._lock:
+                self._cancel_hooks = []
+        if not self._cancelled.is_set():
+            self.signals.finished.emit(result)
+        self._returned()
+
+    def _returned(self):
+        try:
+            self.signals.returned.emit()
+        except RuntimeError:
+            pass  # signals already deleted: a cancelled worker outliving its window at shutdown
+
+
+@contextmanager
+def interrupt_on_cancel(worker: Worker, session):
+    """While active, cancelling ``worker`` aborts the session's in-flight statement."""
+    raw = session.connection().connection.dbapi_connection
+    stop = getattr(raw, "interrupt", None) or getattr(raw, "cancel", None)  # sqlite3 / psycopg
+    if stop is None:
+        yield
+        return
+    worker.on_cancel(stop)
+    try:
+        yield
+    finally:
+        worker.remove_cancel_hook(stop)
+
+
+def run_with_progress(parent, title: str, text: str, fn, on_finished, on_cancelled=None, pool=None, on_failed=None) -> Worker:
+    """Run ``fn(worker)`` on a pool behind a cancellable progress dialog.
+
+    Progress reported with a total of 0 shows a busy bar and the running
+    count in the label. Failures are shown in a message box, then passed to
+    ``on_failed``. ``on_cancelled`` runs once a cancelled task has actually
+    returned, not when Cancel is clicked. All callbacks are connected before
+    the worker starts.
+    """
+    dlg = QProgressDialog(text, "Cancel", 0, 0, parent)
+    dlg.setWindowTitle(title); dlg.setMinimumDuration(300)
+    worker = Worker(fn)
+    reported = []  # set once finished or failed was handled, so a late Cancel doesn't also call on_cancelled
+
+    def on_progress(done, total):
+        if total:
+            dlg.setMaximum(total); dlg.setValue(done)
+        else:
+            dlg.setLabelText(f"{text} {done:,}")
+
+    def finish():
+        reported.append(True)
+        dlg.canceled.disconnect(cancel)
+        dlg.close()
+
+    def done(result):
+        finish(); on_finished(result)
+
+    def failed(msg):
+        finish(); QMessageBox.critical(parent, title, msg)
+        if on_failed is not None:
+            on_failed(msg)
+
+    def cancel():
+        worker.cancel()
+
+    def returned():
+        if worker.is_cancelled() and not reported and on_cancelled is not None:
+            on_cancelled()
+
+    worker.signals.progress.connect(on_progress)
+    worker.signals.finished.connect(done)
+    worker.signals.failed.connect(failed)
+    worker.signals.returned.connect(returned)
+    dlg.canceled.connect(cancel)
+    (pool or QThreadPool.globalInstance()).start(worker)
+    return worker
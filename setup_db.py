@@ -1,6 +1,7 @@
 from pos_app.data.db import get_engine, get_session_maker, Base
 from pos_app.data.models import *
 from pos_app.auth import hash_password
+from pos_app.data.search import ensure_search_index
 from sqlalchemy.orm import Session
 
 def seed_data(db: Session):
@@ -47,6 +48,7 @@ def seed_data(db: Session):
 def main():
     engine = get_engine()
     Base.metadata.create_all(engine)
+    ensure_search_index(engine)
     SessionLocal = get_session_maker(engine)
     with SessionLocal() as s: seed_data(s)
     print("DB ready.")
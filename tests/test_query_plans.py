@@ -0,0 +1,10 @@
+from sqlalchemy import create_engine
+from pos_app.data.db import Base
+from pos_app.data import models  # noqa: F401  (registers the tables on Base)
+from pos_app.data.explain import check_plans
+
+def test_hot_queries_use_indexes(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'plans.db'}")
+    Base.metadata.create_all(engine)
+    failures = check_plans(engine)
+    assert failures == [], [f"{q.name}: full scan of {', '.join(sorted(t))}" for q, t in failures]